@@ -0,0 +1,275 @@
+# Phase timings for rd.py, against recorded captures or synthetic ones from synthetic.py.
+#
+#   python bench/bench.py --synthetic 1000,10000 out/
+#   python bench/bench.py --baseline out/baseline.json D:\captures\a.rdc D:\captures\b.rdc out/
+#
+# Every capture runs rdc_main in a fresh process, with its report in out/<capture name>/ and an empty
+# ~/.render-doctor unless --warm is passed. Results go to out/bench_<time>.json,
+# with --baseline they are compared and regressions above --threshold make the exit code 1.
+# Phase times are inclusive, writeIndexHtml contains writeDAG and generate_raw_data contains collectPipeline.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+from pathlib import Path
+
+g_bench_folder = Path(__file__).absolute().parent
+
+BENCH_VERSION = 1
+
+PHASES = [
+    'fetch_gpu_counters',
+    'generate_raw_data',
+    'collectPipeline',
+    'exportResources',
+    'generate_viz',
+    'writeIndexHtml',
+    'writeDetailHtml',
+    'writeDAG',
+]
+
+# metric -> smallest change worth reporting, small phases jitter a lot
+METRIC_NOISE = {
+    'seconds': 0.05,
+    'peak_rss_mb': 8,
+    'files_written': 0,
+    'bytes_written': 4096,
+}
+
+def is_synthetic(rdc_file):
+    # synthetic captures are json specs, real ones start with the RDOC magic
+    with open(rdc_file, 'rb') as fp:
+        return fp.read(1) == b'{'
+
+class PhaseTimer:
+    # wraps functions and methods of the same name, nested calls of a phase are only counted once
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self.depth = {}
+
+    def wrap(self, phase, func):
+        def timed(*args, **kwargs):
+            self.calls[phase] = self.calls.get(phase, 0) + 1
+            depth = self.depth.get(phase, 0)
+            self.depth[phase] = depth + 1
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.depth[phase] = depth
+                if depth == 0:
+                    self.seconds[phase] = self.seconds.get(phase, 0.0) + time.perf_counter() - start
+        timed.__name__ = func.__name__
+        timed.__wrapped__ = func
+        return timed
+
+    def install(self, modules, phases):
+        for module in modules:
+            for name, item in list(vars(module).items()):
+                if name in phases and callable(item):
+                    setattr(module, name, self.wrap(name, item))
+                elif isinstance(item, type) and item.__module__ == module.__name__:
+                    for phase in phases:
+                        if phase in item.__dict__:
+                            setattr(item, phase, self.wrap(phase, item.__dict__[phase]))
+
+def get_peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None # windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def count_written_files(folder, since):
+    files = 0
+    size = 0
+    for root, dirs, names in os.walk(folder):
+        for name in names:
+            st = os.stat(os.path.join(root, name))
+            if st.st_mtime >= since:
+                files += 1
+                size += st.st_size
+    return files, size
+
+def run_child(rdc_file, report_folder, result_file):
+    # runs inside the fresh process
+    if is_synthetic(rdc_file):
+        sys.path.insert(0, str(g_bench_folder))
+    sys.path.insert(0, str(g_bench_folder.parent))
+
+    import rd
+    import rd_report
+
+    timer = PhaseTimer()
+    timer.install([rd, rd_report], PHASES)
+
+    rd.rdc_file = str(rdc_file)
+    rd.g_output_folder = Path(report_folder)
+    rd.g_assets_folder = rd.g_output_folder / 'assets'
+    rd.g_assets_folder.mkdir(parents=True, exist_ok=True)
+
+    start_time = time.time()
+    start = time.perf_counter()
+    cap, controller = rd.setup_rdc(str(rdc_file))
+    open_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    rd.rdc_main(controller)
+    total_seconds = time.perf_counter() - start
+    rd.shutdown_rdc(cap, controller)
+
+    files, size = count_written_files(rd.g_output_folder, start_time - 1)
+    result = {
+        'rdc_file': str(rdc_file),
+        'draws': len(rd.g_draws),
+        'open_seconds': open_seconds,
+        'total_seconds': total_seconds,
+        'phases': {p: {'seconds': timer.seconds.get(p, 0.0), 'calls': timer.calls.get(p, 0)} for p in PHASES},
+        'peak_rss_mb': get_peak_rss_mb(),
+        'files_written': files,
+        'bytes_written': size,
+    }
+    with open(result_file, 'w', encoding='utf-8') as fp:
+        json.dump(result, fp, indent=2)
+
+def run_capture(rdc_file, folder, warm):
+    folder = Path(folder)
+    name = Path(rdc_file).stem
+    report_folder = folder / name
+    result_file = folder / (name + '.bench.json')
+    log_file = folder / (name + '.bench.log')
+    # files written are counted in the report folder, leftovers from the last run would be skipped by AssetStore
+    shutil.rmtree(report_folder, ignore_errors=True)
+    env = dict(os.environ)
+    if not warm:
+        # shader database and malioc cache live in the home folder
+        home = folder / 'home'
+        shutil.rmtree(home, ignore_errors=True)
+        home.mkdir()
+        env['HOME'] = env['USERPROFILE'] = str(home)
+    with open(log_file, 'w', encoding='utf-8') as fp:
+        status = subprocess.run([sys.executable, __file__, '--child', str(rdc_file), str(report_folder), str(result_file)], stdout=fp, stderr=subprocess.STDOUT, env=env)
+    if status.returncode != 0 or not result_file.exists():
+        print('Error: %s failed, see %s' % (rdc_file, log_file))
+        return None
+    with open(result_file, encoding='utf-8') as fp:
+        return json.load(fp)
+
+def get_metrics(result):
+    # flat metric name -> (value, kind) for comparisons
+    metrics = {'total_seconds': (result['total_seconds'], 'seconds')}
+    for phase, item in result['phases'].items():
+        metrics[phase] = (item['seconds'], 'seconds')
+    for kind in ('peak_rss_mb', 'files_written', 'bytes_written'):
+        if result.get(kind) is not None:
+            metrics[kind] = (result[kind], kind)
+    return metrics
+
+def compare_results(results, baseline, threshold):
+    regressions = []
+    for name, result in results['captures'].items():
+        base = baseline['captures'].get(name)
+        if base is None:
+            print('%s: not in baseline' % name)
+            continue
+        base_metrics = get_metrics(base)
+        for metric, (value, kind) in get_metrics(result).items():
+            if metric not in base_metrics:
+                continue
+            base_value = base_metrics[metric][0]
+            change = value - base_value
+            ratio = change / base_value if base_value else (1.0 if change > 0 else 0.0)
+            flag = ''
+            if ratio > threshold and change > METRIC_NOISE[kind]:
+                flag = ' REGRESSION'
+                regressions.append((name, metric, base_value, value))
+            elif ratio < -threshold and -change > METRIC_NOISE[kind]:
+                flag = ' improved'
+            print('%-24s %-20s %12s -> %12s %+7.1f%%%s' % (name, metric, format_metric(base_value), format_metric(value), ratio * 100, flag))
+    return regressions
+
+def format_metric(value):
+    if isinstance(value, float):
+        return '%.3f' % value
+    return str(value)
+
+def print_result(name, result):
+    print('%s: %d draws, total %.2fs, peak rss %s MB, %d files, %d bytes written' % (
+        name, result['draws'], result['total_seconds'], format_metric(result['peak_rss_mb']), result['files_written'], result['bytes_written']))
+    for phase, item in result['phases'].items():
+        print('    %-20s %8.3fs %8d calls' % (phase, item['seconds'], item['calls']))
+
+if __name__ == '__main__':
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], sys.argv[3], sys.argv[4])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description='time the phases of rd.py')
+    parser.add_argument('captures', nargs='*', help='recorded .rdc files, need the real renderdoc module')
+    parser.add_argument('output', help='folder for synthetic captures, reports and results')
+    parser.add_argument('--synthetic', default='', help='comma separated draw counts of synthetic captures')
+    parser.add_argument('--passes', type=int, default=40)
+    parser.add_argument('--textures', type=int, default=200)
+    parser.add_argument('--shaders', type=int, default=30)
+    parser.add_argument('--baseline', help='results json to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='also write the results to --baseline')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per capture, the fastest one is kept')
+    parser.add_argument('--warm', action='store_true', help='keep the shader database and malioc cache from earlier runs')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative slowdown that counts as a regression')
+    args = parser.parse_args()
+
+    output = Path(args.output).absolute()
+    output.mkdir(parents=True, exist_ok=True)
+    captures = [Path(c).absolute() for c in args.captures]
+    if args.synthetic:
+        import synthetic
+        for draws in [int(n) for n in args.synthetic.split(',')]:
+            rdc_file = output / ('synthetic_%d.rdc' % draws)
+            synthetic.write_capture(rdc_file, draws=draws, passes=args.passes, textures=args.textures, shaders=args.shaders)
+            captures.append(rdc_file)
+    if not captures:
+        parser.error('no captures, pass .rdc files or --synthetic')
+
+    results = {
+        'version': BENCH_VERSION,
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'warm': args.warm,
+        'repeat': args.repeat,
+        'captures': {},
+    }
+    for rdc_file in captures:
+        runs = [run_capture(rdc_file, output, args.warm) for i in range(max(1, args.repeat))]
+        runs = [r for r in runs if r]
+        if runs:
+            result = min(runs, key=lambda r: r['total_seconds'])
+            results['captures'][rdc_file.name] = result
+            print_result(rdc_file.name, result)
+
+    result_file = output / ('bench_%s.json' % time.strftime('%Y%m%d_%H%M%S'))
+    with open(result_file, 'w', encoding='utf-8') as fp:
+        json.dump(results, fp, indent=2)
+    print(result_file)
+
+    failed = len(results['captures']) != len(captures)
+    if args.baseline:
+        baseline_file = Path(args.baseline)
+        if args.save_baseline or not baseline_file.exists():
+            with open(baseline_file, 'w', encoding='utf-8') as fp:
+                json.dump(results, fp, indent=2)
+            print('baseline saved to %s' % baseline_file)
+        else:
+            with open(baseline_file, encoding='utf-8') as fp:
+                baseline = json.load(fp)
+            regressions = compare_results(results, baseline, args.threshold)
+            print('%d regressions above %.0f%%' % (len(regressions), args.threshold * 100))
+            failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,527 @@
+# Stand-in for RenderDoc's python module, so rd.py can run on a machine without RenderDoc or a GPU.
+# Only the API surface used by rd.py is implemented, the capture itself comes from synthetic.py.
+#
+#   python bench/synthetic.py --draws 100000 --passes 400 out/
+#
+# https://renderdoc.org/docs/python_api/renderdoc/index.html
+
+import sys
+import json
+from enum import IntEnum, IntFlag
+
+class ResourceId:
+    __slots__ = ('value',)
+
+    def __init__(self, value=0):
+        self.value = int(value)
+
+    @staticmethod
+    def Null():
+        return ResourceId(0)
+
+    def __int__(self):
+        return self.value
+
+    def __eq__(self, other):
+        return isinstance(other, ResourceId) and other.value == self.value
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        return self.value < other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return 'ResourceId::%d' % self.value
+
+class GraphicsAPI(IntEnum):
+    D3D11 = 0
+    D3D12 = 1
+    OpenGL = 2
+    Vulkan = 3
+
+class ShaderStage(IntEnum):
+    Vertex = 0
+    Hull = 1
+    Domain = 2
+    Geometry = 3
+    Pixel = 4
+    Compute = 5
+    Count = 6
+
+class ActionFlags(IntFlag):
+    NoFlags = 0
+    Clear = 0x1
+    Drawcall = 0x2
+    Dispatch = 0x4
+    MultiAction = 0x8
+    Copy = 0x10
+    PushMarker = 0x20
+    PopMarker = 0x40
+    SetMarker = 0x80
+
+class TextureCategory(IntFlag):
+    NoFlags = 0
+    ShaderRead = 0x1
+    ColorTarget = 0x2
+    DepthTarget = 0x4
+    ShaderReadWrite = 0x8
+    SwapBuffer = 0x10
+
+class TextureType(IntEnum):
+    Unknown = 0
+    Buffer = 1
+    Texture1D = 2
+    Texture1DArray = 3
+    Texture2D = 4
+    TextureRect = 5
+    Texture2DArray = 6
+    Texture2DMS = 7
+    Texture2DMSArray = 8
+    Texture3D = 9
+    TextureCube = 10
+    TextureCubeArray = 11
+
+class CompType(IntEnum):
+    Typeless = 0
+    Float = 1
+    UNorm = 2
+    SNorm = 3
+    UInt = 4
+    SInt = 5
+    UScaled = 6
+    SScaled = 7
+    Depth = 8
+    UNormSRGB = 9
+
+class ResourceFormatType(IntEnum):
+    Regular = 0
+    Undefined = 1
+    BC1 = 2
+    BC7 = 8
+    ETC2 = 10
+    ASTC = 13
+    R10G10B10A2 = 16
+    R11G11B10 = 17
+    R5G6B5 = 18
+    R5G5B5A1 = 19
+    R9G9B9E5 = 20
+    R4G4B4A4 = 21
+    D16S8 = 23
+    D24S8 = 24
+    D32S8 = 25
+    S8 = 26
+    A8 = 28
+
+class VarType(IntEnum):
+    Float = 0
+    Double = 1
+    Half = 2
+    SInt = 3
+    UInt = 4
+
+class AlphaMapping(IntEnum):
+    Discard = 0
+    BlendToColor = 1
+    BlendToCheckerboard = 2
+    Preserve = 3
+
+class FileType(IntEnum):
+    DDS = 0
+    PNG = 1
+    JPG = 2
+    BMP = 3
+    TGA = 4
+    HDR = 5
+    EXR = 6
+
+class ReplayStatus(IntEnum):
+    Succeeded = 0
+    UnknownError = 1
+    FileIOFailed = 6
+
+class GPUCounter(IntEnum):
+    EventGPUDuration = 1
+
+class ResourceFormat:
+    def __init__(self, other=None, name='R8G8B8A8_UNORM', compCount=4, compByteWidth=1, compType=CompType.UNorm, type=ResourceFormatType.Regular):
+        if isinstance(other, ResourceFormat):
+            name, compCount, compByteWidth, compType, type = other.name, other.compCount, other.compByteWidth, other.compType, other.type
+        self.name = name
+        self.compCount = compCount
+        self.compByteWidth = compByteWidth
+        self.compType = compType
+        self.type = type
+
+    def Name(self):
+        return self.name
+
+    def Special(self):
+        return self.type != ResourceFormatType.Regular
+
+    def ElementSize(self):
+        packed = {
+            ResourceFormatType.D24S8: 4,
+            ResourceFormatType.D32S8: 8,
+            ResourceFormatType.R10G10B10A2: 4,
+            ResourceFormatType.R11G11B10: 4,
+        }
+        return packed.get(self.type, self.compCount * self.compByteWidth)
+
+class TextureDescription:
+    def __init__(self, resourceId, width, height, format, creationFlags, mips=1):
+        self.resourceId = resourceId
+        self.width = width
+        self.height = height
+        self.depth = 1
+        self.arraysize = 1
+        self.mips = mips
+        self.msSamp = 1
+        self.dimension = 2
+        self.cubemap = False
+        self.format = format
+        self.type = TextureType.Texture2D
+        self.creationFlags = creationFlags
+        self.byteSize = width * height * max(1, format.ElementSize())
+
+class BufferDescription:
+    def __init__(self, resourceId, length):
+        self.resourceId = resourceId
+        self.length = length
+        self.creationFlags = 0
+        self.gpuAddress = 0
+
+class ResourceDescription:
+    def __init__(self, resourceId, name):
+        self.resourceId = resourceId
+        self.name = name
+        self.type = 0
+
+class APIEvent:
+    def __init__(self, eventId, chunkIndex):
+        self.eventId = eventId
+        self.chunkIndex = chunkIndex
+
+class ActionDescription:
+    def __init__(self):
+        self.eventId = 0
+        self.actionId = 0
+        self.flags = ActionFlags.NoFlags
+        self.events = []
+        self.children = []
+        self.outputs = [ResourceId.Null()] * 8
+        self.depthOut = ResourceId.Null()
+        self.numIndices = 0
+        self.numInstances = 1
+        self.topology = 'TriangleList'
+        self.customName = ''
+
+    def GetName(self, sdfile):
+        return self.customName
+
+class SDChunkMetaData:
+    def __init__(self, chunkID):
+        self.chunkID = chunkID
+
+class SDChunk:
+    def __init__(self, chunkID):
+        self.metadata = SDChunkMetaData(chunkID)
+
+class SDFile:
+    def __init__(self):
+        self.chunks = []
+
+class ShaderValue:
+    def __init__(self, values):
+        self.f32v = values
+        self.f64v = []
+        self.s32v = []
+        self.u32v = []
+
+class ShaderVariable:
+    def __init__(self, name, values, rows=1, columns=4):
+        self.name = name
+        self.rows = rows
+        self.columns = columns
+        self.type = VarType.Float
+        self.value = ShaderValue(values)
+        self.members = []
+
+class ShaderReflection:
+    def __init__(self, source):
+        self.rawBytes = source.encode('utf-8')
+        self.readOnlyResources = []
+        self.constantBlocks = []
+
+class BoundCBuffer:
+    def __init__(self, resourceId, byteOffset, byteSize):
+        self.resourceId = resourceId
+        self.byteOffset = byteOffset
+        self.byteSize = byteSize
+
+class ColorBlend:
+    def __init__(self):
+        self.enabled = False
+        self.writeMask = 0xf
+
+class PipeState:
+    def __init__(self, controller):
+        self.controller = controller
+
+    def GetShader(self, stage):
+        d = self.controller.current
+        if d is None or not d.is_draw:
+            return ResourceId.Null()
+        if stage == ShaderStage.Vertex:
+            return d.vs
+        if stage == ShaderStage.Pixel:
+            return d.ps
+        return ResourceId.Null()
+
+    def GetShaderReflection(self, stage):
+        return self.controller.capture.reflections.get(self.GetShader(stage))
+
+    def GetGraphicsPipelineObject(self):
+        d = self.controller.current
+        return d.program if d else ResourceId.Null()
+
+    def GetComputePipelineObject(self):
+        return ResourceId.Null()
+
+    def GetShaderEntryPoint(self, stage):
+        return 'main'
+
+    def GetConstantBuffer(self, stage, slot, array_index):
+        d = self.controller.current
+        if d is not None and slot < 2:
+            return BoundCBuffer(d.ubo, slot * 64, 64)
+        return BoundCBuffer(ResourceId.Null(), 0, 0)
+
+    def GetColorBlends(self):
+        return [ColorBlend()]
+
+    def GetSamplers(self, stage):
+        return []
+
+# GLPipe.State, only the members rd.py reads
+class GLShader:
+    def __init__(self, programResourceId, shaderResourceId):
+        self.programResourceId = programResourceId
+        self.shaderResourceId = shaderResourceId
+
+class GLTexture:
+    def __init__(self, resourceId):
+        self.resourceId = resourceId
+
+class GLDepthState:
+    def __init__(self):
+        self.depthEnable = True
+        self.depthWrites = True
+        self.depthFunction = 'Less'
+
+class GLStencilState:
+    def __init__(self):
+        self.stencilEnable = False
+
+class GLState:
+    def __init__(self, d):
+        null_shader = GLShader(ResourceId.Null(), ResourceId.Null())
+        self.vertexShader = GLShader(d.program, d.vs) if d else null_shader
+        self.fragmentShader = GLShader(d.program, d.ps) if d else null_shader
+        self.tessControlShader = null_shader
+        self.tessEvalShader = null_shader
+        self.geometryShader = null_shader
+        self.computeShader = null_shader
+        self.textures = [GLTexture(t) for t in d.textures] if d else []
+        self.samplers = [GLTexture(ResourceId.Null())]
+        self.depthState = GLDepthState()
+        self.stencilState = GLStencilState()
+
+class CountedStats:
+    def __init__(self):
+        self.calls = 0
+        self.instanced = 0
+        self.indirect = 0
+        self.clients = 0
+        self.servers = 0
+        self.sets = 0
+        self.nulls = 0
+
+class FrameStatistics:
+    def __init__(self):
+        self.recorded = True
+        for group in ('draws', 'dispatches', 'updates', 'indices', 'vertices', 'layouts', 'blends', 'depths', 'rasters', 'outputs'):
+            setattr(self, group, CountedStats())
+
+class FrameDescription:
+    def __init__(self):
+        self.stats = FrameStatistics()
+
+class APIProperties:
+    def __init__(self, pipelineType):
+        self.pipelineType = pipelineType
+        self.vendor = 1
+
+class CounterDescription:
+    def __init__(self):
+        self.resultByteWidth = 8
+
+class CounterValue:
+    def __init__(self, value):
+        self.d = value
+        self.f = value
+
+class CounterResult:
+    def __init__(self, eventId, value):
+        self.eventId = eventId
+        self.value = CounterValue(value)
+
+class TextureSave:
+    class Slice:
+        def __init__(self):
+            self.sliceIndex = 0
+
+    def __init__(self):
+        self.resourceId = ResourceId.Null()
+        self.alpha = AlphaMapping.Discard
+        self.destType = FileType.JPG
+        self.mip = 0
+        self.slice = TextureSave.Slice()
+
+class Subresource:
+    def __init__(self, mip=0, slice=0, sample=0):
+        self.mip = mip
+        self.slice = slice
+        self.sample = sample
+
+class ReplayController:
+    # replays a synthetic.SyntheticCapture, every call is counted in self.calls
+    def __init__(self, capture):
+        self.capture = capture
+        self.current = None
+        self.calls = {}
+        self.seek_log = []
+
+    def count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def GetStructuredFile(self):
+        self.count('GetStructuredFile')
+        return self.capture.sdfile
+
+    def GetAPIProperties(self):
+        return APIProperties(self.capture.api)
+
+    def GetFrameInfo(self):
+        return FrameDescription()
+
+    def GetRootActions(self):
+        self.count('GetRootActions')
+        return self.capture.roots
+
+    def GetTextures(self):
+        self.count('GetTextures')
+        return self.capture.textures
+
+    def GetBuffers(self):
+        self.count('GetBuffers')
+        return self.capture.buffers
+
+    def GetResources(self):
+        self.count('GetResources')
+        return self.capture.resources
+
+    def SetFrameEvent(self, eventId, force):
+        self.count('SetFrameEvent')
+        self.current = self.capture.draws.get(eventId)
+        self.seek_log.append(eventId)
+
+    def GetPipelineState(self):
+        self.count('GetPipelineState')
+        return PipeState(self)
+
+    def GetGLPipelineState(self):
+        self.count('GetGLPipelineState')
+        return GLState(self.current)
+
+    def GetCBufferVariableContents(self, *args):
+        self.count('GetCBufferVariableContents')
+        # (pipeline, shader, [stage,] entry, slot, buffer, offset, size), the stage was added in 1.2x
+        slot = args[4] if len(args) == 8 else args[3]
+        return [ShaderVariable('u_color%d' % slot, [0.5, 0.25, 1.0, 1.0]), ShaderVariable('u_unused', [0.0] * 4)]
+
+    def GetBufferData(self, resourceId, offset, size):
+        self.count('GetBufferData')
+        data = self.capture.buffer_data
+        return data[offset:offset + size] if size else data[offset:]
+
+    def GetTextureData(self, resourceId, sub):
+        self.count('GetTextureData')
+        return self.capture.getTextureData(resourceId, sub.mip, self.current)
+
+    def SaveTexture(self, texsave, path):
+        self.count('SaveTexture')
+        self.capture.saveTexture(texsave.resourceId, texsave.mip, path)
+        return True
+
+    def FetchCounters(self, counters):
+        self.count('FetchCounters')
+        return [CounterResult(eid, d.duration) for eid, d in self.capture.draws.items()]
+
+    def DescribeCounter(self, counter):
+        return CounterDescription()
+
+    def GetDisassemblyTargets(self, with_pipeline):
+        return ['SPIR-V']
+
+    def DisassembleShader(self, pipeline, refl, target):
+        self.count('DisassembleShader')
+        return refl.rawBytes.decode('utf-8')
+
+    def Shutdown(self):
+        total = sum(self.calls.values())
+        print('Debug: fake replay calls %d: %s' % (total, json.dumps(self.calls, sort_keys=True)))
+
+class CaptureFile:
+    def __init__(self):
+        self.capture = None
+
+    def OpenFile(self, filename, filetype, progress):
+        # the .rdc is a json spec written by synthetic.py
+        import synthetic
+        try:
+            self.capture = synthetic.load_capture(filename)
+        except (OSError, ValueError) as e:
+            print('Error: %s' % e)
+            return ReplayStatus.FileIOFailed
+        return ReplayStatus.Succeeded
+
+    def LocalReplaySupport(self):
+        return self.capture is not None
+
+    def OpenCapture(self, options, progress):
+        return ReplayStatus.Succeeded, ReplayController(self.capture)
+
+    def Shutdown(self):
+        pass
+
+def GetVersionString():
+    return '1.20'
+
+def InitialiseReplay(env, args):
+    pass
+
+def ShutdownReplay():
+    pass
+
+def GlobalEnvironment():
+    return None
+
+def ReplayOptions():
+    return None
+
+def OpenCaptureFile():
+    return CaptureFile()
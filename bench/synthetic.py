@@ -0,0 +1,254 @@
+# Synthetic captures for the stand-in renderdoc module in this folder.
+#
+# A synthetic .rdc is a small json spec, the frame is generated from it when the fake replay opens the file.
+# Running this script writes the spec and runs rd.py on it in a fresh process, once per draw count:
+#
+#   python bench/synthetic.py out/
+#   python bench/synthetic.py --draws 1000,10000,100000 --passes 400 --marker-depth 3 out/
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+from pathlib import Path
+
+import renderdoc as rd
+
+g_bench_folder = Path(__file__).absolute().parent
+
+SPEC_VERSION = 1
+
+DEFAULT_SPEC = {
+    'draws': 60, # including the clear that starts every pass
+    'passes': 4, # each pass has its own color and depth target
+    'marker_depth': 2, # nested push markers around every pass
+    'textures': 12,
+    'shaders': 5, # programs, each with a vertex and a fragment shader
+    'compressed': True, # every 5th texture is BC7
+    'seed': 1,
+}
+
+def get_chunk_ids():
+    # chunkID values come from the chunk enums in rd.py, run as the script or imported by bench.py
+    chunk_enum = None
+    for name in ('__main__', 'rd'):
+        chunk_enum = getattr(sys.modules.get(name), 'GLChunk', None)
+        if chunk_enum is not None:
+            break
+    if chunk_enum is None:
+        raise RuntimeError('GLChunk not found, synthetic captures only replay inside rd.py')
+    return {m.name: m.value for m in chunk_enum if isinstance(m.value, int)}
+
+class SyntheticDraw:
+    def __init__(self, is_draw, program, vs, ps, ubo, textures, pass_index, index_in_pass, duration):
+        self.is_draw = is_draw
+        self.program = program
+        self.vs = vs
+        self.ps = ps
+        self.ubo = ubo
+        self.textures = textures
+        self.pass_index = pass_index
+        self.index_in_pass = index_in_pass
+        self.duration = duration
+
+class SyntheticCapture:
+    def __init__(self, spec):
+        self.spec = dict(DEFAULT_SPEC, **spec)
+        self.api = rd.GraphicsAPI.OpenGL
+        self.rnd = random.Random(self.spec['seed'])
+        self.next_id = 100
+        self.textures = []
+        self.buffers = []
+        self.resources = []
+        self.texture_dict = {}
+        self.reflections = {}
+        self.sdfile = rd.SDFile()
+        self.roots = []
+        self.draws = {} # eventId -> SyntheticDraw
+        self.next_event_id = 0
+        self.next_action_id = 0
+        self.chunk_ids = get_chunk_ids()
+
+        self.createTextures()
+        self.createShaders()
+        self.createActions()
+
+    def newResource(self, name):
+        self.next_id += 1
+        resource_id = rd.ResourceId(self.next_id)
+        self.resources.append(rd.ResourceDescription(resource_id, name))
+        return resource_id
+
+    def addTexture(self, resource_id, width, height, fmt, flags, mips=1):
+        tex = rd.TextureDescription(resource_id, width, height, fmt, flags, mips)
+        self.textures.append(tex)
+        self.texture_dict[resource_id] = tex
+
+    def createTextures(self):
+        spec = self.spec
+        self.sampled = []
+        for i in range(spec['textures']):
+            resource_id = self.newResource('Texture2D %d' % i if i % 3 else 'T_FX_%d' % i)
+            size = 1 << self.rnd.randint(5, 10)
+            mips = 1 if i % 4 == 0 else size.bit_length()
+            if spec['compressed'] and i % 5 == 4:
+                fmt = rd.ResourceFormat(name='BC7_UNORM', type=rd.ResourceFormatType.BC7)
+            else:
+                fmt = rd.ResourceFormat(name='R8G8B8A8_UNORM')
+            self.addTexture(resource_id, size, size, fmt, rd.TextureCategory.ShaderRead, mips)
+            self.sampled.append(resource_id)
+
+        self.targets = []
+        for p in range(spec['passes']):
+            color = self.newResource('Color RT %d' % p)
+            depth = self.newResource('Depth RT %d' % p)
+            if p % 2:
+                color_fmt = rd.ResourceFormat(name='R8G8B8A8_UNORM')
+                depth_fmt = rd.ResourceFormat(name='D24S8', compCount=2, compByteWidth=0, compType=rd.CompType.Depth, type=rd.ResourceFormatType.D24S8)
+            else:
+                color_fmt = rd.ResourceFormat(name='R16G16B16A16_FLOAT', compByteWidth=2, compType=rd.CompType.Float)
+                depth_fmt = rd.ResourceFormat(name='D32_FLOAT', compCount=1, compByteWidth=4, compType=rd.CompType.Depth)
+            self.addTexture(color, 320, 180, color_fmt, rd.TextureCategory.ColorTarget | rd.TextureCategory.ShaderRead)
+            self.addTexture(depth, 320, 180, depth_fmt, rd.TextureCategory.DepthTarget)
+            self.targets.append((color, depth))
+
+        self.ubo = self.newResource('UBO')
+        self.buffers.append(rd.BufferDescription(self.ubo, 4096))
+        self.buffer_data = bytes(4096)
+
+    def createShaders(self):
+        self.programs = []
+        for s in range(self.spec['shaders']):
+            program = self.newResource('Program %d' % s)
+            vs = self.newResource('Vertex Shader %d' % s)
+            ps = self.newResource('Fragment Shader %d' % s)
+            for shader_id, kind in ((vs, 'vert'), (ps, 'frag')):
+                source = '#version 300 es\nuniform vec4 u_color%d;\nuniform vec4 u_unused;\nvoid main() { gl_FragColor = u_color%d * u_color%d; } // %s\n' % (s, s, s, kind)
+                self.reflections[shader_id] = rd.ShaderReflection(source)
+            self.programs.append((program, vs, ps))
+
+    def newEvent(self, chunk_name):
+        self.sdfile.chunks.append(rd.SDChunk(self.chunk_ids[chunk_name]))
+        self.next_event_id += 1
+        return rd.APIEvent(self.next_event_id, len(self.sdfile.chunks) - 1)
+
+    def newAction(self, flags, name, events):
+        self.next_action_id += 1
+        action = rd.ActionDescription()
+        action.actionId = self.next_action_id
+        action.flags = flags
+        action.customName = name
+        action.events = events
+        action.eventId = events[-1].eventId
+        return action
+
+    def createActions(self):
+        spec = self.spec
+        passes = max(1, spec['passes'])
+        draws_per_pass = max(1, spec['draws'] // passes)
+        for p in range(passes):
+            color, depth = self.targets[p]
+            parent = None
+            for m in range(spec['marker_depth']):
+                marker = self.newAction(rd.ActionFlags.PushMarker, 'Pass%d.Marker%d' % (p, m), [self.newEvent('glPushGroupMarkerEXT')])
+                (parent.children if parent else self.roots).append(marker)
+                parent = marker
+            container = parent.children if parent else self.roots
+
+            for k in range(draws_per_pass):
+                events = []
+                if k == 0:
+                    events.append(self.newEvent('glBindFramebuffer'))
+                events.append(self.newEvent('glUseProgram'))
+                events.append(self.newEvent('glBindTexture'))
+                if k == 0:
+                    events.append(self.newEvent('glClear'))
+                    action = self.newAction(rd.ActionFlags.Clear, 'glClear(Color = <0,0,0,0>)', events)
+                else:
+                    events.append(self.newEvent('glDrawElements'))
+                    action = self.newAction(rd.ActionFlags.Drawcall, 'glDrawElements(%d)' % (3 * (k + 1)), events)
+                    action.numIndices = 3 * (k + 1)
+                action.outputs = [color] + [rd.ResourceId.Null()] * 7
+                action.depthOut = depth
+                container.append(action)
+
+                program, vs, ps = self.programs[(p * 7 + k // 3) % len(self.programs)]
+                textures = [self.sampled[(p + k + j) % len(self.sampled)] for j in range(2)] if self.sampled else []
+                self.draws[action.eventId] = SyntheticDraw(k > 0, program, vs, ps, self.ubo, textures, p, k, 0.001 * (action.eventId % 17))
+
+    def getTextureData(self, resource_id, mip, current_draw):
+        tex = self.texture_dict[resource_id]
+        width = max(1, tex.width >> mip)
+        height = max(1, tex.height >> mip)
+        fmt = tex.format
+        if fmt.Special() and fmt.type not in (rd.ResourceFormatType.D24S8, rd.ResourceFormatType.D32S8):
+            # block compressed, 16 bytes per 4x4 block
+            return bytes(max(1, (width // 4) * (height // 4) * 16))
+        bpp = max(1, fmt.ElementSize())
+        if int(resource_id) % 3 == 0:
+            return bytes([0x40]) * (width * height * bpp)
+        # gradient, render targets change every other draw of their pass
+        k = 0
+        if tex.creationFlags & (rd.TextureCategory.ColorTarget | rd.TextureCategory.DepthTarget) and current_draw is not None:
+            k = current_draw.index_in_pass // 2
+        row = bytes((x * 7 + k) & 0xff for x in range(width * bpp))
+        return row * height
+
+    def saveTexture(self, resource_id, mip, path):
+        tex = self.texture_dict[resource_id]
+        size = (max(1, tex.width >> mip), max(1, tex.height >> mip))
+        try:
+            from PIL import Image
+            Image.new('RGB', size, (int(resource_id) % 255, 80, 120)).save(path, 'JPEG')
+        except ImportError:
+            with open(path, 'wb') as fp:
+                fp.write(b'\xff\xd8\xff\xd9')
+
+def write_capture(filename, **spec):
+    data = {'version': SPEC_VERSION, 'spec': dict(DEFAULT_SPEC, **spec)}
+    with open(filename, 'w', encoding='utf-8') as fp:
+        json.dump(data, fp, indent=2)
+
+def load_capture(filename):
+    with open(filename, 'r', encoding='utf-8') as fp:
+        data = json.load(fp)
+    if data.get('version') != SPEC_VERSION:
+        raise ValueError('%s is not a synthetic capture (version %s)' % (filename, data.get('version')))
+    return SyntheticCapture(data['spec'])
+
+def run_capture(rdc_file, script):
+    # fresh process per run, rd.py keeps its state in globals
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([str(g_bench_folder), env.get('PYTHONPATH', '')])
+    log_file = Path(rdc_file).with_suffix('.log')
+    start = time.time()
+    with open(log_file, 'w', encoding='utf-8') as fp:
+        result = subprocess.run([sys.executable, str(script), str(rdc_file)], stdout=fp, stderr=subprocess.STDOUT, env=env)
+    return time.time() - start, result.returncode, log_file
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='run rd.py on synthetic captures')
+    parser.add_argument('output', help='folder for the .rdc specs and reports')
+    parser.add_argument('--draws', default=str(DEFAULT_SPEC['draws']), help='comma separated draw counts, one run each')
+    parser.add_argument('--passes', type=int, default=DEFAULT_SPEC['passes'])
+    parser.add_argument('--marker-depth', type=int, default=DEFAULT_SPEC['marker_depth'])
+    parser.add_argument('--textures', type=int, default=DEFAULT_SPEC['textures'])
+    parser.add_argument('--shaders', type=int, default=DEFAULT_SPEC['shaders'])
+    parser.add_argument('--no-compressed', action='store_true', help='no BC7 textures')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SPEC['seed'])
+    parser.add_argument('--script', default=str(g_bench_folder.parent / 'rd.py'))
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    print('%10s %8s %10s  %s' % ('draws', 'passes', 'seconds', 'log'))
+    for draws in [int(n) for n in args.draws.split(',')]:
+        rdc_file = output / ('synthetic_%d.rdc' % draws)
+        write_capture(rdc_file, draws=draws, passes=args.passes, marker_depth=args.marker_depth,
+                      textures=args.textures, shaders=args.shaders, compressed=not args.no_compressed, seed=args.seed)
+        elapsed, returncode, log_file = run_capture(rdc_file, args.script)
+        status = '' if returncode == 0 else ' (exit code %d)' % returncode
+        print('%10d %8d %10.2f  %s%s' % (draws, args.passes, elapsed, log_file, status))
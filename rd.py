@@ -18,47 +18,45 @@
 # C:\svn_pool\renderdoc\renderdoc\replay\replay_controller.h
 
 # TODO
-# [] Add a json layer for generate_raw_data, separate raw_data and controller
+# [x] Add a json layer for generate_raw_data, separate raw_data and controller
 # [] Add resource manager, and export to disk
 
 import os
 import sys
 import math
-from pathlib import Path, WindowsPath
+from pathlib import Path
 import pprint
 from datetime import datetime
 from collections import defaultdict, OrderedDict
+from types import SimpleNamespace
 from enum import Enum, auto
 import subprocess
 import struct
 import json
+import hashlib
+import threading
+import time
+import io
 
 sys.path.append('../renderdoc/x64/Development/pymodules')
 os.environ["PATH"] += os.path.abspath('../renderdoc/x64/Development')
 
 import renderdoc as rd
 
-# config <----> %APPDATA%/rd.json
-config = {
-    'MINIMALIST' : False,  # Enable full mode
-    'WRITE_MALIOC' : True,  # Enable Mali offline compiler analysis
-    'WRITE_CONST_BUFFER' : True,  # Enable constant buffer writing
-    'WRITE_PIPELINE' : True,
-    'WRITE_COLOR_BUFFER' : True,  # Enable color buffer writing
-    'WRITE_TEXTURE' : True,  # Enable texture writing
-    'WRITE_DEPTH_BUFFER' : True,  # Enable depth buffer writing
-    'WRITE_PSO_DAG' : True,
-    'WRITE_SINGLE_COLOR' : True,
-    'WRITE_ALL_DRAWS' : True,
-    'IMAGE_COMPRESSION' : True,  # Enable image compression
-    'MAX_IMAGE_SIZE' : 256,  # Maximum image size
-    'JPEG_QUALITY' : 85,  # JPEG compression quality (0-100)
-}
+# the report half lives in rd_report.py next to this script, RenderDoc's python shell doesn't set __file__
+g_script_folder = Path(__file__).absolute().parent if '__file__' in globals() else Path(r'D:\render-doctor')
+sys.path.insert(0, str(g_script_folder))
+import importlib
+import rd_report as report
+report = importlib.reload(report) # RenderDoc's python shell keeps modules between runs
+from rd_report import config, IMG_EXT, ShaderStage, RAW_DATA_VERSION, RAW_DATA_FILE
+from rd_report import get_resource_filename, format_memory_size, load_config, g_asset_store
+from rd_report import g_profiler, ProfiledController, g_log, RUN_LOG_FILE
+from rd_report import HtmlBuffer, PAGE_HEAD_TEMPLATE, FrameOverview
 
 api_full_log = None
 api_short_log = None
 API_TYPE = None # GraphicsAPI
-IMG_EXT = 'jpg'
 
 def getSafeName(name):
     if name[0] == '_':
@@ -72,13 +70,6 @@ def getSafeName(name):
     name = name.replace('__', '_')
     return name
 
-class ShaderStage(Enum):
-    VS = 0
-    HS = auto()
-    DS = auto()
-    GS = auto()
-    PS = auto()
-    CS = auto()
 
 class GLChunk(Enum):
     Dummy = 0
@@ -1696,6 +1687,75 @@ class VulkanChunk(Enum):
     CoherentMapWrite = auto()
     Max = auto()
 
+class EventCategory:
+    # small integer categories stored in ChunkTable.categories
+    Other = 0
+    Draw = 1
+    Dispatch = 2
+    FBOBind = 3
+    Marker = 4
+    StateSet = 5
+    Clear = 6
+    Copy = 7
+
+# chunks that mark the start of a new pass
+FBO_BIND_CHUNKS = {
+    'glBindFramebuffer',
+    'vkCmdBeginRenderPass',
+    'OMSetRenderTargets',
+    'OMSetRenderTargetsAndUnorderedAccessViews',
+}
+
+def classify_chunk_name(name):
+    if name in FBO_BIND_CHUNKS:
+        return EventCategory.FBOBind
+    # NOTE: matches glDrawBuffers etc as well, Event relies on this to separate passes
+    if 'Draw' in name:
+        return EventCategory.Draw
+    if 'Dispatch' in name:
+        return EventCategory.Dispatch
+    if 'Marker' in name or 'DebugGroup' in name or 'DebugUtilsLabel' in name:
+        return EventCategory.Marker
+    if 'Clear' in name or 'Invalidate' in name or 'Discard' in name:
+        return EventCategory.Clear
+    if 'Copy' in name or 'Blit' in name or 'Resolve' in name:
+        return EventCategory.Copy
+    if 'Set' in name or 'Bind' in name or 'Uniform' in name or name.startswith('glEnable') or name.startswith('glDisable'):
+        return EventCategory.StateSet
+    return EventCategory.Other
+
+UNKNOWN_CHUNK_NAME = 'Unknown'
+
+class ChunkTable:
+    # dense chunkID -> (category, name) arrays, built once per API from the chunk enums
+    # so that classifying an event doesn't construct an Enum or search strings
+    def __init__(self, chunk_enum):
+        members = [m for m in chunk_enum if isinstance(m.value, int)]
+        self.size = max(m.value for m in members) + 1
+        self.categories = bytearray(self.size)
+        self.names = [UNKNOWN_CHUNK_NAME] * self.size
+        for m in members:
+            self.categories[m.value] = classify_chunk_name(m.name)
+            self.names[m.value] = sys.intern(m.name)
+
+    def getName(self, cid):
+        if 0 <= cid < self.size:
+            return self.names[cid]
+        return UNKNOWN_CHUNK_NAME
+
+g_chunk_tables = {}
+
+def get_chunk_table():
+    if API_TYPE == rd.GraphicsAPI.OpenGL:
+        chunk_enum = GLChunk
+    elif API_TYPE == rd.GraphicsAPI.Vulkan:
+        chunk_enum = VulkanChunk
+    else:
+        chunk_enum = D3D11Chunk
+    if chunk_enum not in g_chunk_tables:
+        g_chunk_tables[chunk_enum] = ChunkTable(chunk_enum)
+    return g_chunk_tables[chunk_enum]
+
 pp = pprint.PrettyPrinter(indent=4)
 
 g_is_binding_fbo = True # using this variable to separate passes
@@ -1705,265 +1765,81 @@ g_draw_durations = {}
 
 # raw data
 g_events = []
+g_draws = []
+g_pending_events = [] # events waiting for the next draw, see Frame.assignStates()
 
-html_head = """
-<!DOCTYPE html>
-<html>
-<head>
-<meta charset="utf-8">
-<title>Render Doctor Analysis</title>
-<script src="https://cdnjs.cloudflare.com/ajax/libs/lazysizes/5.3.2/lazysizes.min.js"></script>
-<style>
-        /* Global styles */
-        /* Frame Overview table styles */
-        .frame-overview-table {
-            width: 100%;
-            border-collapse: collapse;
-            margin: 20px 0;
-            background: white;
-            border-radius: 8px;
-            overflow: hidden;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-            font-size: 12px;
-        }
-        .frame-overview-table th {
-            background-color: #ff6600;
-            color: white;
-            font-weight: 600;
-            padding: 8px 4px;
-            text-align: center;
-            border: 1px solid #e0e0e0;
-            font-size: 11px;
-        }
-        .frame-overview-table td {
-            padding: 6px 4px;
-            border: 1px solid #e0e0e0;
-            text-align: center;
-            vertical-align: middle;
-            font-size: 11px;
-        }
-        .frame-overview-table .summary-row {
-            background-color: #f8f9fa;
-            font-weight: bold;
-        }
-        .frame-overview-table .pass-header {
-            background-color: #e3f2fd;
-            font-weight: bold;
-        }
-        .frame-overview-table .state-row {
-            background-color: white;
-        }
-        .frame-overview-table .state-row:hover {
-            background-color: #f5f5f5;
-        }
-        .depth-preview, .color-preview {
-            width: 20px;
-            height: 15px;
-            border: 1px solid #ddd;
-            background: #f0f0f0;
-            display: inline-block;
-        }
-        body { 
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-            margin: 0; 
-            padding: 20px; 
-            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-            min-height: 100vh;
-            line-height: 1.6;
-        }
-        /* Main content area */
-        .main-content {
-            max-width: 1400px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 16px;
-            box-shadow: 0 10px 40px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }
-        /* General card styles */
-        .card {
-            background: white;
-            border-radius: 12px;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.08);
-            margin: 20px;
-            overflow: hidden;
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-        }
-        .card:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 8px 30px rgba(0,0,0,0.12);
-        }
-        /* Pass section styles */
-        .pass-section { 
-            background: white;
-            border-radius: 16px;
-            box-shadow: 0 6px 25px rgba(0,0,0,0.1);
-            margin: 25px 0;
-            overflow: hidden;
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-            border: 2px solid transparent;
-            background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
-            position: relative;
-        }
-        .pass-section::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            height: 4px;
-            background: linear-gradient(90deg, #667eea 0%, #764ba2 50%, #f093fb 100%);
-        }
-        .pass-section:hover {
-            transform: translateY(-3px);
-            box-shadow: 0 12px 40px rgba(0,0,0,0.15);
-            border-color: rgba(102, 126, 234, 0.3);
-        }
-        .pass-header {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 25px 20px;
-            font-size: 18px;
-            font-weight: 600;
-            position: relative;
-            overflow: hidden;
-        }
-        .pass-header::after {
-            content: '';
-            position: absolute;
-            top: 0;
-            right: 0;
-            width: 100px;
-            height: 100%;
-            background: linear-gradient(90deg, transparent 0%, rgba(255,255,255,0.1) 100%);
-            transform: skewX(-15deg);
-        }
-        .pass-content-area {
-            padding: 25px 20px;
-            background: linear-gradient(135deg, #ffffff 0%, #fafbfc 100%);
-            position: relative;
-        }
-        .pass-content-area::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            height: 1px;
-            background: linear-gradient(90deg, transparent 0%, rgba(102, 126, 234, 0.2) 50%, transparent 100%);
-        }
-        .pass-title {
-            font-size: 22px;
-            font-weight: 700;
-            margin-bottom: 15px;
-            text-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            position: relative;
-            z-index: 1;
-        }
-        .pass-stats {
-            display: flex;
-            gap: 15px;
-            flex-wrap: wrap;
-            position: relative;
-            z-index: 1;
-        }
-        .stat-item {
-            background: rgba(255, 255, 255, 0.25);
-            padding: 8px 16px;
-            border-radius: 8px;
-            font-size: 14px;
-            font-weight: 600;
-            backdrop-filter: blur(15px);
-            border: 1px solid rgba(255, 255, 255, 0.4);
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-            transition: all 0.3s ease;
-        }
-        .stat-item:hover {
-            background: rgba(255, 255, 255, 0.35);
-            transform: translateY(-1px);
-            box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-        }
-        /* 其余已有样式保持不变 */
-        /* 表格样式 */
-        .pass-table {
-            width: 100%;
-            border-collapse: collapse;
-            margin: 20px 0;
-            background: white;
-            border-radius: 12px;
-            overflow: hidden;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-        }
-        .pass-table thead {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-        }
-        .pass-table th {
-            padding: 16px 12px;
-            text-align: left;
-            font-weight: 600;
-            border: none;
-        }
-        .pass-table td {
-            padding: 0;
-            border: none;
-            vertical-align: top;
-        }
-        .pass-table tbody tr {
-            border-bottom: 1px solid #f0f0f0;
-        }
-        .pass-table tbody tr:hover {
-            background-color: #f8f9fa;
-        }
-        /* Pass详细信息样式 */
-        .pass-detail-cell {
-            padding: 0 !important;
-            border: none !important;
-        }
-        .pass-detail-header {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 15px 20px;
-            border-radius: 8px 8px 0 0;
-            margin-bottom: 0;
-        }
-        .pass-detail-title {
-            font-size: 18px;
-            font-weight: 700;
-            text-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }
-</style>
-
-
-
-</head>
-<body>
-"""
+rdc_file = '.rdc'
+sdfile = None
 
-html_minimalist_head = """
-<meta charset="utf-8">
-<script src="https://cdnjs.cloudflare.com/ajax/libs/lazysizes/5.3.2/lazysizes.min.js"></script>
-<style>
-h1 {
-    color: #ff6600;
-}
-.title {
-    background-color: #ff6600;
+# bytes per pixel of packed formats, block compressed / YUV formats are not listed
+PACKED_FORMAT_BYTES = {
+    'R10G10B10A2': 4,
+    'R11G11B10': 4,
+    'R5G6B5': 2,
+    'R5G5B5A1': 2,
+    'R9G9B9E5': 4,
+    'R4G4B4A4': 2,
+    'R4G4': 1,
+    'D24S8': 4,
+    'D32S8': 8,
+    'S8': 1,
+    'A8': 1,
 }
-</style>
-"""
+g_packed_format_bytes = {getattr(rd.ResourceFormatType, k): v for k, v in PACKED_FORMAT_BYTES.items() if hasattr(rd.ResourceFormatType, k)}
+
+def get_pixel_byte_size(fmt):
+    # 0 means the format can't be compared pixel by pixel
+    if fmt.type == rd.ResourceFormatType.Regular:
+        return fmt.compByteWidth * fmt.compCount
+    return g_packed_format_bytes.get(fmt.type, 0)
+
+def get_pixel_unpack_string(fmt):
+    if fmt.type != rd.ResourceFormatType.Regular:
+        return ''
+    if fmt.compType == rd.CompType.Float:
+        code = {2: 'e', 4: 'f', 8: 'd'}.get(fmt.compByteWidth, '')
+    elif fmt.compType in (rd.CompType.SNorm, rd.CompType.SInt, rd.CompType.SScaled):
+        code = {1: 'b', 2: 'h', 4: 'i'}.get(fmt.compByteWidth, '')
+    else:
+        code = {1: 'B', 2: 'H', 4: 'I'}.get(fmt.compByteWidth, '')
+    return code * fmt.compCount
+
+SINGLE_COLOR_SAMPLES = 64
+SINGLE_COLOR_PROBE_SIZE = 64 # a mip this small is read first to rule out most textures
+
+def get_mip_size(texture_info, mip):
+    return max(1, texture_info.width >> mip), max(1, texture_info.height >> mip)
+
+def pick_mip(texture_info, max_size):
+    # first mip that fits in max_size, otherwise the smallest one and the caller has to downscale
+    for mip in range(0, texture_info.mips):
+        width, height = get_mip_size(texture_info, mip)
+        if width <= max_size and height <= max_size:
+            return mip
+    return max(0, texture_info.mips - 1)
+
+def get_single_color(pixels, fmt, pixel_count):
+    # returns the color if every pixel is the same, None otherwise
+    stride = get_pixel_byte_size(fmt)
+    if stride == 0 or pixel_count == 0 or len(pixels) < pixel_count * stride:
+        return None
 
-html_lite_head = """
-<meta charset="utf-8">
-<script src="https://cdnjs.cloudflare.com/ajax/libs/lazysizes/5.3.2/lazysizes.min.js"></script>
-"""
+    first = bytes(pixels[0:stride])
+    # a sparse sample catches most textures before touching the whole surface
+    step = max(1, pixel_count // SINGLE_COLOR_SAMPLES)
+    for i in range(0, pixel_count, step):
+        if pixels[i * stride:(i + 1) * stride] != first:
+            return None
 
-mermaid_head = """
-<script src="https://cdn.jsdelivr.net/npm/mermaid/dist/mermaid.min.js"></script>\n
-"""
+    surface = pixels if len(pixels) == pixel_count * stride else pixels[0:pixel_count * stride]
+    if first * pixel_count != surface:
+        return None
+
+    unpack_string = get_pixel_unpack_string(fmt)
+    if unpack_string:
+        return struct.unpack_from(unpack_string, first, 0)
+    return tuple(first)
 
-rdc_file = '.rdc'
-sdfile = None
 class TextureTip:
     def __init__(self, controller, resource_id):
         self.resource_id = resource_id
@@ -1983,36 +1859,20 @@ class TextureTip:
             # white-list, "2D" textures, used as HUD, UI etc.
             pass
         elif self.info.creationFlags == rd.TextureCategory.ShaderRead:
-            if config['WRITE_SINGLE_COLOR']:
-                # read-only texture
-                pixels = controller.GetTextureData(resource_id, rd.Subresource(0, 0, 0))
-
-                is_single_color = True
-                fmt = self.info.format
-                stride = fmt.compByteWidth * fmt.compCount
-                if fmt.compByteWidth == 1 and fmt.compType == rd.CompType.UNorm:
-                    unpack_string = 'B' * fmt.compCount
-                # elif fmt.compByteWidth == 0 and fmt.compType == rd.CompType.UNorm:
-                #     stride = 1 * fmt.compCount
-                #     unpack_string = 'B' * fmt.compCount
-                elif fmt.compByteWidth == 2 and fmt.compType == rd.CompType.Float:
-                    unpack_string = 'e' * fmt.compCount
-                elif fmt.compByteWidth == 4 and fmt.compType == rd.CompType.Float:
-                    unpack_string = 'f' * fmt.compCount
-                else:
-                    unpack_string = ''
-
-                if unpack_string:
-                    prev_pixel = struct.unpack_from(unpack_string, pixels, 0)
-                    for i in range(self.info.width * self.info.height):
-                        pixel = struct.unpack_from(unpack_string, pixels, i * stride)
-                        if prev_pixel != pixel:
-                            is_single_color = False
-                            break
-                        prev_pixel = pixel
-
-                    if is_single_color:
-                        self.tips.append('single_color' + str(prev_pixel))
+            if config['WRITE_SINGLE_COLOR'] and get_pixel_byte_size(self.info.format):
+                # read-only texture, block compressed formats are skipped
+                color = None
+                probe_mip = pick_mip(self.info, SINGLE_COLOR_PROBE_SIZE)
+                if probe_mip > 0:
+                    # a small mip with several colors rules out mip 0 without reading it
+                    width, height = get_mip_size(self.info, probe_mip)
+                    pixels = controller.GetTextureData(resource_id, rd.Subresource(probe_mip, 0, 0))
+                    color = get_single_color(pixels, self.info.format, width * height)
+                if probe_mip == 0 or color is not None:
+                    pixels = controller.GetTextureData(resource_id, rd.Subresource(0, 0, 0))
+                    color = get_single_color(pixels, self.info.format, self.info.width * self.info.height)
+                if color is not None:
+                    self.tips.append('single_color' + str(color))
 
             if 'lightmap' not in name_lower and (self.info.width > 512 or self.info.height > 512):
                 self.tips.append('large_dimension')
@@ -2054,12 +1914,364 @@ Frame
     - Pass
 '''
 
+MALIOC_FAILED = 'malioc failed'
+
+MALIOC_STAGE_FLAGS = [
+    '--vertex',
+    '--tessellation_control',
+    '--tessellation_evaluation',
+    '--geometry',
+    '--fragment',
+    '--compute',
+]
+
+def find_malioc():
+    path = config.get('MALIOC_PATH', '')
+    if path:
+        return Path(path) if Path(path).exists() else None
+    folder = g_assets_folder / '../' / 'mali_offline_compiler'
+    for name in ('malioc.exe', 'malioc'):
+        if (folder / name).exists():
+            return folder / name
+    import shutil
+    found = shutil.which('malioc')
+    return Path(found) if found else None
+
+SHADER_PAGE_HEAD = PAGE_HEAD_TEMPLATE % {'title': 'Shader Analysis', 'prefix': '', 'extra': '', 'body_class': 'shader-page'}
+
+@g_profiler.wrap(cat='io')
+def write_shader_html(html_file_name, marker, shader_analysis, highlevel_shader):
+    # styles come from report.css in the same folder, written by generate_report
+    g_log.debug('shader', 'Writing %s', html_file_name)
+    page = HtmlBuffer()
+    page.write(SHADER_PAGE_HEAD)
+
+    # Marker section
+    if marker:
+        page.write('<div class="shader-header">\n<h2>🔍 Marker: %s</h2>\n</div>\n' % marker)
+
+    # Analysis section
+    if shader_analysis:
+        page.write('<div class="analysis-section">\n<h3>📊 Shader Analysis</h3>\n<pre>%s</pre>\n</div>\n' % shader_analysis)
+
+    # Shader code section
+    page.write('<div class="shader-content">\n<h3>💻 Shader Code</h3>\n<div class="shader-code">\n<pre>%s</pre>\n</div>\n</div>\n' % highlevel_shader)
+    page.write('</body>\n</html>')
+    page.save(html_file_name)
+
+g_shader_pages = set()
+g_shader_pages_lock = threading.Lock()
+
+def claim_shader_page(html_file_name):
+    # True for the first pipeline with this shader name only, so one job writes each page
+    with g_shader_pages_lock:
+        if html_file_name in g_shader_pages:
+            return False
+        g_shader_pages.add(html_file_name)
+    return not Path(html_file_name).exists()
+
+class MaliocScheduler:
+    # unique shader sources are compiled by malioc processes in parallel, a few threads only wait on them
+    # results are cached on disk by source, stage and compiler version, so other captures reuse them
+    def __init__(self):
+        self.exe = None
+        self.version = None
+        self.resolved = False
+        self.executor = None
+        self.jobs = {} # digest -> future
+        self.lock = threading.Lock()
+        self.cache_folder = Path.home() / '.render-doctor' / 'malioc'
+        self.cache_hits = 0
+        self.compiled = 0
+        self.failures = 0
+
+    def isAvailable(self):
+        if not self.resolved:
+            self.resolved = True
+            self.exe = find_malioc() if config['WRITE_MALIOC'] else None
+            if self.exe:
+                try:
+                    result = subprocess.run([str(self.exe), '--version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                            timeout=config.get('MALIOC_TIMEOUT', 60))
+                    self.version = str(result.stdout, 'utf-8', 'replace').strip()
+                except Exception as e:
+                    g_log.warning('shader', 'malioc --version failed: %s', e)
+                    self.exe = None
+        return self.exe is not None
+
+    def submit(self, source_file, source, stage, lang, on_done):
+        # on_done(analysis text) is called once malioc is done, possibly on a worker thread
+        if not self.isAvailable():
+            on_done('')
+            return
+
+        if stage < len(MALIOC_STAGE_FLAGS):
+            stage_flag = MALIOC_STAGE_FLAGS[stage]
+        else:
+            stage_flag = '--unknown'
+            g_log.warning('shader', 'Stage %d out of range for MALIOC_STAGE_FLAGS (length: %d)', stage, len(MALIOC_STAGE_FLAGS))
+
+        digest = hashlib.sha1(source)
+        digest.update(('\n%s %s %s' % (stage_flag, lang, self.version)).encode('utf-8'))
+        digest = digest.hexdigest()
+
+        with self.lock:
+            future = self.jobs.get(digest)
+            if future is None:
+                if not self.executor:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self.executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+                future = self.executor.submit(self.analyze, digest, [str(self.exe), stage_flag, lang, str(source_file)])
+                self.jobs[digest] = future
+        future.add_done_callback(lambda f: on_done(f.result()))
+
+    def analyze(self, digest, args):
+        cache_file = self.cache_folder / ('%s.txt' % digest)
+        if cache_file.exists():
+            with self.lock:
+                self.cache_hits += 1
+            with open(cache_file, encoding='utf-8') as f:
+                return f.read()
+
+        try:
+            result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=config.get('MALIOC_TIMEOUT', 60))
+        except subprocess.TimeoutExpired:
+            with self.lock:
+                self.failures += 1
+            return '%s: timed out' % MALIOC_FAILED
+        except Exception as e:
+            with self.lock:
+                self.failures += 1
+            return '%s: %s' % (MALIOC_FAILED, e)
+
+        shader_analysis = str(result.stdout, 'utf-8', 'replace')
+        shader_analysis = shader_analysis.replace('\r\n\r\n', '\n')
+        with self.lock:
+            self.compiled += 1
+        try:
+            self.cache_folder.mkdir(parents=True, exist_ok=True)
+            with g_profiler.span('write_malioc_cache', 'io'), open(cache_file, 'w', encoding='utf-8') as f:
+                f.write(shader_analysis)
+        except Exception as e:
+            g_log.warning('shader', 'Error writing %s: %s', cache_file, e)
+        return shader_analysis
+
+    def join(self):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def getSummary(self):
+        if not self.resolved or not self.exe:
+            return 'not available'
+        return '%s, compiled %d, cached %d, failed %d' % (self.version.splitlines()[0] if self.version else self.exe, self.compiled, self.cache_hits, self.failures)
+
+g_malioc = MaliocScheduler()
+
+SHADER_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shaders (
+    hash TEXT PRIMARY KEY,
+    api TEXT,
+    stage TEXT,
+    disassembly TEXT,
+    malioc TEXT,
+    malioc_version TEXT,
+    uniforms TEXT,
+    first_capture TEXT,
+    first_seen TEXT,
+    last_capture TEXT,
+    last_seen TEXT,
+    seen_count INTEGER
+)
+"""
+
+SHADER_DB_BATCH_ROWS = 64
+SHADER_DB_BATCH_SECONDS = 10
+
+def get_shader_hash(refl):
+    return hashlib.sha1(refl.rawBytes).hexdigest()
+
+class ShaderDatabase:
+    # sqlite store shared by every capture: disassembly, malioc output and uniform usage per shader,
+    # keyed by the hash of refl.rawBytes, so shaders seen before skip disassembly and malioc
+    def __init__(self):
+        self.connection = None
+        self.opened = False
+        self.lock = threading.Lock()
+        self.touched = set() # hashes counted in this run
+        self.pending = 0
+        self.last_commit = time.time()
+        self.known = 0
+        self.added = 0
+
+    def open(self):
+        if self.opened:
+            return self.connection is not None
+        self.opened = True
+        if not config.get('WRITE_SHADER_DB', True):
+            return False
+        db_file = Path(config.get('SHADER_DB', '') or Path.home() / '.render-doctor' / 'shaders.sqlite')
+        try:
+            import sqlite3
+            db_file.parent.mkdir(parents=True, exist_ok=True)
+            # malioc callbacks write from worker threads, self.lock serializes them
+            self.connection = sqlite3.connect(str(db_file), check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute(SHADER_DB_SCHEMA)
+        except Exception as e:
+            g_log.warning('shader', 'Error opening shader db %s: %s', db_file, e)
+            self.connection = None
+        return self.connection is not None
+
+    def get(self, shader_hash):
+        if not self.open():
+            return None
+        with self.lock:
+            return self.connection.execute('SELECT * FROM shaders WHERE hash = ?', (shader_hash,)).fetchone()
+
+    def touch(self, shader_hash, stage):
+        # first / last seen bookkeeping, counted once per run, returns the stored row if any
+        if not self.open():
+            return None
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.lock:
+            row = self.connection.execute('SELECT * FROM shaders WHERE hash = ?', (shader_hash,)).fetchone()
+            if shader_hash in self.touched:
+                # another pipeline with the same shader, already counted
+                return row
+            self.touched.add(shader_hash)
+            if row:
+                self.known += 1
+                self.connection.execute('UPDATE shaders SET last_capture = ?, last_seen = ?, seen_count = seen_count + 1 WHERE hash = ?',
+                                        (str(rdc_file), now, shader_hash))
+            else:
+                self.added += 1
+                self.connection.execute('INSERT INTO shaders (hash, api, stage, first_capture, first_seen, last_capture, last_seen, seen_count) '
+                                        'VALUES (?, ?, ?, ?, ?, ?, ?, 1)',
+                                        (shader_hash, str(API_TYPE), ShaderStage(stage).name, str(rdc_file), now, str(rdc_file), now))
+            self.changed()
+            return row
+
+    def update(self, shader_hash, **columns):
+        if not self.open() or not columns:
+            return
+        names = sorted(columns)
+        with self.lock:
+            self.connection.execute('UPDATE shaders SET %s WHERE hash = ?' % ', '.join('%s = ?' % name for name in names),
+                                    [columns[name] for name in names] + [shader_hash])
+            self.changed()
+
+    def changed(self):
+        # called with self.lock held, commits in batches so an aborted run keeps most of what it learned
+        self.pending += 1
+        now = time.time()
+        if self.pending >= SHADER_DB_BATCH_ROWS or now - self.last_commit >= SHADER_DB_BATCH_SECONDS:
+            self.connection.commit()
+            self.pending = 0
+            self.last_commit = now
+
+    def getStoredAnalysis(self, record, lang):
+        # malioc text to show for a known shader, '' if there is none to show, None if the shader has to be processed
+        if record is None or record['disassembly'] is None:
+            return None
+        if not lang:
+            return ''
+        if not record['malioc']:
+            return None if g_malioc.isAvailable() else ''
+        # without malioc the stored analysis is still shown, only another compiler version redoes it
+        if g_malioc.isAvailable() and record['malioc_version'] != g_malioc.version:
+            return None
+        return record['malioc']
+
+    def getUniforms(self, shader_hash):
+        # uniform usage stored by an earlier capture, None if unknown
+        record = self.get(shader_hash)
+        if record is None or not record['uniforms']:
+            return None
+        return json.loads(record['uniforms'])
+
+    def close(self):
+        if self.connection:
+            with self.lock:
+                self.connection.commit()
+                self.connection.close()
+            self.connection = None
+
+    def getSummary(self):
+        if not self.connection:
+            return 'disabled'
+        return 'known %d, added %d' % (self.known, self.added)
+
+g_shader_db = ShaderDatabase()
+
+class PipelineInfo:
+    # what collectPipeline learns from a PSO / program, shared by all draws using it
+    def __init__(self):
+        self.program_name = ''
+        self.shader_names = [None] * rd.ShaderStage.Count
+        self.short_shader_names = [None] * rd.ShaderStage.Count
+        self.refls = [None] * rd.ShaderStage.Count
+
+def get_pipeline_key(pipe_state, api_state, is_dispatch):
+    if is_dispatch:
+        pipeline = pipe_state.GetComputePipelineObject()
+    else:
+        pipeline = pipe_state.GetGraphicsPipelineObject()
+    program = None
+    if API_TYPE == rd.GraphicsAPI.OpenGL:
+        # GL reports no pipeline object for plain programs
+        shader = api_state.computeShader if is_dispatch else api_state.vertexShader
+        program = shader.programResourceId
+    shader_ids = tuple(pipe_state.GetShader(stage) for stage in range(0, rd.ShaderStage.Count))
+    return (is_dispatch, pipeline, program, shader_ids)
+
+def get_vulkan_textures(controller, api_state):
+    # read per event, descriptor sets can be updated between submits or after bind, so only the
+    # reflection side of a pipeline is cached
+    textures = []
+    for desc_set in api_state.graphics.descriptorSets:
+        for binding in desc_set.bindings:
+            for bind in binding.binds:
+                # print(bind.resourceResourceId, str(bind.viewFormat))
+                resource_id = bind.resourceResourceId
+                if resource_id == rd.ResourceId.Null():
+                    continue
+                if not get_texture_info(controller, resource_id):
+                    continue
+                textures.append(resource_id)
+    return textures
+
+class PipelineCache:
+    # UI heavy captures repeat the same program thousands of times, only the first draw
+    # pays for reflection, names and shader files
+    def __init__(self):
+        self.infos = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        info = self.infos.get(key)
+        if info is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return info
+
+    def add(self, key, info):
+        self.infos[key] = info
+
+    def getSummary(self):
+        return 'pipelines %d, hits %d, misses %d' % (len(self.infos), self.hits, self.misses)
+
+g_pipeline_cache = PipelineCache()
+
 class Pass:
     # draws on same FBO
     def __init__(self):
         self.pass_id = Pass.s_id
         Pass.s_id += 1
         self.states = []
+        self.draws = [] # filled by visit_action, before draws are split into states
 
     def addState(self, draw):
         # if len(self.states) > 0 and self.states[0].getName().find('s_') == 0:
@@ -2073,103 +2285,24 @@ class Pass:
         self.states.append(new_state)
         State.current = self.states[-1]
 
-    def getFirstDraw(self):
-        # TODO: this is a wrong assumption, fix it when I have time
-        if len(self.states) == 0:
-            return None
-        return self.states[0].getFirstDraw()
-
-    def getLastDraw(self):
-        # TODO: this is a wrong assumption, fix it when I have time
-        if len(self.states) == 0:
-            return None
-        return self.states[-1].getLastDraw()
-
-    def getName(self, controller):
-        if self.name:
-            return self.name
 
-        pass_info = ''
-        if self.getLastDraw():
-            # TODO: assume every draws share the same set of targets
-            pass_info = self.getLastDraw().getPassSummary(controller)
 
-        if not pass_info:
-            self.name = 'Pass%d' % (self.pass_id)
-        else:
-            self.name = 'Pass%d_%s' % (self.pass_id, pass_info)
 
-        return self.name
 
-    def writeIndexHtml(self, html_file, controller):
-        pass_name = self.getName(controller)
-        
-        # 计算Pass统计信息
-        total_draws = len(self.states)
-        total_shaders = 0
-        total_textures = 0
-        
-        # 安全地计算统计信息
-        for s in self.states:
-            if hasattr(s, 'draws') and s.draws:
-                # 检查绘制调用中的着色器
-                for draw in s.draws:
-                    if hasattr(draw, 'shader_names') and draw.shader_names:
-                        total_shaders += 1
-                    if hasattr(draw, 'textures') and draw.textures:
-                        total_textures += len(draw.textures)
-        
-        # 不生成外层的pass-section，因为现在在表格中
-        html_file.write('<div class="pass-header">\n')
-        html_file.write('<div class="pass-title">🎯 %s</div>\n' % pass_name)
-        html_file.write('<div class="pass-stats">\n')
-        html_file.write('<span class="stat-item">📊 绘制调用: %d</span>\n' % total_draws)
-        html_file.write('<span class="stat-item">🔧 着色器: %d</span>\n' % total_shaders)
-        html_file.write('<span class="stat-item">🖼️ 贴图: %d</span>\n' % total_textures)
-        html_file.write('</div>\n')
-        html_file.write('</div>\n')
-        
-        html_file.write('<div class="pass-content-area">\n')
-        
-        # 按状态分组显示
-        state_groups = {}
+    def scheduleExports(self, scheduler):
         for s in self.states:
-            state_key = s.getName()
-            if state_key not in state_groups:
-                state_groups[state_key] = []
-            state_groups[state_key].append(s)
-        
-        for state_name, states in state_groups.items():
-            if len(states) > 1:
-                # 多个相同状态的绘制调用
-                html_file.write('<div class="state-group">\n')
-                html_file.write('<div class="state-group-header">\n')
-                html_file.write('<h4>🔧 %s (%d个调用)</h4>\n' % (state_name, len(states)))
-                html_file.write('</div>\n')
-                html_file.write('<div class="state-group-content">\n')
-                for s in states:
-                    s.writeIndexHtml(html_file, controller)
-                html_file.write('</div>\n')
-                html_file.write('</div>\n')
-            else:
-                # 单个绘制调用
-                states[0].writeIndexHtml(html_file, controller)
-        
-        html_file.write('</div>\n')
+            s.scheduleExports(scheduler)
 
-    def exportResources(self, controller):
-        for s in self.states:
-            s.exportResources(controller)
 
-    def writeDetailHtml(self, html_file, controller):
-        for s in self.states:
-            filename = g_assets_folder / (s.getUniqueName() + '.html')
-            if not Path(filename).exists():
-                with open(filename,"w") as self_html:
-                    s.writeDetailHtml(self_html, controller)
-                    print(filename)
+    def toRaw(self, draw_index):
+        return {
+            'pass_id': self.pass_id,
+            'states': [s.toRaw(draw_index) for s in self.states],
+        }
+
 
     states = None
+    draws = None
     pass_id = None
     current = None
     name = None
@@ -2221,94 +2354,40 @@ class State:
     def getName(self):
         return self.name
 
-    def writeIndexHtml(self, html_file, controller):
-        html_file.write('<div class="state-section">\n')
-        html_file.write('<h3>🔧 %s</h3>\n' % self.getUniqueName())
-        html_file.write('</div>\n')
-        # for ev in self.events:
-        #     ev.writeIndexHtml(html_file, controller)
-        draw_count = len(self.draws)
-        if draw_count == 0:
-            return
-        if config['MINIMALIST']:
-            # MINIMALIST only cares about last draw
-            self.draws[-1].writeIndexHtml(html_file, controller)
-            return
 
-        if draw_count == 1:
-            self.draws[0].writeIndexHtml(html_file, controller)
-        elif draw_count == 2:
-            self.draws[0].writeIndexHtml(html_file, controller)
-            self.draws[1].writeIndexHtml(html_file, controller)
-        else:
-            self.draws[0].writeIndexHtml(html_file, controller)
-            self.draws[int(draw_count/2)].writeIndexHtml(html_file, controller)
-            self.draws[-1].writeIndexHtml(html_file, controller)
-
-        html_file.write('\n')
-
-    def writeDetailHtml(self, html_file, controller):
-        html_file.write('<!DOCTYPE html>\n<html>\n<head>\n')
-        html_file.write('<meta charset="utf-8">\n')
-        html_file.write('<title>渲染医生 - 美术资产分析</title>\n')
-        html_file.write('<style>\n')
-        html_file.write('body { font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }\n')
-        html_file.write('.header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 15px; margin-bottom: 20px; }\n')
-        html_file.write('.header h1 { margin: 0; font-size: 28px; }\n')
-        html_file.write('.header p { margin: 5px 0 0 0; opacity: 0.9; }\n')
-        html_file.write('.content { background: white; padding: 30px; border-radius: 15px; box-shadow: 0 4px 20px rgba(0,0,0,0.1); }\n')
-        html_file.write('.draw-call { margin: 20px 0; padding: 20px; border: 1px solid #e0e0e0; border-radius: 10px; background: #fafafa; }\n')
-        html_file.write('.draw-call h3 { margin: 0 0 15px 0; color: #333; font-size: 18px; }\n')
-        html_file.write('.marker { background: #fff3cd; color: #856404; padding: 8px 12px; border-radius: 6px; margin: 10px 0; font-weight: 500; }\n')
-        html_file.write('.call-type { background: #d1ecf1; color: #0c5460; padding: 8px 12px; border-radius: 6px; margin: 10px 0; font-weight: 500; }\n')
-        html_file.write('.pipeline-info { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 10px; margin: 15px 0; }\n')
-        html_file.write('.info-item { background: white; padding: 8px 12px; border-radius: 6px; border: 1px solid #e0e0e0; }\n')
-        html_file.write('.shader-section, .constant-buffer { margin: 15px 0; }\n')
-        html_file.write('.shader-section h4, .constant-buffer h4 { margin: 0 0 10px 0; color: #555; font-size: 16px; }\n')
-        html_file.write('.shader-item { background: white; padding: 8px 12px; border-radius: 6px; border: 1px solid #e0e0e0; margin: 5px 0; }\n')
-        html_file.write('.shader-item a { color: #0066cc; text-decoration: none; }\n')
-        html_file.write('.shader-item a:hover { color: #ff6600; }\n')
-        html_file.write('.texture-section { margin: 20px 0; }\n')
-        html_file.write('.texture-section h4 { margin: 0 0 15px 0; color: #555; font-size: 16px; }\n')
-        html_file.write('.events-section { margin: 20px 0; }\n')
-        html_file.write('.events-section h4 { margin: 0 0 15px 0; color: #555; font-size: 16px; }\n')
-        html_file.write('.event-item { background: #f8f9fa; padding: 8px 12px; border-radius: 6px; margin: 5px 0; font-family: monospace; font-size: 14px; }\n')
-        html_file.write('</style>\n')
-        html_file.write('</head>\n<body>\n')
-        html_file.write('<div class="header">\n')
-        html_file.write('<h1>🎨 渲染医生 - 美术资产分析</h1>\n')
-        html_file.write('<p>基于实际渲染资源的详细分析报告</p>\n')
-        html_file.write('</div>\n')
-        html_file.write('<div class="content">\n')
-        for d in self.draws:
-            d.writeDetailHtml(html_file, controller)
-        html_file.write('</div>\n')
-        html_file.write('</body>\n')
-
-        html_file.write('</html>')
 
-    def exportResources(self, controller):
+    def scheduleExports(self, scheduler):
         if config['WRITE_ALL_DRAWS']:
             for d in self.draws:
-                d.exportResources(controller)
+                scheduler.add(d.event_id, d.exportResources)
         else:
             draw_count = len(self.draws)
             if draw_count == 0:
                 return
             if config['MINIMALIST']:
                 # MINIMALIST only cares about last draw
-                self.draws[-1].exportResources(controller)
+                scheduler.add(self.draws[-1].event_id, self.draws[-1].exportResources)
                 return
 
             if draw_count == 1:
-                self.draws[0].exportResources(controller)
+                picked = [self.draws[0]]
             elif draw_count == 2:
-                self.draws[0].exportResources(controller)
-                self.draws[1].exportResources(controller)
+                picked = [self.draws[0], self.draws[1]]
             else:
-                self.draws[0].exportResources(controller)
-                self.draws[int(draw_count/2)].exportResources(controller)
-                self.draws[-1].exportResources(controller)
+                picked = [self.draws[0], self.draws[int(draw_count/2)], self.draws[-1]]
+            for d in picked:
+                scheduler.add(d.event_id, d.exportResources)
+
+    def toRaw(self, draw_index):
+        return {
+            'name': self.name,
+            'unique_name': self.unique_name,
+            'vs_name': self.vs_name,
+            'ps_name': self.ps_name,
+            'cs_name': self.cs_name,
+            'draws': [draw_index[id(d)] for d in self.draws],
+        }
+
 
     def addEvent(self, ev):
         self.events.append(ev)
@@ -2339,40 +2418,30 @@ class Event:
 
         # struct SDChunkMetaData
         # enum class GLChunk
-        self.event_type = None  # 初始化event_type
-        try:
-            if ev.chunkIndex < len(chunks):
-                cid = chunks[ev.chunkIndex].metadata.chunkID
-                if API_TYPE == rd.GraphicsAPI.OpenGL:
-                    self.event_type = GLChunk(cid)
-                elif API_TYPE == rd.GraphicsAPI.Vulkan:
-                    self.event_type = VulkanChunk(cid)
-                else:
-                    self.event_type = D3D11Chunk(cid)
-                self.name = self.event_type.name
-            else:
-                print(f"Debug: chunkIndex {ev.chunkIndex} out of range for chunks (length: {len(chunks)})")
-                self.name = "Unknown"
-        except Exception as e:
-            print(f"Debug: Error processing event {ev.eventId}: {e}")
-            self.name = "Error"
+        self.category = EventCategory.Other
+        self.name = UNKNOWN_CHUNK_NAME
+        if ev.chunkIndex < len(chunks):
+            cid = chunks[ev.chunkIndex].metadata.chunkID
+            table = get_chunk_table()
+            if 0 <= cid < table.size:
+                self.category = table.categories[cid]
+                self.name = table.names[cid]
+        else:
+            g_log.warning('draw', 'chunkIndex %d out of range for chunks (length: %d)', ev.chunkIndex, len(chunks))
 
-        if self.name.find('Draw') != -1 \
-            or self.name.find('Dispatch') != -1:
+        if self.category == EventCategory.Draw \
+            or self.category == EventCategory.Dispatch:
             g_is_binding_fbo = False
         else:
             api_full_log.write('%s%04d %s\n' % ('    ' * level, self.event_id, self.name))
-            if self.event_type and (self.event_type == GLChunk.glBindFramebuffer or \
-                self.event_type == VulkanChunk.vkCmdBeginRenderPass or \
-                self.event_type == D3D11Chunk.OMSetRenderTargets or \
-                self.event_type == D3D11Chunk.OMSetRenderTargetsAndUnorderedAccessViews):
+            if self.category == EventCategory.FBOBind:
                 if not g_is_binding_fbo:
                     # non fbo call -> fbo call, marks start of a new pass
                     api_short_log.write('%se%04d %s\n' % ('    ' * level, self.event_id, self.name))
                     g_next_draw_will_add_state = True
                 g_is_binding_fbo = True
 
-    def writeIndexHtml(self, markdown, controller):
+    def writeIndexHtml(self, markdown):
         pass
 
     def exportResources(self, controller):
@@ -2381,7 +2450,7 @@ class Event:
     name = None
     event_id = None
     level = None
-    event_type = None
+    category = None
     chunk_id = None
 
 class Draw(Event):
@@ -2390,7 +2459,7 @@ class Draw(Event):
             global api_full_log
             global api_short_log
             action_name = draw.GetName(sdfile)
-            print('draw %d: %s\n' % (draw.actionId, action_name))
+            g_log.debug('draw', 'draw %d: %s', draw.actionId, action_name)
             api_full_log.write('%sdraw_%04d %s\n' % ('    ' * level, draw.actionId, action_name))
             api_short_log.write('%s%04d %s\n' % ('    ' * level, draw.actionId, action_name))
             self.draw_desc = draw
@@ -2399,18 +2468,19 @@ class Draw(Event):
             self.name = action_name # TODO:
             self.level = level
             self.state_key = ''
-            print(f"Debug: Initializing Draw for event {self.event_id}, action {self.draw_id}")
             self.short_shader_names = [None] * rd.ShaderStage.Count
             self.shader_names = [None] * rd.ShaderStage.Count
             self.shader_cb_contents = [None] * rd.ShaderStage.Count
+            chunks = sdfile.chunks
+            table = get_chunk_table()
+            self.event_list = [(ev.eventId, table.getName(chunks[ev.chunkIndex].metadata.chunkID)) for ev in draw.events]
         except Exception as e:
-            print(f"Debug: Error in Draw.__init__: {e}")
-            import traceback
-            traceback.print_exc()
+            g_log.exception('draw', 'Error in Draw.__init__: %s', e)
             raise
         self.textures = []
         self.color_buffers = []
         self.depth_buffer = None
+        self.target_changes = {} # exported file name -> (changed pixel count, bounding box)
         self.expanded_marker = get_expanded_marker_name()
         self.marker = get_marker_name()
         self.gpu_duration = 0
@@ -2428,6 +2498,15 @@ class Draw(Event):
             self.color_buffers.append(output)
         self.depth_buffer = draw.depthOut
 
+        # these don't need a replay to know their state
+        if self.isClear():
+            self.state_key = 'Clear'
+        elif self.isCopy():
+            self.state_key = 'Copy'
+        elif API_TYPE == rd.GraphicsAPI.Vulkan and self.isDispatch():
+            # on Android devices, Vulkan dispatch calls will likely crash renderdoc, so we skip them
+            self.state_key = 'compute_shader'
+
         # api_full_log.flush()
         # api_short_log.flush()
 
@@ -2453,110 +2532,63 @@ class Draw(Event):
     def isDispatch(self):
         return self.name.find('Dispatch') != -1
 
-    def collectPipeline(self, controller):
-        if not config['WRITE_PIPELINE']:
-            return
-
-        if self.isClear():
-            self.state_key = 'Clear'
-
-            if self.state_key != State.current.getName():
-                # detects a PSO change
-                # TODO: this is too ugly
-                # TODO: this is double double ugly
-                Pass.current.addState(self)
-            return
-
-        if self.isCopy():
-            self.state_key = 'Copy'
-
-            if self.state_key != State.current.getName():
-                Pass.current.addState(self)
-            return
-
-        global api_full_log
+    def needsPipeline(self):
+        # Clear / Copy / Vulkan dispatch already got their state_key in __init__
+        return config['WRITE_PIPELINE'] and not self.state_key
 
+    def needsExport(self):
+        if not config['WRITE_COLOR_BUFFER'] and not config['WRITE_DEPTH_BUFFER'] and not config['WRITE_TEXTURE']:
+            return False
         if API_TYPE == rd.GraphicsAPI.Vulkan and self.isDispatch():
             # on Android devices, Vulkan dispatch calls will likely crash renderdoc, so we skip them
-            self.state_key = 'compute_shader'
-            if self.state_key != State.current.getName():
-                Pass.current.addState(self)
-            return
-
-        controller.SetFrameEvent(self.event_id, False)
-        api_state = None
-        pipe_state : rd.PipeState = controller.GetPipelineState()
+            return False
+        return True
 
-        if API_TYPE == rd.GraphicsAPI.OpenGL:
-            api_state = controller.GetGLPipelineState()
-            # C:\svn_pool\renderdoc\renderdoc\api\replay\gl_pipestate.h
-        elif API_TYPE == rd.GraphicsAPI.D3D11:
-            api_state = controller.GetD3D11PipelineState()
-        elif API_TYPE == rd.GraphicsAPI.D3D12:
-            api_state = controller.GetD3D12PipelineState()
-        elif API_TYPE == rd.GraphicsAPI.Vulkan:
-            api_state = controller.GetVulkanPipelineState()
+    def getStageShader(self, api_state, stage):
+        # the api specific shader struct bound to a stage, None if the stage is skipped
+        if self.isDispatch():
+            if stage != 5:
+                return None
+            return api_state.computeShader
+        else:
+            if stage == 0:
+                return api_state.vertexShader
+            elif stage == 1:
+                if API_TYPE == rd.GraphicsAPI.OpenGL or API_TYPE == rd.GraphicsAPI.Vulkan:
+                    return api_state.tessControlShader
+                else:
+                    return api_state.hullShader
+            elif stage == 2:
+                if API_TYPE == rd.GraphicsAPI.OpenGL or API_TYPE == rd.GraphicsAPI.Vulkan:
+                    return api_state.tessEvalShader
+                else:
+                    return api_state.domainShader
+            elif stage == 3:
+                return api_state.geometryShader
+            elif stage == 4:
+                if API_TYPE == rd.GraphicsAPI.OpenGL or API_TYPE == rd.GraphicsAPI.Vulkan:
+                    return api_state.fragmentShader
+                else:
+                    return api_state.pixelShader
+        return None
 
+    def collectShaders(self, controller, pipe_state, api_state):
+        # the per PSO / program part of collectPipeline: names, reflection and shader files
+        info = PipelineInfo()
         program_name = ""
 
-        shader_flags = [
-            '--vertex',
-            '--tessellation_control',
-            '--tessellation_evaluation',
-            '--geometry',
-            '--fragment',
-            '--compute',
-        ]
-        # Ensure shader_flags has enough elements for all shader stages
-        print(f"Debug: rd.ShaderStage.Count = {rd.ShaderStage.Count}")
-        print(f"Debug: Original shader_flags length = {len(shader_flags)}")
-        
-        # Unity specific handling
-        if rd.ShaderStage.Count > 6:
-            print(f"Debug: Unity detected - extended shader stages: {rd.ShaderStage.Count}")
-            # Unity may use custom shader stages or extended pipeline
-            for i in range(6, rd.ShaderStage.Count):
-                shader_flags.append(f'--unity_stage_{i}')
-        
-        while len(shader_flags) < rd.ShaderStage.Count:
-            shader_flags.append('--unknown')
-        print(f"Debug: Extended shader_flags length = {len(shader_flags)}")
         for stage in range(0, rd.ShaderStage.Count):
             # C:\svn_pool\renderdoc\renderdoc\api\replay\shader_types.h
             # struct ShaderReflection
             # TODO: refactor
-            shader = None
+            shader = self.getStageShader(api_state, stage)
             shader_name = None
             short_shader_name = None
             refl = None
             shader_id = pipe_state.GetShader(stage)
 
-            if self.isDispatch():
-                if stage != 5:
-                    continue
-                shader = api_state.computeShader
-            else:
-                if stage == 0:
-                    shader = api_state.vertexShader
-                elif stage == 1:
-                    if API_TYPE == rd.GraphicsAPI.OpenGL or API_TYPE == rd.GraphicsAPI.Vulkan:
-                        shader = api_state.tessControlShader
-                    else:
-                        shader = api_state.hullShader
-                elif stage == 2:
-                    if API_TYPE == rd.GraphicsAPI.OpenGL or API_TYPE == rd.GraphicsAPI.Vulkan:
-                        shader = api_state.tessEvalShader
-                    else:
-                        shader = api_state.domainShader
-                elif stage == 3:
-                    shader = api_state.geometryShader
-                elif stage == 4:
-                    if API_TYPE == rd.GraphicsAPI.OpenGL or API_TYPE == rd.GraphicsAPI.Vulkan:
-                        shader = api_state.fragmentShader
-                    else:
-                        shader = api_state.pixelShader
-                elif stage == 5:
-                    continue
+            if shader is None:
+                continue
 
             # TODO: improve the logic among program_name, short_shader_name and shader_name
             if shader_id != rd.ResourceId.Null():
@@ -2596,43 +2628,12 @@ class Draw(Event):
                     else:
                         program_name = 's_' + short_shader_name
                     shader_name = short_shader_name
-                self.shader_names[stage] = shader_name
-                self.short_shader_names[stage] = short_shader_name
+                info.shader_names[stage] = shader_name
+                info.short_shader_names[stage] = short_shader_name
 
             if refl:
-                if config['WRITE_CONST_BUFFER']:
-                    self.shader_cb_contents[stage] = get_cbuffer_contents(controller, stage, self.shader_names[stage], refl, program_name)
-
-                    # const_buffer--%4d.html
-                    resource_name = 'const_buffer--%04d' % (self.draw_id)
-                    file_name = g_assets_folder / get_resource_filename(resource_name, 'html')
-                    with open(file_name, 'w', encoding='utf-8') as fp:
-                        fp.write('<!DOCTYPE html>\n<html>\n<head>\n')
-                        fp.write('<meta charset="utf-8">\n')
-                        fp.write('<title>Constant Buffer Analysis</title>\n')
-                        fp.write('<style>\n')
-                        fp.write('body { font-family: Arial, sans-serif; margin: 20px; }\n')
-                        fp.write('.cb-header { background-color: #ff6600; color: white; padding: 15px; border-radius: 5px; margin-bottom: 20px; }\n')
-                        fp.write('.cb-section { background-color: #f8f8f8; padding: 15px; border-radius: 5px; margin: 10px 0; border-left: 4px solid #ff6600; }\n')
-                        fp.write('.cb-code { background-color: #2d2d2d; color: #f8f8f2; padding: 15px; border-radius: 5px; overflow-x: auto; font-family: "Courier New", monospace; }\n')
-                        fp.write('</style>\n')
-                        fp.write('</head>\n<body>\n')
-                        
-                        fp.write('<div class="cb-header">\n')
-                        fp.write('<h1>📊 Constant Buffer Analysis</h1>\n')
-                        fp.write('<p>Draw ID: %04d</p>\n' % self.draw_id)
-                        fp.write('</div>\n')
-                        
-                        for s in range(0, rd.ShaderStage.Count):
-                            if s < len(self.shader_cb_contents) and self.shader_cb_contents[s]:
-                                fp.write('<div class="cb-section">\n')
-                                fp.write('<h2>🎯 %s Shader</h2>\n' % (ShaderStage(s).name))
-                                fp.write('<div class="cb-code">\n')
-                                fp.write('<pre>%s</pre>\n' % self.shader_cb_contents[s])
-                                fp.write('</div>\n')
-                                fp.write('</div>\n')
-                        
-                        fp.write('</body>\n</html>')
+                info.refls[stage] = refl
+
                 if False:
                     # TODO: sadly ShaderBindpointMapping is always empty :(
                     try:
@@ -2649,182 +2650,183 @@ class Draw(Event):
                     for sampler in samplers:
                         print(sampler)
 
+                shader_hash = get_shader_hash(refl)
+                record = g_shader_db.touch(shader_hash, stage)
+                html_file_name = get_resource_filename(g_assets_folder / shader_name, 'html')
+                lang = None
+                if API_TYPE == rd.GraphicsAPI.OpenGL:
+                    lang = '--opengles'
+                elif API_TYPE == rd.GraphicsAPI.Vulkan:
+                    lang = '--vulkan'
+
+                stored_analysis = g_shader_db.getStoredAnalysis(record, lang)
+                if stored_analysis is not None:
+                    # known shader, the page comes from the store without disassembly, txt or malioc
+                    if claim_shader_page(html_file_name):
+                        write_shader_html(html_file_name, self.expanded_marker, stored_analysis, record['disassembly'])
+                    continue
+
                 # raw txt
                 txt_file_name = get_resource_filename(g_assets_folder / shader_name, 'txt')
 
                 if not Path(txt_file_name).exists():
-                    with open(txt_file_name, 'wb') as fp:
-                        print("Writing %s" % txt_file_name)
+                    with g_profiler.span('write_shader_txt', 'io'), open(txt_file_name, 'wb') as fp:
+                        g_log.debug('shader', 'Writing %s', txt_file_name)
                         fp.write(refl.rawBytes)
 
                 # html
-                html_file_name = get_resource_filename(g_assets_folder / shader_name, 'html')
-                if not Path(html_file_name).exists():
-                    highlevel_shader = ''
-                    shader_analysis = ''
-                    if API_TYPE == rd.GraphicsAPI.OpenGL or API_TYPE == rd.GraphicsAPI.Vulkan:
+                if claim_shader_page(html_file_name):
+                    if record and record['disassembly'] is not None:
+                        # seen in an earlier capture, only the analysis is missing or outdated
+                        highlevel_shader = record['disassembly']
+                    else:
+                        highlevel_shader = ''
                         if API_TYPE == rd.GraphicsAPI.OpenGL:
                             highlevel_shader = str(refl.rawBytes, 'utf-8')
                             highlevel_shader = highlevel_shader.replace('<', ' < ') # fix a glsl syntax bug
-                            lang = '--opengles'
                         else:
                             targets = controller.GetDisassemblyTargets(True)
                             for t in targets:
                                 highlevel_shader = controller.DisassembleShader(pipe_state.GetGraphicsPipelineObject(), refl, t)
                                 break
-                            lang = '--vulkan'
-
-                        malioc_exe = g_assets_folder / '../' / 'mali_offline_compiler/malioc.exe'
-                        if config['WRITE_MALIOC'] and  malioc_exe.exists():
-                            # Define shader_flags locally to avoid conflicts
-                            local_shader_flags = [
-                                '--vertex',
-                                '--tessellation_control',
-                                '--tessellation_evaluation',
-                                '--geometry',
-                                '--fragment',
-                                '--compute',
-                            ]
-                            # Ensure stage is within bounds
-                            if stage < len(local_shader_flags):
-                                stage_flag = local_shader_flags[stage]
-                            else:
-                                stage_flag = '--unknown'
-                                print(f"Debug: Stage {stage} out of range for shader_flags (length: {len(local_shader_flags)})")
-                            args = [
-                                str(malioc_exe),
-                                stage_flag,
-                                lang,
-                                txt_file_name
-                            ]
-                            proc = subprocess.Popen(args, stdout=subprocess.PIPE, shell=True)
-                            shader_analysis, _ = proc.communicate()
-                            shader_analysis = str(shader_analysis, 'utf-8')
-                            shader_analysis = shader_analysis.replace('\r\n\r\n', '\n')
+                        g_shader_db.update(shader_hash, disassembly=highlevel_shader)
+
+                    # the page is written once the analysis is back
+                    def on_analysis(analysis, html_file_name=html_file_name, marker=self.expanded_marker, code=highlevel_shader, shader_hash=shader_hash):
+                        if analysis and not analysis.startswith(MALIOC_FAILED):
+                            g_shader_db.update(shader_hash, malioc=analysis, malioc_version=g_malioc.version)
+                        write_shader_html(html_file_name, marker, analysis, code)
+
+                    if lang:
+                        g_malioc.submit(txt_file_name, refl.rawBytes, stage, lang, on_analysis)
                     else:
-                        targets = controller.GetDisassemblyTargets(True)
-                        for t in targets:
-                            highlevel_shader = controller.DisassembleShader(pipe_state.GetGraphicsPipelineObject(), refl, t)
-                            break
-
-                    with open(html_file_name, 'w', encoding='utf-8') as fp:
-                        print("Writing %s" % html_file_name)
-                        fp.write('<!DOCTYPE html>\n<html>\n<head>\n')
-                        fp.write('<meta charset="utf-8">\n')
-                        fp.write('<title>Shader Analysis</title>\n')
-                        fp.write('<style>\n')
-                        fp.write('body { font-family: Arial, sans-serif; margin: 20px; }\n')
-                        fp.write('.shader-header { background-color: #ff6600; color: white; padding: 10px; border-radius: 5px; margin-bottom: 20px; }\n')
-                        fp.write('.shader-content { background-color: #f8f8f8; padding: 15px; border-radius: 5px; border-left: 4px solid #ff6600; }\n')
-                        fp.write('.shader-code { background-color: #2d2d2d; color: #f8f8f2; padding: 15px; border-radius: 5px; overflow-x: auto; font-family: "Courier New", monospace; }\n')
-                        fp.write('.analysis-section { background-color: #e8f4f8; padding: 15px; border-radius: 5px; margin: 10px 0; }\n')
-                        fp.write('</style>\n')
-                        fp.write('</head>\n<body>\n')
-                        
-                        # Marker section
-                        if self.expanded_marker:
-                            fp.write('<div class="shader-header">\n')
-                            fp.write('<h2>🔍 Marker: %s</h2>\n' % self.expanded_marker)
-                            fp.write('</div>\n')
-                        
-                        # Analysis section
-                        if shader_analysis:
-                            fp.write('<div class="analysis-section">\n')
-                            fp.write('<h3>📊 Shader Analysis</h3>\n')
-                            fp.write('<pre>%s</pre>\n' % shader_analysis)
-                            fp.write('</div>\n')
-                        
-                        # Shader code section
-                        fp.write('<div class="shader-content">\n')
-                        fp.write('<h3>💻 Shader Code</h3>\n')
-                        fp.write('<div class="shader-code">\n')
-                        fp.write('<pre>%s</pre>\n' % highlevel_shader)
-                        fp.write('</div>\n')
-                        fp.write('</div>\n')
-                        
-                        fp.write('</body>\n</html>')
-
-                # C:\svn_pool\renderdoc\renderdoc\api\replay\gl_pipestate.h
-                # struct State
-
-                # TODO: deal with other resources, (atomicBuffers, uniformBuffers, shaderStorageBuffers, images, transformFeedback etc)
-                if API_TYPE == rd.GraphicsAPI.D3D11:
-                    try:
-                        if hasattr(shader, 'bindpointMapping'):
-                            mapping = shader.bindpointMapping # struct ShaderBindpointMapping
-                            for sampler in mapping.readOnlyResources:
-                                # print(sampler.bind, sampler.bindset)
-                                srv = shader.srvs[sampler.bind]
-                                resource_id = srv.resourceResourceId
-                                if resource_id == rd.ResourceId.Null():
-                                    continue
-                                g_frame.textures.add(resource_id)
-                                self.textures.append(resource_id)
-                    except AttributeError:
-                        print(f"Debug: D3D11Shader object has no attribute 'bindpointMapping'")
-                        pass
-                elif API_TYPE == rd.GraphicsAPI.Vulkan and not self.textures:
-                    for desc_set in api_state.graphics.descriptorSets:
-                        for binding in desc_set.bindings:
-                            for bind in binding.binds:
-                                # print(bind.resourceResourceId, str(bind.viewFormat))
-                                resource_id = bind.resourceResourceId
-                                if resource_id == rd.ResourceId.Null():
-                                    continue
-                                if not get_texture_info(controller, resource_id):
-                                    continue
-                                g_frame.textures.add(resource_id)
-                                self.textures.append(resource_id)
-
-                    for sampler in shader.reflection.readOnlyResources:
-                        pass
-                        # print(sampler)
-                        # srv = api_state.images[sampler.bind]
-                        # resource_id = srv.resourceId
-                        # if resource_id == rd.ResourceId.Null():
-                        #     continue
-                        # g_frame.textures.add(resource_id)
-                        # self.textures.append(resource_id)
-                elif hasattr(api_state, 'textures') and not self.textures:
-                    try:
-                        if hasattr(shader, 'bindpointMapping'):
-                            mapping = shader.bindpointMapping # struct ShaderBindpointMapping
-                    except AttributeError:
-                        print(f"Debug: Shader object has no attribute 'bindpointMapping'")
-                        mapping = None
-
-                    for idx, sampler in enumerate(api_state.samplers):
-                        # TODO: why is sampler always zero?
-                        resource_id = sampler.resourceId
-                        if resource_id == rd.ResourceId.Null():
-                            continue
-                        # print(sampler.minLOD)
-
-                    for idx, texture in enumerate(api_state.textures):
-                        resource_id = texture.resourceId
-                        if resource_id == rd.ResourceId.Null():
-                            continue
-                        g_frame.textures.add(resource_id)
-                        self.textures.append(resource_id)
-                        
+                        on_analysis('')
+
+        info.program_name = program_name
+        return info
+
+    @g_profiler.wrap(cat='job')
+    def collectPipeline(self, controller):
+        # called by ReplayScheduler, the replay is already at self.event_id
+        global api_full_log
+
+        api_state = None
+        pipe_state : rd.PipeState = controller.GetPipelineState()
+
+        if API_TYPE == rd.GraphicsAPI.OpenGL:
+            api_state = controller.GetGLPipelineState()
+            # C:\svn_pool\renderdoc\renderdoc\api\replay\gl_pipestate.h
+        elif API_TYPE == rd.GraphicsAPI.D3D11:
+            api_state = controller.GetD3D11PipelineState()
+        elif API_TYPE == rd.GraphicsAPI.D3D12:
+            api_state = controller.GetD3D12PipelineState()
+        elif API_TYPE == rd.GraphicsAPI.Vulkan:
+            api_state = controller.GetVulkanPipelineState()
+
+        pipeline_key = get_pipeline_key(pipe_state, api_state, self.isDispatch())
+        info = g_pipeline_cache.get(pipeline_key)
+        if info is None:
+            info = self.collectShaders(controller, pipe_state, api_state)
+            g_pipeline_cache.add(pipeline_key, info)
+        program_name = info.program_name
+        self.shader_names = info.shader_names[:]
+        self.short_shader_names = info.short_shader_names[:]
+
+        # per draw part, bound resources can change without a PSO change
+        has_cbuffer = False
+        for stage in range(0, rd.ShaderStage.Count):
+            refl = info.refls[stage]
+            if not refl:
+                continue
+            shader = self.getStageShader(api_state, stage)
+
+            if config['WRITE_CONST_BUFFER']:
+                self.shader_cb_contents[stage] = get_cbuffer_contents(controller, stage, self.shader_names[stage], refl, program_name)
+                has_cbuffer = True
+
+            # C:\svn_pool\renderdoc\renderdoc\api\replay\gl_pipestate.h
+            # struct State
+
+            # TODO: deal with other resources, (atomicBuffers, uniformBuffers, shaderStorageBuffers, images, transformFeedback etc)
+            if API_TYPE == rd.GraphicsAPI.D3D11:
+                try:
+                    if hasattr(shader, 'bindpointMapping'):
+                        mapping = shader.bindpointMapping # struct ShaderBindpointMapping
+                        for sampler in mapping.readOnlyResources:
+                            # print(sampler.bind, sampler.bindset)
+                            srv = shader.srvs[sampler.bind]
+                            resource_id = srv.resourceResourceId
+                            if resource_id == rd.ResourceId.Null():
+                                continue
+                            g_frame.textures.add(resource_id)
+                            self.textures.append(resource_id)
+                except AttributeError:
+                    g_log.debug('pipeline', 'D3D11Shader object has no attribute bindpointMapping')
+                    pass
+            elif API_TYPE == rd.GraphicsAPI.Vulkan and not self.textures:
+                self.textures = get_vulkan_textures(controller, api_state)
+                g_frame.textures.update(self.textures)
+
+                for sampler in shader.reflection.readOnlyResources:
+                    pass
+                    # print(sampler)
+                    # srv = api_state.images[sampler.bind]
+                    # resource_id = srv.resourceId
+                    # if resource_id == rd.ResourceId.Null():
+                    #     continue
+                    # g_frame.textures.add(resource_id)
+                    # self.textures.append(resource_id)
+            elif hasattr(api_state, 'textures') and not self.textures:
+                try:
+                    if hasattr(shader, 'bindpointMapping'):
+                        mapping = shader.bindpointMapping # struct ShaderBindpointMapping
+                except AttributeError:
+                    g_log.debug('pipeline', 'Shader object has no attribute bindpointMapping')
+                    mapping = None
+
+                for idx, sampler in enumerate(api_state.samplers):
+                    # TODO: why is sampler always zero?
+                    resource_id = sampler.resourceId
+                    if resource_id == rd.ResourceId.Null():
+                        continue
+                    # print(sampler.minLOD)
+
+                for idx, texture in enumerate(api_state.textures):
+                    resource_id = texture.resourceId
+                    if resource_id == rd.ResourceId.Null():
+                        continue
+                    g_frame.textures.add(resource_id)
+                    self.textures.append(resource_id)
+
+        g_frame.overview.addTextures(self.draw_id, self.textures, get_resource_catalog(controller))
+
+        if has_cbuffer:
+            # const_buffer--%4d.html, shared by draws with identical contents
+            self.cbuffer_page = g_cbuffer_writer.add(self.draw_id, self.shader_cb_contents)
 
         self.state_key = program_name
 
         if not self.isDispatch():
             if API_TYPE == rd.GraphicsAPI.OpenGL and self.depth_buffer:
                 depthState : rd.GLPipe.DepthState = api_state.depthState
-                if depthState.depthEnable: self.depth_state[0] = 'R'
+                if depthState.depthEnable:
+                    self.depth_state[0] = 'R'
+                    g_depth_convention.observe(self.depth_buffer, depthState.depthFunction)
                 if depthState.depthWrites: self.depth_state[1] = 'W'
                 stencilState : rd.GLPipe.StencilState = api_state.stencilState
                 if stencilState.stencilEnable: self.depth_state[2] = '+S'
             elif API_TYPE == rd.GraphicsAPI.Vulkan and self.depth_buffer:
                 depthState : rd.VKPipe.DepthStencil = api_state.depthStencil
-                if depthState.depthTestEnable: self.depth_state[0] = 'R'
+                if depthState.depthTestEnable:
+                    self.depth_state[0] = 'R'
+                    g_depth_convention.observe(self.depth_buffer, depthState.depthFunction)
                 if depthState.depthWriteEnable: self.depth_state[1] = 'W'
                 if depthState.stencilTestEnable: self.depth_state[2] = '+S'
             elif API_TYPE == rd.GraphicsAPI.D3D11 or API_TYPE == rd.GraphicsAPI.D3D12 and self.depth_buffer:
                 depthState = api_state.outputMerger.depthStencilState
-                if depthState.depthEnable: self.depth_state[0] = 'R'
+                if depthState.depthEnable:
+                    self.depth_state[0] = 'R'
+                    g_depth_convention.observe(self.depth_buffer, depthState.depthFunction)
                 if depthState.depthWrites: self.depth_state[1] = 'W'
                 if depthState.stencilEnable: self.depth_state[2] = '+S'
 
@@ -2841,178 +2843,15 @@ class Draw(Event):
                     # TODO: support MRT
                     break
 
-        if self.state_key != State.current.getName():
-            # detects a PSO change
-            # TODO: this is too ugly
-            Pass.current.addState(self)
-
-    def getPassSummary(self, controller):
-        summary = ''
-        color_count = 0
-        depth_count = 0
-        texture_info = None
-        for resource_id in self.color_buffers:
-            if resource_id != rd.ResourceId.Null():
-                color_count += 1
-                if not texture_info:
-                    texture_info = get_texture_info(controller, resource_id)
-        if self.depth_buffer != rd.ResourceId.Null():
-            depth_count += 1
-            if not texture_info:
-                texture_info = get_texture_info(controller, self.depth_buffer)
-        if depth_count > 0:
-            summary = 'z'
-        else:
-            summary = ''
-        if color_count > 0:
-            if color_count == 1:
-                summary += 'c'
-            else:
-                summary += '%dc' % (color_count)
 
-        if texture_info:
-            summary = '%s_%dX%d' % (summary, texture_info.width, texture_info.height)
-        return summary
 
-    def writeTextureHtml(self, html_file, controller, caption_suffix, resource_id, texture_file_name):
-        texture_info = get_texture_info(controller, resource_id)
-        if not texture_info: return
-        depth_info = ''
-        arraysize_info = ''
-        mips_info = ''
-        if texture_info.depth > 1:
-            depth_info = 'x%d' % texture_info.depth
-        if texture_info.arraysize > 1:
-            arraysize_info = '[%d]' % texture_info.arraysize
-        if texture_info.mips > 1:
-            mips_info = '%d mips ' % texture_info.mips
-        texture_info_text = '(%dX%d%s%s %s%s)' % (texture_info.width, texture_info.height, depth_info, arraysize_info, mips_info, rd.ResourceFormat(texture_info.format).Name() )
-
-        # enum class ResourceFormatType
-        # rdcstr ResourceFormatName(const ResourceFormat &fmt)
-        # enum class ResourceFormatType
-        # rdcstr ResourceFormatName(const ResourceFormat &fmt)
-        # 使用优化的图片标签，支持懒加载和响应式设计
-        html_file.write('<div class="texture-container">')
-        html_file.write('<img src="data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMjAwIiBoZWlnaHQ9IjE1MCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZjVmNWY1Ii8+PHRleHQgeD0iNTAlIiB5PSI1MCUiIGZvbnQtZmFtaWx5PSJBcmlhbCwgc2Fucy1zZXJpZiIgZm9udC1zaXplPSIxNCIgZmlsbD0iIzk5OSIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZHk9Ii4zZW0iPkltYWdlPC90ZXh0Pjwvc3ZnPg==" data-src="assets/%s" alt="%s %s" class="lazyload texture-image" loading="lazy" style="max-width: 200px; height: auto; border: 1px solid #ddd; border-radius: 4px; margin: 5px; transition: transform 0.3s ease;">' % (texture_file_name, caption_suffix, texture_info_text))
-        html_file.write('<div class="texture-info">%s %s</div>' % (caption_suffix, texture_info_text))
-        html_file.write('</div>')
-
-    def writeDetailHtml(self, html_file, controller):
-        self.writeIndexHtml(html_file, controller)
-        chunks = sdfile.chunks
 
-        html_file.write('<div class="events-section">\n')
-        html_file.write('<h4>📋 事件列表</h4>\n')
-        for ev in self.draw_desc.events:
-            cid = chunks[ev.chunkIndex].metadata.chunkID
-            if API_TYPE == rd.GraphicsAPI.OpenGL:
-                event_type = GLChunk(cid)
-            elif API_TYPE == rd.GraphicsAPI.Vulkan:
-                event_type = VulkanChunk(cid)
-            else:
-                event_type = D3D11Chunk(cid)
-            html_file.write('<div class="event-item">event_%04d %s</div>\n' % (ev.eventId, event_type.name))
-        html_file.write('</div>\n')
 
-    def writeIndexHtml(self, html_file, controller):
-        global g_assets_folder
-
-        # 不生成外层的pass-section，因为现在在表格中
-        html_file.write('<div class="pass-header">\n')
-        html_file.write('<div class="pass-title">🎯 绘制调用 [D]%04d %s</div>\n' % (self.draw_id, self.name.replace('#', '_')))
-        
-        # 计算统计信息
-        shader_count = sum(1 for name in self.shader_names if name is not None)
-        texture_count = len(self.textures) if hasattr(self, 'textures') else 0
-        
-        html_file.write('<div class="pass-stats">\n')
-        html_file.write('<span class="stat-item">🔧 着色器: %d</span>\n' % shader_count)
-        html_file.write('<span class="stat-item">🖼️ 贴图: %d</span>\n' % texture_count)
-        if self.isClear():
-            html_file.write('<span class="stat-item">🧹 清除操作</span>\n')
-        elif self.isCopy():
-            html_file.write('<span class="stat-item">📋 复制操作</span>\n')
-        html_file.write('</div>\n')
-        html_file.write('</div>\n')
-        
-        html_file.write('<div class="pass-content-area">\n')
-
-        if self.expanded_marker:
-            html_file.write('<div class="marker">📌 %s</div>\n' % self.expanded_marker)
-
-        if self.isClear() or self.isCopy():
-            html_file.write('<div class="call-type">%s</div>\n' % ("清除" if self.isClear() else "复制"))
-        else:
-            html_file.write('<div class="pipeline-info">\n')
-            html_file.write('<div class="info-item"><strong>混合:</strong> %s</div>\n' % ("启用" if self.alpha_enabled else "禁用"))
-            html_file.write('<div class="info-item"><strong>深度状态:</strong> %s</div>\n' % ''.join(self.depth_state))
-            html_file.write('<div class="info-item"><strong>写入掩码:</strong> %s</div>\n' % ''.join(self.write_mask))
-            html_file.write('</div>\n')
-
-            # shader section
-            if any(self.shader_names):
-                html_file.write('<div class="shader-section">\n')
-                html_file.write('<h4>🔧 着色器</h4>\n')
-            for stage in range(0, rd.ShaderStage.Count):
-                if stage < len(self.shader_names) and self.shader_names[stage] != None:
-                        html_file.write('<div class="shader-item">%s: <a href="assets/%s.html">%s</a></div>\n' % (ShaderStage(stage).name, self.shader_names[stage], self.shader_names[stage]))
-            html_file.write('</div>\n')
-
-            # cb / constant buffer section
-            if config['WRITE_CONST_BUFFER']:
-                resource_name = 'const_buffer--%04d' % (self.draw_id)
-                file_name = get_resource_filename(resource_name, 'html')
-                html_file.write('<div class="constant-buffer">\n')
-                html_file.write('<h4>📊 常量缓冲区</h4>\n')
-                html_file.write('<a href="%s">%s</a>\n' % (file_name, resource_name))
-                html_file.write('</div>\n')
-
-        html_file.write('</div>\n')
-
-        if not self.isDispatch():
-            # color buffer section
-            if config['WRITE_COLOR_BUFFER']:
-                for idx, resource_id in enumerate(self.color_buffers):
-                    if not resource_id or resource_id == rd.ResourceId.Null():
-                        continue
-                    resource_name = get_resource_name(controller, resource_id)
-                    # TODO: ugly
-                    file_name = get_resource_filename('%s--%04d_c%d' % (resource_name, self.draw_id, idx), IMG_EXT)
-                    self.writeTextureHtml(html_file, controller, 'c%d: %s' % (idx, resource_name), resource_id, file_name)
-
-            # depth buffer section
-            if config['WRITE_DEPTH_BUFFER']:
-                if self.depth_buffer != rd.ResourceId.Null():
-                    resource_id = self.depth_buffer
-                    resource_name = get_resource_name(controller, resource_id)
-                    # TODO: ugly again
-                    file_name = get_resource_filename('%s--%04d_z' % (resource_name, self.draw_id), IMG_EXT)
-                    self.writeTextureHtml(html_file, controller, 'z: %s' % (resource_name), resource_id, file_name)
-
-            # texture section
-            if not self.isClear() and not self.isCopy() and config['WRITE_TEXTURE']:
-                html_file.write('<div class="texture-section">\n')
-                html_file.write('<h4>🖼️ 贴图资源</h4>\n')
-                for idx, resource_id in enumerate(self.textures):
-                    if not resource_id or resource_id == rd.ResourceId.Null():
-                        continue
-                    resource_name = get_resource_name(controller, resource_id)
-                    file_name = get_resource_filename(resource_name, IMG_EXT)
-                    self.writeTextureHtml(html_file, controller, 't%s: %s' % (idx, resource_name), resource_id, file_name)
-                html_file.write('</div>\n')
-        # TODO: add UAV / image etc
-
-    def exportResources(self, controller):
-        if not config['WRITE_COLOR_BUFFER'] and not config['WRITE_DEPTH_BUFFER'] and not config['WRITE_TEXTURE']:
-            return
-
-        if API_TYPE == rd.GraphicsAPI.Vulkan and self.isDispatch():
-            # on Android devices, Vulkan dispatch calls will likely crash renderdoc, so we skip them
-            return
-
-        if config['WRITE_COLOR_BUFFER'] or config['WRITE_DEPTH_BUFFER']:
-            controller.SetFrameEvent(self.event_id, False)
+    @g_profiler.wrap(cat='job')
+    def exportResources(self, controller):
+        # called by ReplayScheduler, the replay is already at self.event_id
+        if not self.needsExport():
+            return
 
         # WRITE textures
         if config['WRITE_TEXTURE']:
@@ -3023,14 +2862,15 @@ class Draw(Event):
                 file_name = get_resource_filename(resource_name, IMG_EXT)
                 export_texture(controller, resource_id, file_name)
 
+        target_mips = get_target_mips(controller)
+
         # WRITE render targtes (aka outputs)
         if config['WRITE_COLOR_BUFFER']:
             for idx, resource_id in enumerate(self.color_buffers):
                 if resource_id != rd.ResourceId.Null():
                     resource_name = get_resource_name(controller, resource_id)
                     file_name = get_resource_filename('%s--%04d_c%d' % (resource_name, self.draw_id, idx), IMG_EXT)
-                    if config['WRITE_COLOR_BUFFER']:
-                        export_texture(controller, resource_id, file_name)
+                    self.exportTarget(controller, resource_id, file_name, target_mips.get(int(resource_id), 0))
 
         # depth
         if config['WRITE_DEPTH_BUFFER'] and self.depth_buffer:
@@ -3038,21 +2878,522 @@ class Draw(Event):
             if resource_id != rd.ResourceId.Null():
                 resource_name = get_resource_name(controller, resource_id)
                 file_name = get_resource_filename('%s--%04d_z' % (resource_name, self.draw_id), IMG_EXT)
-                if not Path(file_name).exists():
-                    export_texture(controller, resource_id, file_name)
+                self.exportTarget(controller, resource_id, file_name, target_mips.get(int(resource_id), 0))
+
+    def exportTarget(self, controller, resource_id, file_name, mip):
+        # mip: the subresource the draw renders to, changes are only detected there,
+        # a smaller mip can hide a few changed pixels
+        texture_info = get_texture_info(controller, resource_id)
+        if not texture_info:
+            return
+        start = time.time()
+        pixels = controller.GetTextureData(resource_id, rd.Subresource(mip, 0, 0))
+        g_thumbnails.record('readback', start, len(pixels))
+
+        change = g_target_deltas.compare(resource_id, texture_info, mip, pixels)
+        self.target_changes[file_name] = change
+        if change[0] == 0:
+            # same pixels as the previous readback, point at that image instead of exporting again
+            g_asset_store.alias(file_name, g_target_deltas.getPreviousFileName(resource_id, mip))
+            g_target_deltas.skipped += 1
+            return
+        # smaller mips of a target are only filled later (if ever), the image is the rendered mip scaled down
+        export_texture(controller, resource_id, file_name, pixels, mip)
+        g_target_deltas.remember(resource_id, mip, pixels, file_name)
+
+
+
+    def toRaw(self):
+        desc = {}
+        for field in DRAW_DESC_FIELDS:
+            if hasattr(self.draw_desc, field):
+                desc[field] = getattr(self.draw_desc, field)
+        if hasattr(self.draw_desc, 'topology'):
+            desc['topology'] = str(self.draw_desc.topology)
+
+        return {
+            'event_id': self.event_id,
+            'draw_id': self.draw_id,
+            'name': self.name,
+            'level': self.level,
+            'state_key': self.state_key,
+            'shader_names': self.shader_names,
+            'short_shader_names': self.short_shader_names,
+            'cbuffer_page': self.cbuffer_page,
+            'textures': [int(resource_id) for resource_id in self.textures],
+            'color_buffers': [int(resource_id) for resource_id in self.color_buffers],
+            'depth_buffer': int(self.depth_buffer),
+            'target_changes': self.target_changes,
+            'expanded_marker': self.expanded_marker,
+            'marker': self.marker,
+            'gpu_duration': self.gpu_duration,
+            'alpha_enabled': self.alpha_enabled,
+            'depth_state': self.depth_state,
+            'write_mask': self.write_mask,
+            'desc': desc,
+            'events': self.event_list,
+        }
+
 
     draw_id = None
     draw_desc = None # struct ActionDescription
+    pass_ = None
+    api_events = None
+    event_list = None # [(event id, chunk name)] of the action
+    cbuffer_page = None
+    target_changes = None
     shader_names = None
     state_key = None
     color_buffers = None
     depth_buffer = None
 
-def export_texture(controller, resource_id, file_name):
+# regular formats that can be decoded in memory, (compType, compByteWidth) -> (numpy dtype, max value)
+# float formats have no max value and are tone-mapped instead
+PIXEL_DTYPES = {
+    (rd.CompType.UNorm, 1): ('u1', 255.0),
+    (rd.CompType.UNorm, 2): ('<u2', 65535.0),
+    (rd.CompType.UNormSRGB, 1): ('u1', 255.0),
+    (rd.CompType.Typeless, 1): ('u1', 255.0),
+    (rd.CompType.SNorm, 1): ('i1', 127.0),
+    (rd.CompType.SNorm, 2): ('<i2', 32767.0),
+    (rd.CompType.Float, 2): ('<f2', None),
+    (rd.CompType.Float, 4): ('<f4', None),
+    (rd.CompType.Depth, 2): ('<u2', 65535.0),
+    (rd.CompType.Depth, 4): ('<f4', None),
+}
+
+# bit layouts of packed formats, lowest bits first
+PACKED_FORMAT_BITS = {
+    'R10G10B10A2': (10, 10, 10, 2),
+    'R5G6B5': (5, 6, 5),
+    'R5G5B5A1': (5, 5, 5, 1),
+    'R4G4B4A4': (4, 4, 4, 4),
+}
+g_packed_format_bits = {getattr(rd.ResourceFormatType, k): v for k, v in PACKED_FORMAT_BITS.items() if hasattr(rd.ResourceFormatType, k)}
+
+# packed depth/stencil formats whose depth can be decoded, the stencil is dropped
+g_packed_depth_formats = [getattr(rd.ResourceFormatType, k) for k in ('D24S8', 'D32S8') if hasattr(rd.ResourceFormatType, k)]
+
+def can_decode_format(fmt):
+    if fmt.type == rd.ResourceFormatType.Regular:
+        return (fmt.compType, fmt.compByteWidth) in PIXEL_DTYPES
+    return fmt.type in g_packed_format_bits or fmt.type in g_packed_depth_formats or fmt.type == getattr(rd.ResourceFormatType, 'A8', None)
+
+def decode_texture_pixels(np, pixels, fmt, width, height):
+    # raw GetTextureData() bytes -> HxWxC float32 array, returns None if the format isn't supported here
+    stride = get_pixel_byte_size(fmt)
+    if stride == 0 or len(pixels) < width * height * stride:
+        return None
+    data = np.frombuffer(pixels, dtype=np.uint8, count=width * height * stride)
+
+    if fmt.type == rd.ResourceFormatType.Regular:
+        if (fmt.compType, fmt.compByteWidth) not in PIXEL_DTYPES:
+            return None
+        dtype, max_value = PIXEL_DTYPES[(fmt.compType, fmt.compByteWidth)]
+        values = data.view(dtype).reshape(height, width, fmt.compCount).astype(np.float32)
+        if max_value is None:
+            values = np.nan_to_num(values)
+            if values.max() > 1.0:
+                # HDR, reinhard
+                values = values / (1.0 + np.maximum(values, 0.0))
+            return np.clip(values, 0.0, 1.0)
+        return np.clip(values / max_value, 0.0, 1.0)
+
+    bits = g_packed_format_bits.get(fmt.type)
+    if bits:
+        packed = data.view('<u4' if stride == 4 else '<u2').reshape(height, width).astype(np.uint32)
+        channels = []
+        shift = 0
+        for count in bits:
+            mask = (1 << count) - 1
+            channels.append(((packed >> shift) & mask).astype(np.float32) / mask)
+            shift += count
+        return np.stack(channels, axis=-1)
+
+    if fmt.type == getattr(rd.ResourceFormatType, 'D24S8', None):
+        packed = data.view('<u4').reshape(height, width, 1)
+        if API_TYPE == rd.GraphicsAPI.OpenGL:
+            # GL_UNSIGNED_INT_24_8, depth in the high bits
+            depth = packed >> 8
+        else:
+            depth = packed & 0xFFFFFF
+        return depth.astype(np.float32) / float(0xFFFFFF)
+
+    if fmt.type == getattr(rd.ResourceFormatType, 'D32S8', None):
+        # float depth, then 32 bits holding the stencil
+        return data.view('<f4').reshape(height, width, 2)[:, :, :1].copy()
+
+    if fmt.type == getattr(rd.ResourceFormatType, 'A8', None):
+        return data.reshape(height, width, 1).astype(np.float32) / 255.0
+    return None
+
+DEPTH_HISTOGRAM_BINS = 65536
+
+def visualize_depth(np, depth, near, far, reversed_z = None, gl_ndc = False):
+    # HxW raw depth in [0, 1] -> HxW uint8, the far plane (cleared depth) stays white
+    # with near / far set, depth is linearized to view distance and drawn on a log scale between them,
+    # near 0 keeps raw depth and histogram equalizes it at full precision instead
+    # reversed_z: near at 1 and cleared to 0, None guesses it from the buffer
+    # gl_ndc: depth came from GL's [-1, 1] NDC through the default glDepthRange
+    depth = np.nan_to_num(depth.astype(np.float64))
+    if reversed_z is None:
+        # a reversed buffer is cleared to 0 and nothing reaches 1
+        reversed_z = not (depth >= 1.0).any() and bool((depth <= 0.0).any())
+    if reversed_z:
+        # 1 - d of a reversed buffer is the standard depth of the same point
+        depth = 1.0 - depth
+    background = depth >= 1.0
+    image = np.full(depth.shape, 255, dtype=np.uint8)
+    values = depth[~background]
+    if values.size == 0:
+        return image
+
+    if near > 0 and far > near:
+        d = np.clip(values, 0.0, 1.0)
+        if gl_ndc:
+            z = 2.0 * near * far / (far + near - (2.0 * d - 1.0) * (far - near))
+        else:
+            z = near * far / (far - d * (far - near))
+        # linear distance would squeeze everything close to the camera into a few shades
+        scaled = np.log(np.clip(z, near, far) / near) / np.log(far / near)
+        # keep a little headroom so geometry doesn't blend into the white background
+        image[~background] = (scaled * 250.0 + 0.5).astype(np.uint8)
+        return image
+
+    low, high = values.min(), values.max()
+    if high <= low:
+        image[~background] = 0
+        return image
+    hist, edges = np.histogram(values, bins=DEPTH_HISTOGRAM_BINS, range=(low, high))
+    cdf = np.cumsum(hist).astype(np.float64)
+    cdf = (cdf - cdf[0]) / max(1.0, cdf[-1] - cdf[0])
+    bins = np.minimum(((values - low) / (high - low) * DEPTH_HISTOGRAM_BINS).astype(np.int64), DEPTH_HISTOGRAM_BINS - 1)
+    image[~background] = (cdf[bins] * 250.0 + 0.5).astype(np.uint8)
+    return image
+
+def equalize_saved_depth(file_name, reversed_z):
+    # post-pass for depth formats only SaveTexture() can read (e.g. D16S8), the jpg holds depth in 8 bits
+    try:
+        import numpy as np
+        from PIL import Image
+    except ImportError:
+        return
+    try:
+        with Image.open(file_name) as img:
+            depth = np.asarray(img.convert('L'), dtype=np.float64) / 255.0
+        # 8 bits are too few to linearize, only equalize
+        image = visualize_depth(np, depth, 0, 0, reversed_z)
+        with g_profiler.span('write_thumbnail', 'io'):
+            Image.fromarray(image).save(file_name, 'JPEG', quality=config.get('JPEG_QUALITY', 85))
+    except Exception as e:
+        g_log.warning('export', 'Error equalizing %s: %s', file_name, e)
+
+class DepthConvention:
+    # reversed Z (near at 1, cleared to 0) per depth target, learned from the depth test of the draws using it
+    def __init__(self):
+        self.reversed = {} # resource id -> bool
+
+    def observe(self, resource_id, depth_function):
+        # Equal / Always / Never say nothing about the direction
+        name = str(depth_function)
+        if 'Greater' in name:
+            self.reversed[int(resource_id)] = True
+        elif 'Less' in name:
+            self.reversed[int(resource_id)] = False
+
+    def isReversed(self, resource_id):
+        # True / False, None when no draw has told yet and the readback has to
+        forced = config.get('DEPTH_REVERSED', 'auto')
+        if forced is True or forced is False:
+            return forced
+        return self.reversed.get(int(resource_id))
+
+g_depth_convention = DepthConvention()
+
+class ThumbnailPipeline:
+    # GetTextureData -> decode -> depth -> resize -> encode, without intermediate files
+    # only the readback runs on the replay thread, the rest goes to a pool of encoder threads
+    # time and bytes are recorded per stage
+    STAGES = ['readback', 'decode', 'depth', 'resize', 'encode']
+    CHECKER_SIZE = 8
+    WORKING_COPIES = 5 # float32 copies of the image alive at once while encoding
+
+    def __init__(self):
+        self.stats = OrderedDict((stage, [0.0, 0, 0]) for stage in self.STAGES) # seconds, bytes, count
+        self.fallbacks = 0
+        self.errors = 0
+        self.lock = threading.Condition()
+        self.executor = None
+        self.in_flight_bytes = 0
+        self.peak_bytes = 0
+
+    def record(self, stage, start, byte_count):
+        with self.lock:
+            stat = self.stats[stage]
+            stat[0] += time.time() - start
+            stat[1] += byte_count
+            stat[2] += 1
+
+    def getExecutor(self):
+        if not self.executor:
+            from concurrent.futures import ThreadPoolExecutor
+            workers = config.get('EXPORT_WORKERS', 0) or os.cpu_count() or 1
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+        return self.executor
+
+    def acquire(self, byte_count):
+        # backpressure, the replay thread waits until the queued jobs' working sets fit in the budget
+        budget = config.get('EXPORT_MEMORY_BUDGET_MB', 256) * 1024 * 1024
+        with self.lock:
+            while self.in_flight_bytes > 0 and self.in_flight_bytes + byte_count > budget:
+                self.lock.wait()
+            self.in_flight_bytes += byte_count
+            self.peak_bytes = max(self.peak_bytes, self.in_flight_bytes)
+
+    def release(self, byte_count):
+        with self.lock:
+            self.in_flight_bytes -= byte_count
+            self.lock.notify_all()
+
+    def export(self, controller, texture_info, file_name, mip, max_size, quality, pixels = None):
+        # returns False if the caller has to fall back to SaveTexture()
+        try:
+            import numpy as np
+            from PIL import Image
+        except ImportError:
+            return False
+
+        fmt = texture_info.format
+        if not can_decode_format(fmt):
+            self.fallbacks += 1
+            return False
+
+        start = time.time()
+        width, height = get_mip_size(texture_info, mip)
+        if pixels is None:
+            pixels = controller.GetTextureData(texture_info.resourceId, rd.Subresource(mip, 0, 0))
+            self.record('readback', start, len(pixels))
+
+        is_depth = bool(texture_info.creationFlags & rd.TextureCategory.DepthTarget) or fmt.compType == rd.CompType.Depth
+        reversed_z = g_depth_convention.isReversed(texture_info.resourceId) if is_depth else None
+
+        # identical readbacks (e.g. a target the draw didn't touch) are encoded once
+        digest = hashlib.md5(pixels)
+        digest.update(repr((rd.ResourceFormat(fmt).Name(), width, height, is_depth, reversed_z, max_size, quality)).encode('utf-8'))
+        file_path = Path(file_name)
+        stored_name, is_new = g_asset_store.add(file_path.name, digest.hexdigest(), IMG_EXT)
+        if not is_new:
+            return True
+
+        cost = self.getWorkingSetSize(len(pixels), fmt, width, height)
+        self.acquire(cost)
+        self.getExecutor().submit(self.encodeJob, cost, pixels, rd.ResourceFormat(fmt), width, height, (is_depth, reversed_z), str(file_path.parent / stored_name), max_size, quality)
+        return True
+
+    def getWorkingSetSize(self, byte_count, fmt, width, height):
+        # the readback plus the float32 HxWxC decode and the copies toRGB / visualize_depth make of it,
+        # this is what a job holds at its peak, not the readback alone
+        channels = max(3, fmt.compCount)
+        return byte_count + width * height * channels * 4 * self.WORKING_COPIES
+
+    @g_profiler.wrap(cat='thumbnail')
+    def encodeJob(self, cost, pixels, fmt, width, height, depth, file_name, max_size, quality):
+        # cost: what acquire() charged for this job, depth: (is_depth, reversed_z)
+        try:
+            self.encode(pixels, fmt, width, height, depth, file_name, max_size, quality)
+        except Exception as e:
+            with self.lock:
+                self.errors += 1
+            g_log.warning('export', 'Error encoding %s: %s', file_name, e)
+        finally:
+            self.release(cost)
+
+    def encode(self, pixels, fmt, width, height, depth, file_name, max_size, quality):
+        import numpy as np
+        from PIL import Image
+
+        is_depth, reversed_z = depth
+        start = time.time()
+        values = decode_texture_pixels(np, pixels, fmt, width, height)
+        if values is None:
+            raise ValueError('%d bytes are too few for %dx%d %s' % (len(pixels), width, height, fmt.Name()))
+        if API_TYPE == rd.GraphicsAPI.OpenGL:
+            # GL rows start at the bottom
+            values = values[::-1]
+        if is_depth:
+            self.record('decode', start, values.nbytes)
+            start = time.time()
+            image = visualize_depth(np, values[:, :, 0], config.get('DEPTH_NEAR', 0.1), config.get('DEPTH_FAR', 1000.0),
+                                    reversed_z, API_TYPE == rd.GraphicsAPI.OpenGL)
+            self.record('depth', start, image.nbytes)
+        else:
+            image = self.toRGB(np, values, fmt)
+            self.record('decode', start, image.nbytes)
+
+        start = time.time()
+        img = Image.fromarray(image)
+        scale = min(max_size / width, max_size / height, 1.0)
+        if scale < 1.0:
+            new_width = max(1, int(width * scale))
+            new_height = max(1, int(height * scale))
+            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            g_log.debug('export', 'Resized image from %dx%d to %dx%d', width, height, new_width, new_height)
+        self.record('resize', start, img.width * img.height * len(img.getbands()))
+
+        start = time.time()
+        encoded = io.BytesIO()
+        img.save(encoded, 'JPEG', quality=quality, optimize=True)
+        with g_profiler.span('write_thumbnail', 'io'), open(file_name, 'wb') as fp:
+            fp.write(encoded.getvalue())
+        self.record('encode', start, encoded.tell())
+        g_log.debug('export', 'Compressed image: %.1f KB', encoded.tell() / 1024)
+
+    def join(self):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def toRGB(self, np, values, fmt):
+        # HxWxC float -> HxWx3 uint8, alpha is blended over a checkerboard like texsave.alpha does
+        channels = values.shape[2]
+        if getattr(fmt, 'BGRAOrder', None) and fmt.BGRAOrder() and channels >= 3:
+            values = values[:, :, [2, 1, 0] + list(range(3, channels))]
+
+        if channels == 1:
+            rgb = np.repeat(values, 3, axis=2)
+        elif channels == 2:
+            rgb = np.concatenate([values, np.zeros_like(values[:, :, :1])], axis=2)
+        else:
+            rgb = values[:, :, :3]
+
+        name = rd.ResourceFormat(fmt).Name()
+        if channels == 4 and 'A2' not in name and 'A16' not in name:
+            height, width = values.shape[:2]
+            y, x = np.indices((height, width))
+            checker = np.where(((x // self.CHECKER_SIZE) + (y // self.CHECKER_SIZE)) % 2 == 0, 0.8, 0.6).astype(np.float32)
+            alpha = values[:, :, 3:4]
+            rgb = rgb * alpha + checker[:, :, None] * (1.0 - alpha)
+
+        return (np.clip(rgb, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+    def getSummary(self):
+        items = ['%s %.2fs %s x%d' % (stage, stat[0], format_memory_size(stat[1]), stat[2]) for stage, stat in self.stats.items()]
+        items.append('fallbacks %d, errors %d, peak working set %s' % (self.fallbacks, self.errors, format_memory_size(self.peak_bytes)))
+        return ', '.join(items)
+
+g_thumbnails = ThumbnailPipeline()
+
+def get_export_mip(texture_info):
+    if config.get('IMAGE_COMPRESSION', True):
+        # read the first mip that already fits, PIL only resizes when no mip is small enough
+        return pick_mip(texture_info, config.get('MAX_IMAGE_SIZE', 512))
+    return 0
+
+class TargetDigest:
+    # stands in for an evicted readback
+    def __init__(self, pixels):
+        self.size = len(pixels)
+        self.digest = hashlib.md5(pixels).digest()
+
+    def matches(self, pixels):
+        return len(pixels) == self.size and hashlib.md5(pixels).digest() == self.digest
+
+class TargetDeltas:
+    # keeps the last readback of every render target, so draws that left their targets
+    # untouched (culled, scissored, depth failed...) can skip the export
+    # the pixels for the changed-pixel bbox are kept for the most recently written targets up to
+    # TARGET_HISTORY_MB, older ones are replaced by a digest, which still tells if nothing changed
+    def __init__(self):
+        self.previous = OrderedDict() # (resource id, mip) -> [pixels or digest, file name], oldest first
+        self.retained_bytes = 0
+        self.peak_bytes = 0
+        self.evicted = 0
+        self.skipped = 0
+
+    def compare(self, resource_id, texture_info, mip, pixels):
+        # returns (changed pixel count, (x0, y0, x1, y1) in mip coordinates), count is None when unknown
+        prev = self.previous.get((resource_id, mip))
+        if prev is None:
+            return None, None
+        if isinstance(prev[0], TargetDigest):
+            # evicted, only equality is known
+            return (0, None) if prev[0].matches(pixels) else (None, None)
+        if len(prev[0]) != len(pixels):
+            return None, None
+        if prev[0] == pixels:
+            return 0, None
+
+        stride = get_pixel_byte_size(texture_info.format)
+        width, height = get_mip_size(texture_info, mip)
+        if stride == 0 or len(pixels) < width * height * stride:
+            return None, None
+        try:
+            import numpy as np
+        except ImportError:
+            return None, None
+
+        count = width * height * stride
+        a = np.frombuffer(pixels, dtype=np.uint8, count=count).reshape(height, width, stride)
+        b = np.frombuffer(prev[0], dtype=np.uint8, count=count).reshape(height, width, stride)
+        changed = np.any(a != b, axis=2)
+        if API_TYPE == rd.GraphicsAPI.OpenGL:
+            # GL rows start at the bottom
+            changed = changed[::-1]
+        rows = np.flatnonzero(changed.any(axis=1))
+        cols = np.flatnonzero(changed.any(axis=0))
+        if len(rows) == 0:
+            return 0, None
+        return int(changed.sum()), (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+
+    def getPreviousFileName(self, resource_id, mip):
+        return self.previous[(resource_id, mip)][1]
+
+    def remember(self, resource_id, mip, pixels, file_name):
+        key = (resource_id, mip)
+        prev = self.previous.pop(key, None)
+        if prev is not None and not isinstance(prev[0], TargetDigest):
+            self.retained_bytes -= len(prev[0])
+        self.previous[key] = [pixels, file_name]
+        self.retained_bytes += len(pixels)
+
+        # least recently written targets give up their pixels first, hashing only happens here
+        limit = config.get('TARGET_HISTORY_MB', 64) * 1024 * 1024
+        for entry in self.previous.values():
+            if self.retained_bytes <= limit:
+                break
+            if not isinstance(entry[0], TargetDigest):
+                self.retained_bytes -= len(entry[0])
+                entry[0] = TargetDigest(entry[0])
+                self.evicted += 1
+        self.peak_bytes = max(self.peak_bytes, self.retained_bytes)
+
+    def getSummary(self):
+        return 'skipped %d exports, evicted %d readbacks, peak retained %s' % (self.skipped, self.evicted, format_memory_size(self.peak_bytes))
+
+def get_target_mips(controller):
+    # resource id -> mip the current draw renders to, only targets bound above mip 0 are listed
+    mips = {}
+    try:
+        pipe = controller.GetPipelineState()
+        targets = list(pipe.GetOutputTargets()) + [pipe.GetDepthTarget()]
+    except AttributeError:
+        return mips
+    for target in targets:
+        # BoundResource before renderdoc 1.26, Descriptor after
+        resource_id = target.resource if hasattr(target, 'resource') else getattr(target, 'resourceId', None)
+        mip = getattr(target, 'firstMip', 0)
+        if resource_id is not None and mip > 0:
+            mips[int(resource_id)] = mip
+    return mips
+
+g_target_deltas = TargetDeltas()
+
+def export_texture(controller, resource_id, file_name, pixels = None, mip = None):
+    # mip: defaults to get_export_mip(), pixels: readback of that mip, if the caller already has it
     global g_assets_folder
 
     file_path = g_assets_folder / file_name
-    if file_path.exists():
+    if file_path.exists() or g_asset_store.has(file_name):
         return
 
     file_name = str(file_path)
@@ -3071,11 +3412,16 @@ def export_texture(controller, resource_id, file_name):
     else:
         texsave.alpha = rd.AlphaMapping.BlendToCheckerboard
     texsave.destType = rd.FileType.JPG
-    texsave.mip = 0
+    texsave.mip = get_export_mip(texture_info) if mip is None else mip
     texsave.slice.sliceIndex = 0
     texsave.resourceId = resource_id
 
-    print("Writing %s" % file_name)
+    g_log.debug('export', 'Writing %s', file_name)
+    if config.get('IMAGE_COMPRESSION', True):
+        if g_thumbnails.export(controller, texture_info, file_name, texsave.mip, MAX_IMAGE_SIZE, JPEG_QUALITY, pixels):
+            return
+        # block compressed and unusual formats still go through SaveTexture()
+
     controller.SaveTexture(texsave, file_name)
 
     # 图片压缩和尺寸优化
@@ -3100,78 +3446,24 @@ def export_texture(controller, resource_id, file_name):
                 
                 # 使用高质量的缩放算法
                 img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                print(f"Resized image from {original_width}x{original_height} to {new_width}x{new_height}")
+                g_log.debug('export', 'Resized image from %dx%d to %dx%d', original_width, original_height, new_width, new_height)
             
             # 保存压缩后的图片
-            img.save(file_name, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+            with g_profiler.span('write_thumbnail', 'io'):
+                img.save(file_name, 'JPEG', quality=JPEG_QUALITY, optimize=True)
             
             # 获取文件大小
             file_size = os.path.getsize(file_name)
             file_size_kb = file_size / 1024
-            print(f"Compressed image: {file_size_kb:.1f} KB")
+            g_log.debug('export', 'Compressed image: %.1f KB', file_size_kb)
             
         except ImportError:
-            print("PIL not available, skipping image compression")
+            g_log.warning('export', 'PIL not available, skipping image compression')
         except Exception as e:
-            print(f"Image compression failed: {e}")
-
-    if not 'pyrenderdoc' in globals() and texture_info.creationFlags & rd.TextureCategory.DepthTarget:
-        # equalizeHist
-        try:
-            import cv2
-            import numpy as np
-        except ImportError as error:
-            return
+            g_log.warning('export', 'Image compression failed: %s', e)
 
-        z_rgb = cv2.imread(file_name)
-        z_r = z_rgb[:, :, 2]
-        equ = cv2.equalizeHist(z_r)
-        # res = np.hstack((z_r,equ)) #stacking images side-by-side
-        cv2.imwrite(file_name, equ)
-
-def pretty_number(num):
-    """统一数字格式化，使用K/M/G单位（1000进制）"""
-    if num < 1e3:
-        return str(num)
-    if num < 1e6:
-        return "%.1fK" % (num/1e3) + " (千)"
-    if num < 1e9:
-        return "%.1fM" % (num/1e6) + " (百万)"
-    if num < 1e12:
-        return "%.1fG" % (num/1e9) + " (十亿)"
-    return "%.1fT" % (num/1e12) + " (万亿)"
-
-def format_memory_size(bytes_size):
-    """统一内存大小格式化，使用KB/MB/GB单位（1024进制）"""
-    if bytes_size == 0:
-        return "0 MB"
-    if bytes_size < 1024:
-        return "%.1f B" % bytes_size
-    elif bytes_size < 1024 * 1024:
-        return "%.1f KB" % (bytes_size / 1024)
-    elif bytes_size < 1024 * 1024 * 1024:
-        return "%.1f MB" % (bytes_size / (1024 * 1024))
-    else:
-        return "%.1f GB" % (bytes_size / (1024 * 1024 * 1024))
-
-def format_time_duration(microseconds):
-    """统一时间格式化，使用微秒/毫秒/秒单位"""
-    if microseconds < 1000:
-        return "%.2f μs" % microseconds + " (微秒)"
-    elif microseconds < 1000000:
-        return "%.2f ms" % (microseconds / 1000) + " (毫秒)"
-    else:
-        return "%.2f s" % (microseconds / 1000000) + " (秒)"
-
-def format_size_range(max_size, min_size):
-    """统一尺寸范围格式化，添加像素单位"""
-    if max_size == 0:
-        return "无数据"
-    if min_size == float('inf'):
-        return "%d px" % max_size
-    if max_size == min_size:
-        return "%d px" % max_size
-    return "%d~%d px" % (max_size, min_size)
+    if texture_info.creationFlags & rd.TextureCategory.DepthTarget:
+        equalize_saved_depth(file_name, g_depth_convention.isReversed(resource_id))
 
 class Frame:
     #
@@ -3179,6 +3471,10 @@ class Frame:
         self.passes = []
         self.textures = set()
         self.shaders = OrderedDict()
+        self.texture_tips = [] # GL resource overview rows, filled by collectTextureTips
+        self.api_properties = None
+        self.frame_stats = None
+        self.overview = FrameOverview() # frame overview totals, updated as draws are visited and replayed
 
         self.addPass()
         self.stateNameDict = defaultdict(int)
@@ -3190,31 +3486,24 @@ class Frame:
         self.passes.append(Pass())
         Pass.current = self.passes[-1]
 
-    def getImageLinkOrNothing(self, filename, width='100%'):
-        if not filename:
-            return ''
-
-        return '<img src="data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMjAwIiBoZWlnaHQ9IjE1MCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZjVmNWY1Ii8+PHRleHQgeD0iNTAlIiB5PSI1MCUiIGZvbnQtZmFtaWx5PSJBcmlhbCwgc2Fucy1zZXJpZiIgZm9udC1zaXplPSIxNCIgZmlsbD0iIzk5OSIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZHk9Ii4zZW0iPlByZXZpZXc8L3RleHQ+PC9zdmc=" data-src="%s" alt="Preview" class="lazyload" loading="lazy" style="max-width: %s; height: auto; border: 1px solid #ddd; border-radius: 4px; margin: 5px; transition: transform 0.3s ease;">' % (filename, width)
-
-    def writeShaderOverview(self, html_file, controller):
-        # 着色器概览已取消
-        pass
 
-    def writeResourceOverview(self, html_file, controller):
 
+    @g_profiler.wrap()
+    def collectTextureTips(self, controller):
         if API_TYPE != rd.GraphicsAPI.OpenGL:
             # TODO: support APIs besides OpenGL
             return
 
-        if not g_frame.textures:
-            return
-
         texture_tips = []
 
-        for resource_id in g_frame.textures:
+        for resource_id in self.textures:
             if not resource_id or resource_id == rd.ResourceId.Null():
                 continue
-            texture_tips.append(TextureTip(controller, resource_id))
+            tip = TextureTip(controller, resource_id)
+            texture_tips.append(tip)
+            if config['WRITE_TEXTURE']:
+                file_name = get_resource_filename(get_resource_name(controller, resource_id), IMG_EXT)
+                export_texture(controller, resource_id, file_name)
 
         def getName(elem):
             return elem.name
@@ -3224,843 +3513,96 @@ class Frame:
 
         texture_tips = sorted(texture_tips, key=getName)
         texture_tips = sorted(texture_tips, key=getTipsLength, reverse=True)
+        self.texture_tips = [{'resource_id': int(tip.resource_id), 'name': tip.name, 'format': tip.format, 'tips': tip.tips} for tip in texture_tips]
 
-        html_file.write('<div class="card">\n')
-        html_file.write('<div class="card-header">📦 资源概览</div>\n')
-        html_file.write('<div class="card-content">\n')
-        html_file.write('<table>\n')
-        html_file.write('<thead>\n')
-        html_file.write('<tr><th>名称</th><th>类型</th><th>用途</th><th>尺寸</th><th>Mip</th><th>格式</th><th>字节</th><th>提示</th><th>预览</th></tr>\n')
-        html_file.write('</thead>\n')
-        html_file.write('<tbody>\n')
-
-        for tip in texture_tips:
-            file_name = get_resource_filename(get_resource_name(controller, tip.resource_id), IMG_EXT)
-            tex_info = tip.info
-            if config['WRITE_TEXTURE']:
-                export_texture(controller, tex_info.resourceId, file_name)
-            texType = '%s' % rd.TextureType(tex_info.type)
-            texType = texType.replace('TextureType.', '')
-            # 翻译贴图类型为中文
-            texType = texType.replace('Texture2D', '2D贴图')
-            texType = texType.replace('Texture3D', '3D贴图')
-            texType = texType.replace('TextureCube', '立方体贴图')
-            texType = texType.replace('Texture1D', '1D贴图')
-            texType = texType.replace('Texture1DArray', '1D贴图数组')
-            texType = texType.replace('Texture2DArray', '2D贴图数组')
-            texType = texType.replace('TextureCubeArray', '立方体贴图数组')
-            texType = texType.replace('Texture3DArray', '3D贴图数组')
-            usages = '%s' % rd.TextureCategory(tex_info.creationFlags)
-            usages = usages.replace('TextureCategory.', '').replace('ShaderRead','T').replace('ColorTarget','C').replace('DepthTarget','Z').replace('|',''),
-            html_file.write('<tr>\n')
-            html_file.write('<td>%s</td>\n' % tip.name)
-            html_file.write('<td>%s</td>\n' % texType)
-            html_file.write('<td>%s</td>\n' % '|'.join(usages))
-            html_file.write('<td>%s</td>\n' % '%dx%d' % (tex_info.width, tex_info.height))
-            html_file.write('<td>%d</td>\n' % tex_info.mips)
-            html_file.write('<td>%s</td>\n' % tip.format)
-            html_file.write('<td>%s</td>\n' % pretty_number(tex_info.byteSize))
-            html_file.write('<td>%s</td>\n' % '<br>'.join(tip.tips))
-            html_file.write('<td><img src="data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTAwIiBoZWlnaHQ9Ijc1IiB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciPjxyZWN0IHdpZHRoPSIxMDAlIiBoZWlnaHQ9IjEwMCUiIGZpbGw9IiNmNWY1ZjUiLz48dGV4dCB4PSI1MCUiIHk9IjUwJSIgZm9udC1mYW1pbHk9IkFyaWFsLCBzYW5zLXNlcmlmIiBmb250LXNpemU9IjEyIiBmaWxsPSIjOTk5IiB0ZXh0LWFuY2hvcj0ibWlkZGxlIiBkeT0iLjNlbSI+UmVzb3VyY2U8L3RleHQ+PC9zdmc=" data-src="%s" alt="Preview" class="lazyload" loading="lazy" style="max-width: 100px; height: auto; border: 1px solid #ddd; border-radius: 4px; margin: 2px; transition: transform 0.3s ease;"></td>\n' % file_name)
-            html_file.write('</tr>\n')
-
-        html_file.write('</tbody>\n')
-        html_file.write('</table>\n')
-        html_file.write('</div>\n')
-        html_file.write('</div>\n')
-
-    def writeFrameOverview(self, html_file, controller):
-        summary_csv = open(g_assets_folder / 'summary.csv',"w") 
-
-        html_file.write('<div class="card">\n')
-        html_file.write('<div class="card-header">📊 渲染资产统计</div>\n')
-        html_file.write('<div class="card-content">\n')
-
-        # 初始化所有统计变量，确保在任何情况下都有定义
-        total_textures = 0
-        total_texture_size = 0
-        total_max_size = 0
-        total_min_size = float('inf')
-        
-        total_draws = 0
-        total_vertices = 0
-        total_polygons_accurate = 0
-        total_time = 0
-        
-        # 初始化其他变量
-        largest_texture_info = None
-        largest_texture_id = None
-        smallest_texture_info = None
-        smallest_texture_id = None
-        smallest_name = ""
-        smallest_format = ""
-        smallest_memory = 0
-        smallest_found = False
-
-        texture_formats = []
-        texture_types = []
-        mipmap_counts = []
-        size_analysis = []  # 初始化size_analysis变量
-        
-        # 分析贴图资源 - 只从Color Pass中收集贴图
-        all_textures = set()
-        
-        # 从所有Pass中收集贴图资源
-        print(f"Debug: 开始收集贴图，总Pass数: {len(self.passes)}")
-        for p in self.passes:
-            for s in p.states:
-                for d in s.draws:
-                    # 收集所有Pass中的所有贴图
-                    print(f"Debug: 处理绘制调用 {d.draw_id}: {d.name}")
-                    print(f"Debug: 该绘制的贴图数量: {len(d.textures)}")
-                    for resource_id in d.textures:
-                        if resource_id != rd.ResourceId.Null():
-                            # 获取贴图信息
-                            texture_info = get_texture_info(controller, resource_id)
-                            if texture_info:
-                                # 收集所有贴图，不做任何过滤
-                                all_textures.add(resource_id)
-                                print(f"Debug: 从绘制调用收集贴图: {resource_id}")
-                            else:
-                                print(f"Debug: 贴图信息获取失败: {resource_id}")
-                        else:
-                            print(f"Debug: 跳过空贴图ID")
-        
-        print(f"Debug: 从Pass收集到的贴图数量: {len(all_textures)}")
-        
-        # 如果从Pass中没有收集到贴图，直接从RenderDoc API获取所有贴图
-        if len(all_textures) == 0:
-            try:
-                # 直接从RenderDoc API获取所有贴图
-                textures = controller.GetTextures()
-                for texture in textures:
-                    if texture.resourceId != rd.ResourceId.Null():
-                        all_textures.add(texture.resourceId)
-            except Exception as e:
-                pass
-        
-        # 如果还是没有贴图，尝试从所有资源中获取
-        if len(all_textures) == 0:
-            try:
-                # 从所有资源中获取贴图
-                resources = controller.GetResources()
-                for resource in resources:
-                    if resource.resourceId != rd.ResourceId.Null():
-                        # 检查是否为贴图资源
-                        texture_info = get_texture_info(controller, resource.resourceId)
-                        if texture_info:
-                            all_textures.add(resource.resourceId)
-                            print(f"Debug: 从资源获取贴图: {resource.resourceId} - {resource.name}")
-            except Exception as e:
-                print(f"Debug: 从资源获取贴图失败: {e}")
-        
+    @g_profiler.wrap()
+    def collectFrameInfo(self, controller):
+        api_prop = controller.GetAPIProperties()
+        self.api_properties = {'pipelineType': int(api_prop.pipelineType), 'vendor': int(api_prop.vendor)}
 
-        
+        stats = controller.GetFrameInfo().stats
+        if stats.recorded:
+            self.frame_stats = OrderedDict()
+            for group, fields in FRAME_STATS_FIELDS.items():
+                item = getattr(stats, group)
+                self.frame_stats[group] = {f: getattr(item, f) for f in fields}
 
-        
-        # 分析收集到的贴图 - 所有数据来自RenderDoc texture_info
-        # 重新初始化最大和最小贴图变量
-        largest_texture_info = None  # 记录最大贴图的信息
-        largest_texture_id = None
-        smallest_texture_info = None
-        smallest_texture_id = None
-        smallest_name = ""
-        smallest_format = ""
-        smallest_memory = 0
-        smallest_found = False
-        
-        print(f"Debug: 开始分析 {len(all_textures)} 个贴图")
-        for resource_id in all_textures:
-            texture_info = get_texture_info(controller, resource_id)
-            if not texture_info:
-                print(f"Debug: 贴图信息获取失败: {resource_id}")
-                continue
 
-            # 统计所有贴图数据，不做任何过滤
-            texture_memory = texture_info.width * texture_info.height * 4  # 假设RGBA格式
-            max_size = max(texture_info.width, texture_info.height)
-            min_size = min(texture_info.width, texture_info.height)
-            
-            total_textures += 1
-            total_texture_size += texture_memory
-            
-            # 收集贴图格式信息 - 只保留主要格式
-            texture_format = rd.ResourceFormat(texture_info.format).Name()
-            
-            # 过滤掉不需要的格式
-            skip_formats = [
-                'BC7_SRGB', 'BC7_UNORM', 'BC6_UFLOAT', 'BC5_UNORM', 'BC1_UNORM',
-                'R16G16_FLOAT', 'R16_FLOAT', 'R10G10B10A2_UNORM', 'R32_FLOAT',
-                'R8G8B8A8_UNORM', 'R8G8B8A8_SRGB', 'R16G16B16A16_FLOAT',
-                'R16G16_UNORM', 'A8_UNORM', 'R32_TYPELESS', 'D32S8_TYPELESS',
-                'R11G11B10_FLOAT', 'R8_UNORM', 'R16_TYPELESS', 'R16_UNORM',
-                'R8G8_UNORM', 'R32G32B32A32_FLOAT'
-            ]
-            
-            if texture_format not in skip_formats:
-                texture_formats.append(texture_format)
-            
-            # 收集贴图类型信息
-            if hasattr(texture_info, 'type'):
-                texture_type = str(texture_info.type)
-                texture_types.append(texture_type)
-            
-            # 收集Mipmap信息
-            if hasattr(texture_info, 'mips'):
-                mipmap_counts.append(texture_info.mips)
-            
 
-            
-            # 追踪最大尺寸的贴图
-            if max_size > total_max_size:
-                total_max_size = max_size
-                largest_texture_info = texture_info
-                largest_texture_id = resource_id
-            
-            total_min_size = min(total_min_size, min_size)
-        
-        print(f"Debug: 贴图分析完成，总贴图数: {total_textures}")
-        
 
-        
-        # 直接使用RenderDoc提供的准确数据
-        total_instances = 0
-        
-        for p in self.passes:
-            for s in p.states:
-                for d in s.draws:
-                    total_draws += 1
-                    
-                    # 尝试多种方式收集几何体数据
-                    if hasattr(d, 'draw_desc') and d.draw_desc:
-                        # 方法1: 从 draw_desc 收集顶点数
-                        if hasattr(d.draw_desc, 'numVertices') and d.draw_desc.numVertices > 0:
-                            total_vertices += d.draw_desc.numVertices
-                        
-                        # 方法2: 从 draw_desc 的其他可能字段收集顶点数
-                        if hasattr(d.draw_desc, 'vertexCount') and d.draw_desc.vertexCount > 0:
-                            total_vertices += d.draw_desc.vertexCount
-                        
-                        # 方法3: 从绘制调用的其他属性收集顶点数
-                        if hasattr(d, 'vertexCount') and d.vertexCount > 0:
-                            total_vertices += d.vertexCount
-                        
-                        # 方法4: 从绘制调用的其他可能属性收集顶点数
-                        if hasattr(d, 'numVertices') and d.numVertices > 0:
-                            total_vertices += d.numVertices
-                        
-                        # 根据图元类型计算面数
-                        if hasattr(d.draw_desc, 'topology'):
-                            topology = str(d.draw_desc.topology)
-                            if hasattr(d.draw_desc, 'numVertices') and d.draw_desc.numVertices > 0:
-                                vertices = d.draw_desc.numVertices
-                                if 'Triangle' in topology:
-                                    total_polygons_accurate += vertices // 3
-                                elif 'Quad' in topology:
-                                    total_polygons_accurate += vertices // 4
-                                elif 'Line' in topology:
-                                    total_polygons_accurate += vertices // 2
-                                else:
-                                    # 默认按三角形计算
-                                    total_polygons_accurate += vertices // 3
-                    
-                    # 收集GPU时间 - 来自RenderDoc gpu_duration
-                    if hasattr(d, 'gpu_duration'):
-                        total_time += d.gpu_duration
-        
 
-        
-        # 处理最小尺寸的显示
-        # 使用全局的format_size_range函数
-        
-        # 处理内存显示
-        # 使用全局的format_memory_size函数
-        
-        # 添加表格样式
-        html_file.write('<style>\n')
-        html_file.write('.stats-table { width: 100%; border-collapse: collapse; margin: 20px 0; background: white; border-radius: 10px; overflow: hidden; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }\n')
-        html_file.write('.stats-table th { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 15px; text-align: left; font-weight: 600; }\n')
-        html_file.write('.stats-table td { padding: 12px 15px; border-bottom: 1px solid #eee; }\n')
-        html_file.write('.stats-table tr:hover { background-color: #f8f9fa; }\n')
-        html_file.write('.stats-table .highlight { background-color: #e3f2fd; font-weight: 600; }\n')
-        html_file.write('.summary-cards { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; margin: 20px 0; }\n')
-        html_file.write('.summary-card { background: white; border-radius: 10px; padding: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); text-align: center; }\n')
-        html_file.write('.summary-card .value { font-size: 24px; font-weight: bold; color: #667eea; }\n')
-        html_file.write('.summary-card .label { color: #666; margin-top: 5px; }\n')
-        html_file.write('</style>\n')
-        
-        # 统一统计表格
-        html_file.write('<table class="stats-table">\n')
-        html_file.write('<thead>\n')
-        html_file.write('<tr>\n')
-        html_file.write('<th>类别</th>\n')
-        html_file.write('<th>项目</th>\n')
-        html_file.write('<th>数值</th>\n')
-        html_file.write('</tr>\n')
-        html_file.write('</thead>\n')
-        html_file.write('<tbody>\n')
-        
 
-            
-                    # 添加最大贴图的详细信息
-        if largest_texture_info and largest_texture_id:
-            largest_name = get_resource_name(controller, largest_texture_id)
-            largest_format = rd.ResourceFormat(largest_texture_info.format).Name()
-            largest_memory = largest_texture_info.width * largest_texture_info.height * 4
-            
-                    
-            
-            for resource_id in all_textures:
-                texture_info = get_texture_info(controller, resource_id)
-                if not texture_info:
-                    continue
-                # 检查是否为渲染目标，如果是则跳过
-                texture_format = rd.ResourceFormat(texture_info.format).Name()
-                # 跳过深度/模板缓冲区和渲染目标
-                if 'Depth' in texture_format or 'Stencil' in texture_format:
-                    continue  # 跳过深度/模板缓冲区
-                # 检查是否为渲染目标（通常有特定的命名模式）
-                resource_name = get_resource_name(controller, resource_id)
-                if resource_name and ('Target' in resource_name or 'Render' in resource_name):
-                    continue  # 跳过渲染目标
-                
-                max_size = max(texture_info.width, texture_info.height)
-                if not smallest_found or max_size < min(smallest_texture_info.width, smallest_texture_info.height):
-                    smallest_texture_info = texture_info
-                    smallest_texture_id = resource_id
-                    smallest_name = get_resource_name(controller, resource_id)
-                    smallest_format = texture_format
-                    smallest_memory = texture_info.width * texture_info.height * 4
-                    smallest_found = True
-            
-
-
-            # 只跳过明显的深度/模板缓冲区
-            if 'Depth' not in largest_format and 'Stencil' not in largest_format:
-                # 简化使用位置显示，最多显示前5个
-                usage_passes = []
-                for p in self.passes:
-                    for s in p.states:
-                        for d in s.draws:
-                            if hasattr(d, 'textures') and largest_texture_id in d.textures:
-                                usage_passes.append(f"Pass {len(usage_passes)+1}")
-                            if hasattr(d, 'color_buffers') and largest_texture_id in d.color_buffers:
-                                usage_passes.append(f"Pass {len(usage_passes)+1} (颜色缓冲区)")
-                            # 跳过深度缓冲区
-                            if hasattr(d, 'depth_buffer') and d.depth_buffer == largest_texture_id:
-                                continue
-                            
-                            # 最多显示5个使用位置
-                            if len(usage_passes) >= 5:
-                                break
-                        if len(usage_passes) >= 5:
-                            break
-                    if len(usage_passes) >= 5:
-                        break
-                
-                # 移除最大和最小贴图详情信息
-                
-
-        
-        # 确保变量有合理的默认值
-        if total_polygons_accurate < 0:
-            total_polygons_accurate = 0
-        
-        # 如果所有方法都失败，使用估算
-        if total_vertices == 0 and total_draws > 0:
-            # 如果连顶点数都没有，按绘制调用数估算
-            total_vertices = total_draws * 1000  # 每个绘制调用假设1000个顶点
-            total_polygons_accurate = total_draws * 333  # 每个绘制调用假设333个面
-        
-        model_stats = [
-            {'category': '🎯 模型', 'item': '总绘制调用', 'value': str(total_draws) + " 次"},
-            {'category': '🎯 模型', 'item': '总顶点数', 'value': pretty_number(total_vertices)},
-            {'category': '🎯 模型', 'item': '总面数', 'value': pretty_number(total_polygons_accurate)},
-        ]
-        
-
-        
-        # 贴图统计
-        texture_stats = [
-            {'category': '🖼️ 贴图', 'item': '总贴图数', 'value': str(total_textures) + " 个"},
-            {'category': '🖼️ 贴图', 'item': '总内存', 'value': format_memory_size(total_texture_size)},
-            {'category': '🖼️ 贴图', 'item': '尺寸范围', 'value': format_size_range(total_max_size, total_min_size)},
-        ]
-        
 
-        
-        # 添加贴图类型统计
-        if texture_types:
-            type_stats = {}
-            for type_name in texture_types:
-                if type_name in type_stats:
-                    type_stats[type_name] += 1
-                else:
-                    type_stats[type_name] = 1
-            
-            for type_name, count in type_stats.items():
-                # 翻译贴图类型为中文
-                translated_type = type_name
-                translated_type = translated_type.replace('TextureType.', '')
-                translated_type = translated_type.replace('Texture2D', '2D贴图')
-                translated_type = translated_type.replace('Texture3D', '3D贴图')
-                translated_type = translated_type.replace('TextureCube', '立方体贴图')
-                translated_type = translated_type.replace('Texture1D', '1D贴图')
-                translated_type = translated_type.replace('Texture1DArray', '1D贴图数组')
-                translated_type = translated_type.replace('Texture2DArray', '2D贴图数组')
-                translated_type = translated_type.replace('TextureCubeArray', '立方体贴图数组')
-                translated_type = translated_type.replace('Texture3DArray', '3D贴图数组')
-                
-                texture_stats.append({
-                    'category': '🖼️ 贴图', 
-                    'item': f' {translated_type}', 
-                    'value': f"{count} 个"
-                })
-        
 
-        
-        # 添加最大贴图的统计信息（排除深度缓冲区）
-        if largest_texture_info and largest_texture_id:
-            largest_name = get_resource_name(controller, largest_texture_id)
-            largest_format = rd.ResourceFormat(largest_texture_info.format).Name()
-            
-            # 只跳过明显的深度/模板缓冲区
-            if 'Depth' not in largest_format and 'Stencil' not in largest_format:
-                texture_stats.append({
-                    'category': '🖼️ 贴图', 
-                    'item': '最大贴图', 
-                    'value': f"{largest_name} ({largest_texture_info.width}×{largest_texture_info.height})"
-                })
-            else:
-                texture_stats.append({
-                    'category': '🖼️ 贴图', 
-                    'item': '最大贴图', 
-                    'value': "深度缓冲区 (已排除)"
-                })
-        
-        # 添加最小贴图的统计信息（排除渲染目标）
-        if smallest_found and smallest_texture_info and smallest_texture_id:
-            smallest_name = get_resource_name(controller, smallest_texture_id)
-            smallest_format = rd.ResourceFormat(smallest_texture_info.format).Name()
-            
-            # 只跳过明显的深度/模板缓冲区
-            if 'Depth' not in smallest_format and 'Stencil' not in smallest_format:
-                texture_stats.append({
-                    'category': '🖼️ 贴图', 
-                    'item': '最小贴图', 
-                    'value': f"{smallest_name} ({smallest_texture_info.width}×{smallest_texture_info.height})"
-                })
-            else:
-                texture_stats.append({
-                    'category': '🖼️ 贴图', 
-                    'item': '最小贴图', 
-                    'value': "深度缓冲区 (已排除)"
-                })
-        
 
-        
-        # 确保所有变量都有合理的默认值
-        if not largest_texture_info:
-            largest_texture_info = None
-        if not largest_texture_id:
-            largest_texture_id = None
-        
-        # 添加详细的尺寸分析说明
-        if total_max_size > 0:
-            if total_max_size >= 4096:
-                size_analysis.append("包含高分辨率贴图 (≥4K)")
-            if total_min_size <= 64:
-                size_analysis.append("包含小尺寸贴图 (≤64px)")
-            if total_max_size == total_min_size:
-                size_analysis.append("所有贴图尺寸一致")
-            else:
-                size_analysis.append("贴图尺寸多样化")
-            
-            # 分析最大贴图的详细信息（排除深度缓冲区）
-            if largest_texture_info and largest_texture_id:
-                largest_name = get_resource_name(controller, largest_texture_id)
-                largest_format = rd.ResourceFormat(largest_texture_info.format).Name()
-                
-                # 只跳过明显的深度/模板缓冲区
-                if 'Depth' not in largest_format and 'Stencil' not in largest_format:
-                    size_analysis.append(f"最大贴图: {largest_name} ({largest_texture_info.width}×{largest_texture_info.height}, {largest_format})")
-                    
-                    # 特殊尺寸分析
-                    if total_max_size == 5120:
-                        size_analysis.append("→ 5120×5120 (可能是5K纹理或特殊渲染目标)")
-                    elif total_max_size > 4096:
-                        size_analysis.append(f"→ {total_max_size}×{total_max_size} (超高分辨率)")
-                    elif total_max_size >= 2048:
-                        size_analysis.append(f"→ {total_max_size}×{total_max_size} (高分辨率)")
-                    
-                    # 添加最小贴图分析
-                    if smallest_found and smallest_texture_info and smallest_texture_id:
-                        smallest_name = get_resource_name(controller, smallest_texture_id)
-                        smallest_format = rd.ResourceFormat(smallest_texture_info.format).Name()
-                        if 'Depth' not in smallest_format and 'Stencil' not in smallest_format:
-                            size_analysis.append(f"最小贴图: {smallest_name} ({smallest_texture_info.width}×{smallest_texture_info.height}, {smallest_format})")
-                else:
-                    size_analysis.append("最大贴图: 深度缓冲区 (已排除)")
-        else:
-            size_analysis.append("无贴图数据")
-        
-        # 收集RenderDoc API的详细信息
-        renderdoc_api_info = {
-            'draw_calls': {
-                'total': total_draws,
-                'types': {},  # 暂时为空字典
-                'primitives': {}  # 暂时为空字典
-            },
-            'geometry': {
-                'vertices': total_vertices,
-                'instances': total_instances,
-                'polygons': total_polygons_accurate
-            },
-            'textures': {
-                'count': total_textures,
-                'memory': total_texture_size,
-                'size_range': f"{total_min_size}~{total_max_size}",
-                'largest': largest_texture_info
-            },
-            'performance': {
-                'gpu_time': total_time,
-                'passes': len(self.passes)
-            }
+    def toRaw(self, draws):
+        draw_index = {id(d): i for i, d in enumerate(draws)}
+        return {
+            'api_properties': self.api_properties,
+            'frame_stats': self.frame_stats,
+            'overview': self.overview.toRaw(),
+            'textures': sorted(int(resource_id) for resource_id in self.textures),
+            'texture_tips': self.texture_tips,
+            'draws': [d.toRaw() for d in draws],
+            'passes': [p.toRaw(draw_index) for p in self.passes],
         }
-        
-        # 计算性能评级
-        if total_polygons_accurate > 1000000:
-            complexity_rating = "高"
-        elif total_polygons_accurate > 500000:
-            complexity_rating = "中"
-        else:
-            complexity_rating = "低"
-        
-        # 性能统计
-        performance_stats = [
-            {'category': '⚡ 性能', 'item': '总绘制调用', 'value': str(total_draws) + " 次"},
-            {'category': '⚡ 性能', 'item': '总渲染时间', 'value': format_time_duration(total_time * 1000)},  # 转换为微秒
-            {'category': '⚡ 性能', 'item': '渲染Pass数', 'value': str(len(self.passes)) + " 个"},
-        ]
-        
-        # 输出所有统计数据，合并同类别单元格
-        all_stats = model_stats + texture_stats + performance_stats
-        current_category = None
-        category_counts = {}
-        
-        # 计算每个类别的行数
-        for stat in all_stats:
-            category = stat['category']
-            if category not in category_counts:
-                category_counts[category] = 0
-            category_counts[category] += 1
-        
-        # 输出表格行
-        for i, stat in enumerate(all_stats):
-            html_file.write('<tr>\n')
-            
-            # 如果是新类别的第一行，输出带rowspan的类别单元格
-            if stat['category'] != current_category:
-                current_category = stat['category']
-                rowspan = category_counts[current_category]
-                html_file.write('<td rowspan="%d" style="vertical-align: middle; background-color: #f8f9fa; font-weight: bold;">%s</td>\n' % (rowspan, stat['category']))
-            
-            html_file.write('<td>%s</td>\n' % stat['item'])
-            html_file.write('<td><strong>%s</strong></td>\n' % stat['value'])
-            html_file.write('</tr>\n')
-        
-        html_file.write('</tbody>\n')
-        html_file.write('</table>\n')
-        
-        html_file.write('</div>\n')
-        html_file.write('</div>\n')
-
-    def writeBindStats(self, html_file, label, item):
-        # TODO: add redundants
-        html_file.write('<tr><td>%s</td><td>%d</td><td>%d</td><td>%d</td></tr>\n' % (label, item.calls, item.sets, item.nulls))
-
-    def getUniqueStateName(self, passName, stateName):
-        if self.stateNameDict[stateName] == 1:
-            return stateName
-        return '%s_%s' % (passName, stateName)
-
-    def writeDAG(self, controller=None):
-        filename = g_assets_folder / 'dag.html' # TODO: ugly
-        markdown = open(filename, 'w', encoding='utf-8')
-        markdown.write(mermaid_head)
-        markdown.write('<div class="mermaid">\n')
-        markdown.write('flowchart LR\n')
-        pass_count = len(self.passes)
-
-        # subgraph
-        for i in range(0, pass_count):
-            p = self.passes[i]
-            pass_name = p.getName(controller) if controller else f"Pass{i}"
-            markdown.write('subgraph %s\n' % pass_name)
-
-            if True:
-                # set sort
-                states = list(p.stateNames)
-                state_count = len(states)
-                if state_count == 1:
-                    # no siblings
-                    markdown.write('%s\n' % (self.getUniqueStateName(pass_name, states[0])))
-                else:
-                    for j in range(0, state_count - 1):
-                        markdown.write('%s --> %s\n' % (self.getUniqueStateName(pass_name, states[j]), self.getUniqueStateName(pass_name, states[j+1])))
-            else:
-                state_count = len(p.states)
-                if state_count == 1:
-                    # no siblings
-                    markdown.write('%s\n' % (p.states[0].getUniqueName()))
-                else:
-                    for j in range(0, state_count - 1):
-                        markdown.write('%s --> %s\n' % (p.states[j].getUniqueName(), p.states[j+1].getUniqueName()))
-
-            markdown.write('end\n')
-
-            if i < pass_count - 1:
-                # connect neighboring passes, only valid in "flowchart"
-                next = self.passes[i+1]
-                next_name = next.getName(controller) if controller else f"Pass{i+1}"
-                markdown.write('%s -.-> %s\n' % (pass_name, next_name))
-        markdown.writelines('</div>\n\n')
-
-        # linear order
-        dag = set()
-        # markdown.write('<h1>PSO diagram</h1>\n')
-        # markdown.write('<div class="mermaid">\n')
-        # markdown.write('graph LR\n')
-
-        # state_count = len(g_states)
-
-        # for i in range(1, state_count):
-        #     src = g_states[i]
-        #     markdown.write('%s ==> %s\n' % (g_states[i-1].name, g_states[i].name))
-        #     for c in src.getFirstDraw().color_buffers:
-        #         if c == rd.ResourceId.Null():
-        #             continue
-        #         for j in range(i+1, state_count):
-        #             dst = g_states[j]
-        #             for t in dst.getFirstDraw().textures:
-        #                 if t == rd.ResourceId.Null():
-        #                     continue
-        #                 if c == t:
-        #                     # src.c becomes dst.t
-        #                     dag.add((src, dst, get_resource_name(controller, c)))
-
-        # # TODO: merge linear sort and topology sort
-        # for src, dst, c in dag:
-        #     markdown.write('%s -.->|%s| %s\n' % (src.name, c, dst.name))
-
-        # markdown.writelines('</div>\n\n')
-
-        markdown.close()
-
-    def writeAPIOverview(self, html_file, controller):
-        info = controller.GetFrameInfo()
-        stats = info.stats
-        if not stats.recorded:
-            return
-
-        html_file.write('<div class="api-overview">\n')
-        html_file.write('<h2>📊 API 概览</h2>\n')
-        
-        html_file.write('<div class="stats-section">\n')
-        html_file.write('<h3>🎯 绘制调用统计</h3>\n')
-        html_file.write('<table class="stats-table">\n')
-        html_file.write('<thead>\n')
-        html_file.write('<tr><th>类型</th><th>调用次数</th><th>实例化</th><th>间接</th></tr>\n')
-        html_file.write('</thead>\n')
-        html_file.write('<tbody>\n')
-        html_file.write('<tr><td>绘制</td><td>%d</td><td>%d</td><td>%d</td></tr>\n' % (stats.draws.calls, stats.draws.instanced, stats.draws.indirect))
-        html_file.write('<tr><td>分发</td><td>%d</td><td>0</td><td>%d</td></tr>\n' % (stats.dispatches.calls, stats.dispatches.indirect))
-        html_file.write('</tbody>\n')
-        html_file.write('</table>\n')
-        html_file.write('</div>\n')
-        
-        html_file.write('<div class="stats-section">\n')
-        html_file.write('<h3>📦 资源更新统计</h3>\n')
-        html_file.write('<table class="stats-table">\n')
-        html_file.write('<thead>\n')
-        html_file.write('<tr><th>调用次数</th><th>客户端写入</th><th>服务器写入</th></tr>\n')
-        html_file.write('</thead>\n')
-        html_file.write('<tbody>\n')
-        html_file.write('<tr><td>%d</td><td>%d</td><td>%d</td></tr>\n' % (stats.updates.calls, stats.updates.clients, stats.updates.servers))
-        html_file.write('</tbody>\n')
-        html_file.write('</table>\n')
-        html_file.write('</div>\n')
-        
-        html_file.write('<div class="stats-section">\n')
-        html_file.write('<h3>🔗 资源绑定统计</h3>\n')
-        html_file.write('<table class="stats-table">\n')
-        html_file.write('<thead>\n')
-        html_file.write('<tr><th>类型</th><th>调用次数</th><th>设置</th><th>空值</th></tr>\n')
-        html_file.write('</thead>\n')
-        html_file.write('<tbody>\n')
-        self.writeBindStats(html_file, '索引缓冲区绑定', stats.indices)
-        self.writeBindStats(html_file, '顶点缓冲区绑定', stats.vertices)
-        self.writeBindStats(html_file, '顶点布局绑定', stats.layouts)
-        self.writeBindStats(html_file, '混合状态绑定', stats.blends)
-        self.writeBindStats(html_file, '深度模板状态绑定', stats.depths)
-        self.writeBindStats(html_file, '光栅化状态绑定', stats.rasters)
-        self.writeBindStats(html_file, '输出合并和UAV绑定', stats.outputs)
-        html_file.write('</tbody>\n')
-        html_file.write('</table>\n')
-        html_file.write('</div>\n')
-        html_file.write('</div>\n')
-
-    def writeIndexHtml(self, html_file, controller):
-
-        pipelineTypes = [
-                "D3D11",
-                "D3D12",
-                "OpenGL",
-                "Vulkan",
-        ]
-        GPUVendors = [
-            "Unknown",
-            "ARM",
-            "AMD",
-            "Broadcom",
-            "Imagination",
-            "Intel",
-            "nVidia",
-            "Qualcomm",
-            "Verisilicon",
-            "Software",
-        ]
-
-        api_prop = controller.GetAPIProperties()
-
-        # Header
-        if config['MINIMALIST']:
-            html_file.write(html_minimalist_head)
-        else:
-            html_file.write(html_head)
-        html_file.write('<div style="display: flex; align-items: center; margin-bottom: 20px; background: linear-gradient(135deg, #ff6600, #ff8533); padding: 20px; border-radius: 12px; box-shadow: 0 4px 20px rgba(255,102,0,0.2);">\n')
-        # 复制logo文件到输出目录
-        # 使用assets文件夹中的logo文件
-        html_file.write('<img src="assets/logo.png" alt="Logo" style="height: 50px; margin-right: 15px; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); background: white; padding: 5px;" onerror="this.style.display=\'none\'; console.log(\'Logo加载失败: \' + this.src);">\n')
-        html_file.write('<div>\n')
-        html_file.write('<h1 style="margin: 0; color: white; font-size: 28px; font-weight: bold;">渲染医生</h1>\n')
-        html_file.write('<p style="margin: 5px 0 0 0; color: rgba(255,255,255,0.9); font-size: 14px;">图形渲染分析工具</p>\n')
-        html_file.write('</div>\n')
-        html_file.write('</div>\n')
-        html_file.write(' %s\n' % rdc_file)
-
-        # 主要内容区域
-        html_file.write('<div class="main-content">\n')
-        
-        # 1. 帧概览 - 美术资产分析
-        self.writeFrameOverview(html_file, controller)
-        
-        # 2. API概览
-        self.writeAPIOverview(html_file, controller)
-        
-        # 3. 资源概览
-        self.writeResourceOverview(html_file, controller)
-        
-
-
-        # 4. 着色器概览已取消
-        
-        # 5. 绘制概览
-        html_file.write('<div class="pass-section">\n')
-        html_file.write('<div class="pass-header">\n')
-        html_file.write('<div class="pass-title">🎯 绘制概览</div>\n')
-        html_file.write('<div class="pass-stats">\n')
-        html_file.write('<span class="stat-item">📊 总Pass数: %d</span>\n' % len(self.passes))
-        html_file.write('</div>\n')
-        html_file.write('</div>\n')
-        html_file.write('<div class="pass-content-area">\n')
-        
-        # 创建表格容器
-        html_file.write('<table class="pass-table">\n')
-        html_file.write('<tbody>\n')
-        
-        # 遍历所有Pass并显示详细信息
-        for i, p in enumerate(self.passes):
-            html_file.write('<tr>\n')
-            html_file.write('<td class="pass-detail-cell">\n')
-            
-            # 显示Pass标题
-            html_file.write('<div class="pass-detail-header">\n')
-            html_file.write('<div class="pass-detail-title">Pass%d</div>\n' % (i + 1))
-            html_file.write('</div>\n')
-            
-            # 显示Pass的详细信息（保持原有的writeIndexHtml调用）
-            p.writeIndexHtml(html_file, controller)
-            
-            html_file.write('</td>\n')
-            html_file.write('</tr>\n')
-        
-        html_file.write('</tbody>\n')
-        html_file.write('</table>\n')
-        
-        html_file.write('</div>\n')
-        html_file.write('</div>\n')
-        
-
-
-        html_file.write('</div>\n')  # main-content
-
-        if not config['MINIMALIST']:
-            html_file.write('<div class="usage-section">\n')
-            html_file.write('<h2>📖 使用说明</h2>\n')
-            html_file.write('<ul>\n')
-            html_file.write('<li>按 <code>p</code> / <code>shift+p</code> 在通道间跳转</li>\n')
-            html_file.write('<li>按 <code>s</code> / <code>shift+s</code> 在状态间跳转</li>\n')
-            html_file.write('<li>按 <code>d</code> / <code>shift+d</code> 在绘制调用间跳转</li>\n')
-            html_file.write('</ul>\n')
-            html_file.write('</div>\n')
-
-            html_file.write('<div class="summary-section">\n')
-            html_file.write('<h2>📋 总结</h2>\n')
-            if config['WRITE_PSO_DAG']:
-                html_file.write('<p>• 实验功能 <a href="assets/dag.html">管道图</a></p>\n')
-            html_file.write('<p>• RDC: %s</p>\n' % rdc_file)
-            html_file.write('<p>• API: %s</p>\n' % pipelineTypes[api_prop.pipelineType])
-            html_file.write('<p>• GPU: %s</p>\n' % GPUVendors[api_prop.vendor])
-            html_file.write('</div>\n')
-
-# Config section hidden
-
 
 
+    @g_profiler.wrap()
+    def assignStates(self, draws):
+        # split every pass into states once pipelines are collected, the state of a draw
+        # is only known after replaying it
+        current_pass = None
+        for d in draws:
+            if d.pass_ is not current_pass:
+                current_pass = d.pass_
+                Pass.current = current_pass
+                State.current = State.default
+
+            for ev in d.api_events:
+                State.current.addEvent(ev)
+            if config['WRITE_PIPELINE'] and d.state_key != State.current.getName():
+                # detects a PSO change
+                Pass.current.addState(d)
+            State.current.addDraw(d)
 
-        html_file.write('\n</body>\n</html>')
+        for ev in g_pending_events:
+            State.current.addEvent(ev)
+        del g_pending_events[:]
 
-        if config['WRITE_PSO_DAG']:
-            try:
-                self.writeDAG()
-            except Exception as e:
-                print(f"Warning: writeDAG failed: {e}")
+    def scheduleExports(self, scheduler):
+        for p in self.passes:
+            p.scheduleExports(scheduler)
 
+    @g_profiler.wrap()
     def exportResources(self, controller):
-        print('^exportResources')
+        g_log.info('export', '^exportResources')
         
         # 复制logo文件到输出目录
         try:
             import shutil
             from pathlib import Path
             
-            # 使用固定的D盘项目路径
-            logo_src = Path(r'D:\render-doctor\src\logo.png')
+            # 脚本目录下的src
+            logo_src = g_script_folder / 'src' / 'logo.png'
             logo_dst = g_assets_folder / 'logo.png'
             
             if logo_src.exists():
                 shutil.copy2(logo_src, logo_dst)
-                print(f"✅ Logo已复制到: {logo_dst}")
+                g_log.debug('export', '✅ Logo已复制到: %s', logo_dst)
             else:
-                print(f"⚠️ 无法找到logo文件: {logo_src}")
+                g_log.warning('export', '⚠️ 无法找到logo文件: %s', logo_src)
                     
         except Exception as e:
-            print(f"❌ 复制logo文件失败: {e}")
+            g_log.warning('export', '❌ 复制logo文件失败: %s', e)
         
-        for p in self.passes:
-            p.exportResources(controller)
-        print('$exportResources')
+        if not config['WRITE_ALL_DRAWS']:
+            # only a few draws per state are exported, so these have to wait for assignStates(),
+            # a second ascending sweep costs one more replay of the frame, see README.md
+            scheduler = ReplayScheduler()
+            self.scheduleExports(scheduler)
+            scheduler.run(controller)
+        g_log.info('export', '$exportResources')
 
 g_frame = Frame()
 
@@ -4070,9 +3612,6 @@ class Resource:
 g_assets_folder = None
 g_output_folder = None
 
-def get_resource_filename(name, ext = 'txt'):
-    return '%s.%s' % (name, ext)
-
 def link_to_file(resource_name, file_name):
     return '[%s](%s)' % (resource_name, file_name)
 
@@ -4100,7 +3639,7 @@ def setup_rdc(filename, adb_mode = None):
         dev = devices[0]
         name = protocol.GetFriendlyName(dev)
 
-        print(f"Running test on {dev} - named {name}")
+        g_log.info('main', 'Running test on %s - named %s', dev, name)
 
         URL = protocol.GetProtocolName() + "://" + dev
 
@@ -4109,8 +3648,8 @@ def setup_rdc(filename, adb_mode = None):
     cap = rd.OpenCaptureFile()
 
     # Open a particular file - see also OpenBuffer to load from memory
-    status = cap.OpenFile(rdc_file, '', None)
-    print("cap.OpenFile")
+    status = cap.OpenFile(filename, '', None)
+    g_log.info('main', 'cap.OpenFile')
 
     # Make sure the file opened successfully
     if status != rd.ReplayStatus.Succeeded:
@@ -4122,7 +3661,7 @@ def setup_rdc(filename, adb_mode = None):
 
     # Initialise the replay
     status,controller = cap.OpenCapture(rd.ReplayOptions(), None)
-    print("cap.OpenCapture")
+    g_log.info('main', 'cap.OpenCapture')
 
     if status != rd.ReplayStatus.Succeeded:
         raise RuntimeError("Couldn't initialise replay: " + rd.ReplayStatus(status).name)
@@ -4147,7 +3686,30 @@ def get_marker_name():
         return name
     return ''
 
-# Define a recursive function for iterating over draws
+class ReplayScheduler:
+    # collects per-event jobs, then replays every event once, in ascending order
+    # so the replay never seeks backwards or repeats an event
+    def __init__(self):
+        self.jobs = defaultdict(list)
+
+    def add(self, event_id, job):
+        self.jobs[event_id].append(job)
+
+    def run(self, controller):
+        event_ids = sorted(self.jobs)
+        for i, event_id in enumerate(event_ids):
+            g_log.progress('replay', i + 1, len(event_ids))
+            # per draw cost, see profile.html
+            with g_profiler.span('event', 'draw', event_id):
+                controller.SetFrameEvent(event_id, False)
+                for job in self.jobs[event_id]:
+                    try:
+                        job(controller)
+                    except Exception as e:
+                        g_log.exception('replay', 'Error replaying event %d: %s', event_id, e)
+        self.jobs.clear()
+
+# Define a recursive function for iterating over draws, no replay happens here
 def visit_action(controller, draw, level = 0):
     # hack level
     global g_markers, g_next_draw_will_add_state
@@ -4164,7 +3726,8 @@ def visit_action(controller, draw, level = 0):
         # api before this draw & including this draw
         for ev in draw.events:
             new_event = Event(controller, ev, level)
-            State.current.addEvent(new_event)
+            g_events.append(new_event)
+            g_pending_events.append(new_event)
 
         if draw.flags & rd.ActionFlags.Drawcall \
             or draw.flags & rd.ActionFlags.Dispatch \
@@ -4176,14 +3739,18 @@ def visit_action(controller, draw, level = 0):
             if g_next_draw_will_add_state:
                 # and check duplicated binds...
                 g_next_draw_will_add_state = False
-                prev_draw = State.current.getLastDraw()
+                prev_draw = Pass.current.draws[-1] if Pass.current.draws else None
                 if not prev_draw:
                     g_frame.addPass()
                 elif not new_draw.sharesState(prev_draw):
                     g_frame.addPass()
 
-            new_draw.collectPipeline(controller)
-            State.current.addDraw(new_draw)
+            new_draw.pass_ = Pass.current
+            new_draw.api_events = g_pending_events[:]
+            del g_pending_events[:]
+            Pass.current.draws.append(new_draw)
+            g_draws.append(new_draw)
+            g_frame.overview.addDraw(new_draw.draw_desc, new_draw.gpu_duration)
         elif draw.flags & rd.ActionFlags.PushMarker:
             # regime call, skip for now
             # TODO: leverate getSafeName()
@@ -4201,179 +3768,325 @@ def visit_action(controller, draw, level = 0):
             try:
                 visit_action(controller, child_draw, level + 1)
             except Exception as e:
-                print(f"Debug: Error processing child {i+1}/{len(draw.children)}: {e}")
-                import traceback
-                traceback.print_exc()
+                g_log.exception('replay', 'Error processing child %d/%d: %s', i+1, len(draw.children), e)
                 continue
     except Exception as e:
-        print(f"Debug: Error iterating draw children: {e}")
-        import traceback
-        traceback.print_exc()
+        g_log.exception('replay', 'Error iterating draw children: %s', e)
 
     if needsPopMarker:
         g_markers.pop()
 
     return True
 
-def get_texture_info(controller, resource_id):
-    # struct TextureDescription
-    if resource_id == rd.ResourceId.Null():
-        return None
+# ActionDescription fields kept in the snapshot, the frame overview reads them
+DRAW_DESC_FIELDS = ('numVertices', 'numIndices', 'numInstances')
+
+# FrameStatistics groups shown in the API overview
+BIND_STATS_FIELDS = ('calls', 'sets', 'nulls')
+FRAME_STATS_FIELDS = OrderedDict([
+    ('draws', ('calls', 'instanced', 'indirect')),
+    ('dispatches', ('calls', 'indirect')),
+    ('updates', ('calls', 'clients', 'servers')),
+    ('indices', BIND_STATS_FIELDS),
+    ('vertices', BIND_STATS_FIELDS),
+    ('layouts', BIND_STATS_FIELDS),
+    ('blends', BIND_STATS_FIELDS),
+    ('depths', BIND_STATS_FIELDS),
+    ('rasters', BIND_STATS_FIELDS),
+    ('outputs', BIND_STATS_FIELDS),
+])
+
+def texture_to_raw(texture_info):
+    fmt = texture_info.format
+    return {
+        'width': texture_info.width,
+        'height': texture_info.height,
+        'depth': texture_info.depth,
+        'arraysize': texture_info.arraysize,
+        'mips': texture_info.mips,
+        'type': rd.TextureType(texture_info.type).name,
+        'creationFlags': int(texture_info.creationFlags),
+        'usage': [c.name for c in rd.TextureCategory if c.value and texture_info.creationFlags & c],
+        'byteSize': texture_info.byteSize,
+        'format': {
+            'name': rd.ResourceFormat(fmt).Name(),
+            'type': int(fmt.type),
+            'compType': int(fmt.compType),
+            'compCount': fmt.compCount,
+            'compByteWidth': fmt.compByteWidth,
+        },
+    }
+
+class ResourceCatalog(report.ResourceCatalog):
+    # ResourceId -> texture/buffer description and resolved names, built once per capture
+    # so lookups inside per-draw loops are a dict access instead of a list scan
+    def __init__(self, controller):
+        super().__init__()
+
+        # struct TextureDescription
+        for tex in controller.GetTextures():
+            self.textures[tex.resourceId] = tex
+
+        # struct BufferDescription
+        for buf in controller.GetBuffers():
+            self.buffers[buf.resourceId] = buf
+
+        # struct ResourceDescription, duplicated names get a _%d suffix
+        name_count = {}
+        for res in controller.GetResources():
+            name = res.name
+            count = 0
+            if name in name_count:
+                name_count[name] += 1
+                count = name_count[name]
+            else:
+                name_count[name] = count
+
+            safe_name = getSafeName(name) if name else 'res_%d' % int(res.resourceId)
+            if count > 0:
+                name = '%s_%d' % (name, count)
+                safe_name = '%s_%d' % (safe_name, count)
+            self.names[res.resourceId] = name
+            self.safe_names[res.resourceId] = safe_name
+
+    def toRaw(self):
+        # buffers are not part of the report
+        return {
+            'textures': {str(int(k)): texture_to_raw(v) for k, v in self.textures.items()},
+            'names': {str(int(k)): v for k, v in self.names.items()},
+            'safe_names': {str(int(k)): v for k, v in self.safe_names.items()},
+        }
 
-    textures = controller.GetTextures()
-    for res in textures:
-        if resource_id == res.resourceId:
-            return res
+g_resource_catalog = None
 
-    return None
+def get_resource_catalog(controller):
+    global g_resource_catalog
+    if not g_resource_catalog:
+        g_resource_catalog = ResourceCatalog(controller)
+    return g_resource_catalog
 
-resource_name_count = {}
-resource_name_dict = {}
+def get_texture_info(controller, resource_id):
+    # struct TextureDescription
+    return get_resource_catalog(controller).getTexture(resource_id)
 
 def get_resource_name(controller, resource_id, get_safe_name = True):
-    if resource_id == rd.ResourceId.Null():
-        return "NULL"
-
-    if resource_id not in resource_name_dict:
-        resource_name_dict[resource_id] = 'res_%d' % int(resource_id)
-
-        resources = controller.GetResources()
-        for res in resources:
-            if resource_id == res.resourceId:
-                name = res.name
-                count = 0
-                if name in resource_name_count:
-                    resource_name_count[name] += 1
-                    count = resource_name_count[name]
-                else:
-                    resource_name_count[name] = count
-
-                if get_safe_name:
-                    name = getSafeName(res.name)
-                else:
-                    name = res.name
-
-                if count > 0:
-                    name = '%s_%d' % (name, count)
-                resource_name_dict[resource_id] = name
-
-    return resource_name_dict[resource_id]
-
+    return get_resource_catalog(controller).getName(resource_id, get_safe_name)
+
+@g_profiler.wrap(cat='io')
+def save_raw_data(controller, file_name):
+    # everything generate_viz needs, so the report can be rebuilt without a replay
+    raw = OrderedDict()
+    raw['version'] = RAW_DATA_VERSION
+    raw['rdc_file'] = str(rdc_file)
+    raw['api_type'] = int(API_TYPE)
+    raw['cbuffer_stats'] = {'hits': g_cbuffer_cache.hits, 'misses': g_cbuffer_cache.misses, 'uncached': g_cbuffer_cache.uncached}
+    raw['catalog'] = get_resource_catalog(controller).toRaw()
+    raw['frame'] = g_frame.toRaw(g_draws)
+
+    with open(file_name, 'w', encoding='utf-8') as f:
+        json.dump(raw, f)
+    g_log.info('main', 'raw data saved to %s', file_name)
+
+@g_profiler.wrap()
 def generate_raw_data(controller):
-    print('^generate_raw_data')
+    g_log.info('main', '^generate_raw_data')
     try:
         # Start iterating from the first real draw as a child of markers
         # draw type = ActionDescription
         global API_TYPE
         api_prop = controller.GetAPIProperties()
         API_TYPE = api_prop.pipelineType
-        print('API_TYPE', API_TYPE)
+        g_log.info('main', 'API_TYPE %s', API_TYPE)
 
         actions = controller.GetRootActions()
-        print(f"Debug: Found {len(actions)} root actions")
+        g_log.info('replay', 'Found %d root actions', len(actions))
         
-        # Iterate over all of the root drawcalls
-        for i, d in enumerate(actions):
-            try:
-                print(f"Debug: Processing action {i+1}/{len(actions)}: {d.GetName(sdfile)}")
-                visit_action(controller, d)
-            except Exception as e:
-                print(f"Debug: Error processing action {i+1}: {e}")
-                import traceback
-                traceback.print_exc()
-                continue
+        # phase 1: walk all of the root drawcalls, cheap and replay-free
+        with g_profiler.span('visit_action'):
+            for i, d in enumerate(actions):
+                try:
+                    g_log.debug('replay', 'Processing action %d/%d: %s', i+1, len(actions), d.GetName(sdfile))
+                    g_log.progress('visit_action', i + 1, len(actions))
+                    visit_action(controller, d)
+                except Exception as e:
+                    g_log.exception('replay', 'Error processing action %d: %s', i+1, e)
+                    continue
 
-        print('$generate_raw_data')
+        # phase 2: one replay sweep, pipeline state and exports are gathered at the same stop
+        scheduler = ReplayScheduler()
+        for d in g_draws:
+            if d.needsPipeline():
+                scheduler.add(d.event_id, d.collectPipeline)
+            if config['WRITE_ALL_DRAWS'] and d.needsExport():
+                scheduler.add(d.event_id, d.exportResources)
+        scheduler.run(controller)
+
+        g_frame.assignStates(g_draws)
+        g_cbuffer_writer.start(g_assets_folder)
+        g_frame.exportResources(controller)
+        g_frame.collectTextureTips(controller)
+        g_frame.collectFrameInfo(controller)
+        g_frame.overview.finish(get_resource_catalog(controller))
+
+        save_raw_data(controller, g_assets_folder / RAW_DATA_FILE)
+
+        g_log.info('main', '$generate_raw_data')
     except Exception as e:
-        print(f"Debug: Error in generate_raw_data: {e}")
-        import traceback
-        traceback.print_exc()
+        g_log.exception('main', 'Error in generate_raw_data: %s', e)
 
+@g_profiler.wrap()
 def generate_derived_data(controller):
 
-    print('^generate_derived_data')
-
-    print('$generate_derived_data')
-
+    g_log.info('main', '^generate_derived_data')
 
-def generate_viz(controller): 
-    print('^generate_viz')
-    g_frame.writeIndexHtml(index_html, controller)
+    g_log.info('main', '$generate_derived_data')
 
-    if not config['MINIMALIST']:
-        for p in g_frame.passes:
-            p.writeDetailHtml(index_html, controller)
 
-    g_frame.exportResources(controller)
-    print('$generate_viz')
-    print("%s\n" % (report_name))
+@g_profiler.wrap()
+def generate_viz(raw_data_file):
+    # only reads the snapshot written by generate_raw_data, never the controller
+    global report_name
 
-def print_var(v, indent = '', shader_name = '', setup_shader_doctor = False):
+    g_log.info('main', '^generate_viz')
+    report_name = report.generate_report(raw_data_file)
+
+    g_log.info('main', 'ResourceCatalog: %s', g_resource_catalog.getSummary())
+    g_log.info('main', 'PipelineCache: %s', g_pipeline_cache.getSummary())
+    g_log.info('main', 'CBufferCache: %s', g_cbuffer_cache.getSummary())
+    g_thumbnails.join()
+    g_log.info('main', 'ThumbnailPipeline: %s', g_thumbnails.getSummary())
+    g_malioc.join()
+    g_log.info('main', 'MaliocScheduler: %s', g_malioc.getSummary())
+    g_log.info('main', 'ShaderDatabase: %s', g_shader_db.getSummary())
+    g_shader_db.close()
+    g_asset_store.save(g_assets_folder)
+    g_log.info('main', 'AssetStore: %s', g_asset_store.getSummary())
+    g_log.info('main', 'TargetDeltas: %s', g_target_deltas.getSummary())
+    g_cbuffer_writer.join()
+    g_log.info('main', '$generate_viz')
+    g_log.info('main', '%s', report_name)
+
+def print_var(v, indent = ''):
+    fragments = []
+    append_var(fragments, v, indent)
+    return ''.join(fragments)
+
+def append_var(fragments, v, indent = ''):
     # TODO: ugly
     if '[' in v.name or ']' in v.name:
         # v is a row of a matrix
-        valstr = ''
         indent = ''
     else:
-        if setup_shader_doctor:
-            g_frame.shaders[shader_name]['uniforms'][v.name] = {
-                'used': False
-            }
-        valstr = indent + v.name + "\n"
+        fragments.append(indent + v.name + "\n")
 
     if len(v.members) == 0:
         # leaf node
         for r in range(0, v.rows):
-            valstr += indent + '  '
+            fragments.append(indent + '  ')
 
             for c in range(0, v.columns):
                 index = r*v.columns + c
                 if v.type == rd.VarType.Float:
                     if index < len(v.value.f32v):
-                        valstr += '%.3f ' % v.value.f32v[index]
+                        fragments.append('%.3f ' % v.value.f32v[index])
                     else:
-                        print(f"Debug: Unity CBuffer - Index {index} out of range for f32v (length: {len(v.value.f32v)})")
-                        print(f"Debug: Variable name: {v.name}, Type: {v.type}, Rows: {v.rows}, Columns: {v.columns}")
-                        valstr += 'N/A '
+                        g_log.debug('pipeline', 'Unity CBuffer - Index %d out of range for f32v (length: %d)', index, len(v.value.f32v))
+                        g_log.debug('pipeline', 'Variable name: %s, Type: %s, Rows: %d, Columns: %d', v.name, v.type, v.rows, v.columns)
+                        fragments.append('N/A ')
                 elif v.type == rd.VarType.Double:
                     if index < len(v.value.f64v):
-                        valstr += '%.3g ' % v.value.f64v[index]
+                        fragments.append('%.3g ' % v.value.f64v[index])
                     else:
-                        valstr += 'N/A '
+                        fragments.append('N/A ')
                 elif v.type == rd.VarType.SInt:
                     if index < len(v.value.s32v):
-                        valstr += '%d ' % v.value.s32v[index]
+                        fragments.append('%d ' % v.value.s32v[index])
                     else:
-                        valstr += 'N/A '
+                        fragments.append('N/A ')
                 elif v.type == rd.VarType.UInt:
                     if index < len(v.value.u32v):
-                        valstr += '%d ' % v.value.u32v[index]
+                        fragments.append('%d ' % v.value.u32v[index])
                     else:
-                        valstr += 'N/A '
+                        fragments.append('N/A ')
 
             if r < v.rows-1:
-                valstr += "\n"
+                fragments.append("\n")
 
     for member in v.members:
-        valstr += print_var(member, indent + '    ')
+        append_var(fragments, member, indent + '    ')
+
+    fragments.append('\n')
+
+g_cbuffer_new_api = None # GetCBufferVariableContents() signature changed in 1.17
+
+def fetch_cbuffer_variables(controller, pipeline, shader, stage, entry, slot, cb):
+    global g_cbuffer_new_api
+    if g_cbuffer_new_api is None:
+        from distutils.version import LooseVersion
+        g_cbuffer_new_api = LooseVersion(rd.GetVersionString()) >= LooseVersion('1.17')
 
-    valstr += '\n'
+    if g_cbuffer_new_api:
+        return controller.GetCBufferVariableContents(pipeline, shader, stage, entry,
+                                                     slot, cb.resourceId, cb.byteOffset, cb.byteSize)
+    return controller.GetCBufferVariableContents(pipeline, shader, entry, slot,
+                                                 cb.resourceId, cb.byteOffset, cb.byteSize)
 
-    return valstr
+class CBufferCache:
+    # most draws re-bind the same constant data, so decoded variables are keyed by the raw bytes
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+    def getKey(self, controller, shader, entry, slot, cb):
+        if cb.resourceId == rd.ResourceId.Null():
+            # e.g. GL default uniform block, there are no bytes to hash
+            return None
+        data = controller.GetBufferData(cb.resourceId, cb.byteOffset, cb.byteSize)
+        return (shader, entry, slot, cb.resourceId, cb.byteOffset, cb.byteSize, hashlib.md5(data).digest())
+
+    def fetch(self, controller, pipeline, shader, stage, entry, slot, cb):
+        # returns (variables, text)
+        key = self.getKey(controller, shader, entry, slot, cb)
+        if key is not None:
+            entry_value = self.entries.get(key)
+            if entry_value is not None:
+                self.hits += 1
+                return entry_value
+
+        cbufferVars = fetch_cbuffer_variables(controller, pipeline, shader, stage, entry, slot, cb)
+        fragments = []
+        for v in cbufferVars:
+            append_var(fragments, v)
+        entry_value = (cbufferVars, ''.join(fragments))
+
+        if key is None:
+            self.uncached += 1
+        else:
+            self.misses += 1
+            self.entries[key] = entry_value
+        return entry_value
+
+    def getSummary(self):
+        return 'saved fetches %d, fetched %d, uncached %d' % (self.hits, self.misses, self.uncached)
+
+g_cbuffer_cache = CBufferCache()
 
 def get_cbuffer_contents(controller, stage, shader_name, refl, program_name):
     pipe = controller.GetPipelineState()
 
-    contents = ''
+    contents = []
 
     api_state = pipe.GetGraphicsPipelineObject()
     if stage == rd.ShaderStage.Compute:
         api_state = pipe.GetComputePipelineObject()
 
     shader = pipe.GetShader(stage)
+    entry = pipe.GetShaderEntryPoint(stage)
 
     setup_shader_doctor = False
-    if shader not in g_frame.shaders:
+    if shader_name not in g_frame.shaders:
         setup_shader_doctor = True
         g_frame.shaders[shader_name] = {
             'state': program_name,
@@ -4384,36 +4097,37 @@ def get_cbuffer_contents(controller, stage, shader_name, refl, program_name):
     if API_TYPE != rd.GraphicsAPI.OpenGL:
         setup_shader_doctor = False
 
+    if setup_shader_doctor:
+        uniforms = g_shader_db.getUniforms(get_shader_hash(refl))
+        if uniforms is not None:
+            # usage was worked out by an earlier capture
+            g_frame.shaders[shader_name]['uniforms'] = uniforms
+            setup_shader_doctor = False
+
     for slot in range(0, 4):
         try:
             if hasattr(pipe, 'GetConstantBuffer'):
                 cb = pipe.GetConstantBuffer(stage, slot, 0)
             else:
-                print(f"Debug: PipeState object has no GetConstantBuffer method")
+                g_log.warning('pipeline', 'PipeState object has no GetConstantBuffer method')
                 break
         except Exception as e:
-            print(f"Debug: Error getting constant buffer for stage {stage}, slot {slot}: {e}")
+            g_log.debug('pipeline', 'Error getting constant buffer for stage %s, slot %d: %s', stage, slot, e)
             break
 
-        ver = rd.GetVersionString()
-        from distutils.version import LooseVersion
-        if LooseVersion(ver) >= LooseVersion('1.17'):
-            cbufferVars = controller.GetCBufferVariableContents(api_state, pipe.GetShader(stage),
-                                                                stage, pipe.GetShaderEntryPoint(stage),
-                                                                slot, cb.resourceId,
-                                                                cb.byteOffset, cb.byteSize)
-        else:
-            cbufferVars = controller.GetCBufferVariableContents(api_state,
-                                                                pipe.GetShader(stage),
-                                                                pipe.GetShaderEntryPoint(stage), slot,
-                                                                cb.resourceId, cb.byteOffset, cb.byteSize)
+        cbufferVars, text = g_cbuffer_cache.fetch(controller, api_state, shader, stage, entry, slot, cb)
 
         if not cbufferVars:
             break
 
-        for v in cbufferVars:
-            contents += print_var(v, shader_name = shader_name, setup_shader_doctor = setup_shader_doctor)
-        contents += '\n----------------------------------\n'
+        if setup_shader_doctor:
+            for v in cbufferVars:
+                if '[' not in v.name and ']' not in v.name:
+                    g_frame.shaders[shader_name]['uniforms'][v.name] = {
+                        'used': False
+                    }
+        contents.append(text)
+        contents.append('\n----------------------------------\n')
 
     if setup_shader_doctor:
         rawBytes = str(refl.rawBytes, 'utf-8')
@@ -4421,9 +4135,65 @@ def get_cbuffer_contents(controller, stage, shader_name, refl, program_name):
             if rawBytes.count(k) > 1:
                 # uniform definition itself cost one occurence
                 v['used'] = True
+        g_shader_db.update(get_shader_hash(refl), uniforms=json.dumps(g_frame.shaders[shader_name]['uniforms'], sort_keys=True))
 
-    return contents
+    return ''.join(contents)
 
+CBUFFER_PAGE_HEAD = PAGE_HEAD_TEMPLATE % {'title': 'Constant Buffer Analysis', 'prefix': '', 'extra': '', 'body_class': 'cb-page'}
+
+class CBufferWriter:
+    # const_buffer pages are collected per draw, draws with identical contents share one page,
+    # and all pages are written on a background thread while the report is generated
+    def __init__(self):
+        self.pages = OrderedDict() # stage contents -> draw ids
+        self.thread = None
+
+    def add(self, draw_id, stage_contents):
+        key = tuple(stage_contents)
+        draw_ids = self.pages.get(key)
+        if draw_ids is None:
+            draw_ids = []
+            self.pages[key] = draw_ids
+        draw_ids.append(draw_id)
+        return 'const_buffer--%04d' % draw_ids[0]
+
+    def start(self, assets_folder):
+        pages = list(self.pages.items())
+        self.pages = OrderedDict()
+        self.thread = threading.Thread(target=self.writePages, args=(assets_folder, pages))
+        self.thread.start()
+
+    def join(self):
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def writePages(self, assets_folder, pages):
+        for stage_contents, draw_ids in pages:
+            resource_name = 'const_buffer--%04d' % draw_ids[0]
+            file_name = assets_folder / get_resource_filename(resource_name, 'html')
+            try:
+                self.writePage(file_name, stage_contents, draw_ids)
+            except Exception as e:
+                g_log.warning('pipeline', 'Error writing %s: %s', file_name, e)
+        g_log.info('pipeline', 'CBufferWriter wrote %d pages', len(pages))
+
+    def writePage(self, file_name, stage_contents, draw_ids):
+        page = HtmlBuffer()
+        page.write(CBUFFER_PAGE_HEAD)
+        page.write('<div class="cb-header">\n<h1>📊 Constant Buffer Analysis</h1>\n<p>Draw ID: %s</p>\n</div>\n' % ', '.join('%04d' % draw_id for draw_id in draw_ids))
+
+        for s, contents in enumerate(stage_contents):
+            if contents:
+                page.write('<div class="cb-section">\n<h2>🎯 %s Shader</h2>\n<div class="cb-code">\n<pre>%s</pre>\n</div>\n</div>\n' % (ShaderStage(s).name, contents))
+
+        page.write('</body>\n</html>')
+        with g_profiler.span('write_cbuffer_page', 'io'):
+            page.save(file_name)
+
+g_cbuffer_writer = CBufferWriter()
+
+@g_profiler.wrap()
 def fetch_gpu_counters(controller):
     global g_draw_durations
     counter_type = rd.GPUCounter.EventGPUDuration
@@ -4442,45 +4212,39 @@ def fetch_gpu_counters(controller):
 
 def rdc_main(controller):
     global g_assets_folder
-    global report_name
-    global index_html
     global api_full_log, api_short_log
-    global config
     global sdfile
+    global g_resource_catalog
 
-    sdfile = controller.GetStructuredFile()
-
-    config_json = Path(os.getenv('APPDATA'), 'rd.json')
+    load_config()
+    g_log.configure(config)
+    g_log.open(g_assets_folder / RUN_LOG_FILE)
+    g_log.info('main', '=== rd.py %s', rdc_file)
+    if config.get('WRITE_PROFILE', True):
+        g_profiler.start(config.get('PROFILE_MAX_EVENTS', 500000))
+        controller = ProfiledController(controller, g_profiler)
 
-    try:
-        with open(config_json) as f:
-            config = json.load(f)
-    except Exception as e:
-        with open(config_json, 'w', encoding='utf-8') as f:
-            f.write(json.dumps(config, indent=4))
+    sdfile = controller.GetStructuredFile()
+    g_resource_catalog = ResourceCatalog(controller)
+    g_asset_store.load(g_assets_folder)
 
     try:
         api_full_log = open(g_assets_folder / 'api_full.txt',"w", encoding='utf-8')
         api_short_log = open(g_assets_folder / 'api_short.txt',"w", encoding='utf-8')
 
-        report_name = g_output_folder / 'index.html'
-
         fetch_gpu_counters(controller)
         generate_raw_data(controller)
         generate_derived_data(controller)
-
-        index_html = open(report_name,"w", encoding='utf-8')
-        try:
-            generate_viz(controller)
-        finally:
-            index_html.close()
+        generate_viz(g_assets_folder / RAW_DATA_FILE)
+        if g_profiler.enabled:
+            g_profiler.save(g_assets_folder, {d.event_id: d.name for d in g_draws})
 
         api_full_log.close()
         api_short_log.close()
     except Exception as e:
-        print(f"Error in rdc_main: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        g_log.exception('main', 'Error in rdc_main: %s', e)
+    g_log.info('main', 'Logger: %s', g_log.getSummary())
+    g_log.close()
 
 def shutdown_rdc(cap, controller):
     controller.Shutdown()
@@ -4489,7 +4253,7 @@ def shutdown_rdc(cap, controller):
 
 if 'pyrenderdoc' in globals():
     rdc_file = pyrenderdoc.GetCaptureFilename()
-    absolute = WindowsPath(rdc_file).absolute()
+    absolute = Path(rdc_file).absolute()
     # index.html放在外面，其他文件放在assets子文件夹
     g_output_folder = absolute.parent / absolute.stem
     g_assets_folder = g_output_folder / 'assets'
@@ -4501,10 +4265,10 @@ if 'pyrenderdoc' in globals():
     g_assets_folder.mkdir(parents=True, exist_ok=True)
 
     pyrenderdoc.Replay().BlockInvoke(rdc_main)
-else:
+elif __name__ == '__main__':
     if len(sys.argv) > 1:
         rdc_file = sys.argv[1]
-    absolute = WindowsPath(rdc_file).absolute()
+    absolute = Path(rdc_file).absolute()
     # index.html放在外面，其他文件放在assets子文件夹
     g_output_folder = absolute.parent / absolute.stem
     g_assets_folder = g_output_folder / 'assets'
@@ -0,0 +1,2391 @@
+# render-doctor report writer
+# rebuilds index.html, the per-state pages, dag.html and summary.csv from assets/raw_data.json
+# written by rd.py, renderdoc is not needed here:
+#   python rd_report.py <report folder>/assets/raw_data.json
+
+import gc
+import os
+import sys
+import time
+import csv
+import json
+import threading
+from pathlib import Path
+from collections import defaultdict, OrderedDict
+from types import SimpleNamespace
+from enum import Enum, auto
+
+
+# config <----> %APPDATA%/rd.json, ~/rd.json when APPDATA is not set
+config = {
+    'MINIMALIST' : False,  # Enable full mode
+    'WRITE_MALIOC' : True,  # Enable Mali offline compiler analysis
+    'WRITE_CONST_BUFFER' : True,  # Enable constant buffer writing
+    'WRITE_PIPELINE' : True,
+    'WRITE_COLOR_BUFFER' : True,  # Enable color buffer writing
+    'WRITE_TEXTURE' : True,  # Enable texture writing
+    'WRITE_DEPTH_BUFFER' : True,  # Enable depth buffer writing
+    'WRITE_PSO_DAG' : True,
+    'WRITE_SINGLE_COLOR' : True,
+    'WRITE_ALL_DRAWS' : True,
+    'IMAGE_COMPRESSION' : True,  # Enable image compression
+    'MAX_IMAGE_SIZE' : 256,  # Maximum image size
+    'JPEG_QUALITY' : 85,  # JPEG compression quality (0-100)
+    'EXPORT_WORKERS' : 0,  # Encoder threads, 0 means one per core
+    'EXPORT_MEMORY_BUDGET_MB' : 256,  # Readbacks and decode buffers of queued and running encoder jobs
+    'TARGET_HISTORY_MB' : 64,  # Last readbacks of render targets kept for changed-pixel counts, older ones keep a digest only
+    'DEPTH_NEAR' : 0.1,  # Depth thumbnails show view distance between near and far on a log scale, 0 equalizes raw depth instead
+    'DEPTH_FAR' : 1000.0,
+    'DEPTH_REVERSED' : 'auto',  # true / false for reversed Z (near at 1), auto follows the depth test of the draws
+    'MALIOC_PATH' : '',  # Empty looks for mali_offline_compiler/malioc(.exe) next to the output, then PATH
+    'MALIOC_TIMEOUT' : 60,  # Seconds per shader
+    'WRITE_SHADER_DB' : True,  # Share disassembly / malioc results across captures
+    'SHADER_DB' : '',  # Empty means ~/.render-doctor/shaders.sqlite
+    'WRITE_PROFILE' : True,  # assets/profile.json (chrome://tracing) and assets/profile.html
+    'PROFILE_MAX_EVENTS' : 500000,  # Spans kept in profile.json, the summary counts all of them
+    'LOG_LEVEL' : 'DEBUG',  # assets/run.log: DEBUG, INFO, WARNING or ERROR
+    'CONSOLE_LEVEL' : 'INFO',  # Console lines are slow in RenderDoc's shell
+    'LOG_MODULES' : {},  # Per module level for run.log, e.g. {"draw": "INFO", "export": "WARNING"}
+    'LOG_RING_LINES' : 20000,  # Lines kept in memory until run.log is opened
+    'LOG_CHUNK_LINES' : 4000,  # Lines per write to run.log
+    'PROGRESS_INTERVAL' : 2.0,  # Seconds between console progress lines
+    'WRITE_DRAW_LIST' : True,  # assets/draws.html, every draw in a virtualized list with p / s / d navigation
+    'INDEX_SHARD_PASSES' : 64,  # More passes than this: index.html gets a pass table, each pass its own page. 0 never shards
+}
+
+IMG_EXT = 'jpg'
+
+class ShaderStage(Enum):
+    VS = 0
+    HS = auto()
+    DS = auto()
+    GS = auto()
+    PS = auto()
+    CS = auto()
+
+
+# shared by every page, written to the assets folder once per report by write_static_assets()
+REPORT_CSS_FILE = 'report.css'
+REPORT_JS_FILE = 'report.js'
+DRAW_LIST_JS_FILE = 'draw_list.js'
+DRAW_LIST_FILE = 'draws.html'  # virtualized list of every draw
+DRAW_INDEX_FILE = 'draws.js'  # the draws of the list, a script so it also loads from file://
+DRAW_INDEX_VERSION = 1
+
+REPORT_CSS = """/* index.html */
+/* Frame Overview table styles */
+.frame-overview-table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 20px 0;
+    background: white;
+    border-radius: 8px;
+    overflow: hidden;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+    font-size: 12px;
+}
+.frame-overview-table th {
+    background-color: #ff6600;
+    color: white;
+    font-weight: 600;
+    padding: 8px 4px;
+    text-align: center;
+    border: 1px solid #e0e0e0;
+    font-size: 11px;
+}
+.frame-overview-table td {
+    padding: 6px 4px;
+    border: 1px solid #e0e0e0;
+    text-align: center;
+    vertical-align: middle;
+    font-size: 11px;
+}
+.frame-overview-table .summary-row {
+    background-color: #f8f9fa;
+    font-weight: bold;
+}
+.frame-overview-table .pass-header {
+    background-color: #e3f2fd;
+    font-weight: bold;
+}
+.frame-overview-table .state-row {
+    background-color: white;
+}
+.frame-overview-table .state-row:hover {
+    background-color: #f5f5f5;
+}
+.depth-preview, .color-preview {
+    width: 20px;
+    height: 15px;
+    border: 1px solid #ddd;
+    background: #f0f0f0;
+    display: inline-block;
+}
+body {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    margin: 0;
+    padding: 20px;
+    background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
+    min-height: 100vh;
+    line-height: 1.6;
+}
+/* Main content area */
+.main-content {
+    max-width: 1400px;
+    margin: 0 auto;
+    background: white;
+    border-radius: 16px;
+    box-shadow: 0 10px 40px rgba(0,0,0,0.1);
+    overflow: hidden;
+}
+/* General card styles */
+.card {
+    background: white;
+    border-radius: 12px;
+    box-shadow: 0 4px 20px rgba(0,0,0,0.08);
+    margin: 20px;
+    overflow: hidden;
+    transition: transform 0.3s ease, box-shadow 0.3s ease;
+}
+.card:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 8px 30px rgba(0,0,0,0.12);
+}
+/* Pass section styles */
+.pass-section {
+    background: white;
+    border-radius: 16px;
+    box-shadow: 0 6px 25px rgba(0,0,0,0.1);
+    margin: 25px 0;
+    overflow: hidden;
+    transition: transform 0.3s ease, box-shadow 0.3s ease;
+    border: 2px solid transparent;
+    background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
+    position: relative;
+}
+.pass-section::before {
+    content: '';
+    position: absolute;
+    top: 0;
+    left: 0;
+    right: 0;
+    height: 4px;
+    background: linear-gradient(90deg, #667eea 0%, #764ba2 50%, #f093fb 100%);
+}
+.pass-section:hover {
+    transform: translateY(-3px);
+    box-shadow: 0 12px 40px rgba(0,0,0,0.15);
+    border-color: rgba(102, 126, 234, 0.3);
+}
+.pass-header {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 25px 20px;
+    font-size: 18px;
+    font-weight: 600;
+    position: relative;
+    overflow: hidden;
+}
+.pass-header::after {
+    content: '';
+    position: absolute;
+    top: 0;
+    right: 0;
+    width: 100px;
+    height: 100%;
+    background: linear-gradient(90deg, transparent 0%, rgba(255,255,255,0.1) 100%);
+    transform: skewX(-15deg);
+}
+.pass-content-area {
+    padding: 25px 20px;
+    background: linear-gradient(135deg, #ffffff 0%, #fafbfc 100%);
+    position: relative;
+}
+.pass-content-area::before {
+    content: '';
+    position: absolute;
+    top: 0;
+    left: 0;
+    right: 0;
+    height: 1px;
+    background: linear-gradient(90deg, transparent 0%, rgba(102, 126, 234, 0.2) 50%, transparent 100%);
+}
+.pass-title {
+    font-size: 22px;
+    font-weight: 700;
+    margin-bottom: 15px;
+    text-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    position: relative;
+    z-index: 1;
+}
+.pass-stats {
+    display: flex;
+    gap: 15px;
+    flex-wrap: wrap;
+    position: relative;
+    z-index: 1;
+}
+.stat-item {
+    background: rgba(255, 255, 255, 0.25);
+    padding: 8px 16px;
+    border-radius: 8px;
+    font-size: 14px;
+    font-weight: 600;
+    backdrop-filter: blur(15px);
+    border: 1px solid rgba(255, 255, 255, 0.4);
+    box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+    transition: all 0.3s ease;
+}
+.stat-item:hover {
+    background: rgba(255, 255, 255, 0.35);
+    transform: translateY(-1px);
+    box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+}
+/* 其余已有样式保持不变 */
+/* 表格样式 */
+.pass-table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 20px 0;
+    background: white;
+    border-radius: 12px;
+    overflow: hidden;
+    box-shadow: 0 4px 20px rgba(0,0,0,0.1);
+}
+.pass-table thead {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+}
+.pass-table th {
+    padding: 16px 12px;
+    text-align: left;
+    font-weight: 600;
+    border: none;
+}
+.pass-table td {
+    padding: 0;
+    border: none;
+    vertical-align: top;
+}
+.pass-table tbody tr {
+    border-bottom: 1px solid #f0f0f0;
+}
+.pass-table tbody tr:hover {
+    background-color: #f8f9fa;
+}
+/* Pass详细信息样式 */
+.pass-detail-cell {
+    padding: 0 !important;
+    border: none !important;
+}
+.pass-detail-header {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 15px 20px;
+    border-radius: 8px 8px 0 0;
+    margin-bottom: 0;
+}
+.pass-detail-title {
+    font-size: 18px;
+    font-weight: 700;
+    text-shadow: 0 2px 4px rgba(0,0,0,0.1);
+}
+/* 统计表格与汇总卡片 */
+.stats-table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 20px 0;
+    background: white;
+    border-radius: 10px;
+    overflow: hidden;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+}
+.stats-table th {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 15px;
+    text-align: left;
+    font-weight: 600;
+}
+.stats-table td {
+    padding: 12px 15px;
+    border-bottom: 1px solid #eee;
+}
+.stats-table tr:hover {
+    background-color: #f8f9fa;
+}
+.stats-table .highlight {
+    background-color: #e3f2fd;
+    font-weight: 600;
+}
+.summary-cards {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+    gap: 15px;
+    margin: 20px 0;
+}
+.summary-card {
+    background: white;
+    border-radius: 10px;
+    padding: 20px;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+    text-align: center;
+}
+.summary-card .value {
+    font-size: 24px;
+    font-weight: bold;
+    color: #667eea;
+}
+.summary-card .label {
+    color: #666;
+    margin-top: 5px;
+}
+/* pass pages in assets, when index.html is sharded */
+.pass-nav a { margin: 0 6px; }
+/* draws.html */
+.draw-list-layout { display: flex; gap: 15px; height: calc(100vh - 190px); }
+.draw-list { flex: 1; overflow-y: auto; position: relative; background: white; border-radius: 12px; box-shadow: 0 4px 20px rgba(0,0,0,0.1); }
+.draw-row { position: absolute; left: 0; right: 0; height: 40px; box-sizing: border-box; display: flex; align-items: center; gap: 10px; padding: 0 10px; border-bottom: 1px solid #f0f0f0; cursor: pointer; font-size: 13px; white-space: nowrap; }
+.draw-row:hover { background: #f8f9fa; }
+.draw-row.selected { background: #fff3e0; }
+.draw-row img { width: 48px; height: 32px; object-fit: contain; background: #f0f0f0; flex: none; }
+.draw-row span { overflow: hidden; text-overflow: ellipsis; }
+.draw-row .draw-id { width: 50px; color: #999; flex: none; }
+.draw-row .draw-name { flex: 2; }
+.draw-row .draw-marker { flex: 1; color: #856404; }
+.draw-row .draw-state { flex: 1; color: #555; }
+.draw-row .draw-gpu { width: 90px; text-align: right; flex: none; }
+.draw-detail { width: 360px; overflow-y: auto; background: white; padding: 20px; border-radius: 12px; box-shadow: 0 4px 20px rgba(0,0,0,0.1); }
+.draw-detail img { max-width: 100%; border: 1px solid #ddd; border-radius: 4px; }
+/* state, shader and constant buffer pages in assets */
+body.detail-page, body.shader-page, body.cb-page, body.profile-page { font-family: Arial, sans-serif; margin: 20px; padding: 0; min-height: 0; line-height: normal; background: white; }
+body.detail-page { background: #f5f5f5; }
+.header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 15px; margin-bottom: 20px; }
+.header h1 { margin: 0; font-size: 28px; }
+.header p { margin: 5px 0 0 0; opacity: 0.9; }
+.content { background: white; padding: 30px; border-radius: 15px; box-shadow: 0 4px 20px rgba(0,0,0,0.1); }
+.draw-call { margin: 20px 0; padding: 20px; border: 1px solid #e0e0e0; border-radius: 10px; background: #fafafa; }
+.draw-call h3 { margin: 0 0 15px 0; color: #333; font-size: 18px; }
+.marker { background: #fff3cd; color: #856404; padding: 8px 12px; border-radius: 6px; margin: 10px 0; font-weight: 500; }
+.call-type { background: #d1ecf1; color: #0c5460; padding: 8px 12px; border-radius: 6px; margin: 10px 0; font-weight: 500; }
+.pipeline-info { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 10px; margin: 15px 0; }
+.info-item { background: white; padding: 8px 12px; border-radius: 6px; border: 1px solid #e0e0e0; }
+.shader-section, .constant-buffer { margin: 15px 0; }
+.shader-section h4, .constant-buffer h4 { margin: 0 0 10px 0; color: #555; font-size: 16px; }
+.shader-item { background: white; padding: 8px 12px; border-radius: 6px; border: 1px solid #e0e0e0; margin: 5px 0; }
+.shader-item a { color: #0066cc; text-decoration: none; }
+.shader-item a:hover { color: #ff6600; }
+.texture-section { margin: 20px 0; }
+.texture-section h4 { margin: 0 0 15px 0; color: #555; font-size: 16px; }
+.events-section { margin: 20px 0; }
+.events-section h4 { margin: 0 0 15px 0; color: #555; font-size: 16px; }
+.event-item { background: #f8f9fa; padding: 8px 12px; border-radius: 6px; margin: 5px 0; font-family: monospace; font-size: 14px; }
+.shader-header { background-color: #ff6600; color: white; padding: 10px; border-radius: 5px; margin-bottom: 20px; }
+.shader-content { background-color: #f8f8f8; padding: 15px; border-radius: 5px; border-left: 4px solid #ff6600; }
+.shader-code, .cb-code { background-color: #2d2d2d; color: #f8f8f2; padding: 15px; border-radius: 5px; overflow-x: auto; font-family: "Courier New", monospace; }
+.analysis-section { background-color: #e8f4f8; padding: 15px; border-radius: 5px; margin: 10px 0; }
+.cb-header { background-color: #ff6600; color: white; padding: 15px; border-radius: 5px; margin-bottom: 20px; }
+.cb-section { background-color: #f8f8f8; padding: 15px; border-radius: 5px; margin: 10px 0; border-left: 4px solid #ff6600; }
+/* profile.html */
+.profile-table { border-collapse: collapse; margin-bottom: 20px; }
+.profile-table th, .profile-table td { border: 1px solid #ddd; padding: 4px 8px; text-align: right; }
+.profile-table th { background-color: #ff6600; color: white; }
+.profile-table td:first-child, .profile-table td.detail { text-align: left; }
+/* lazy loaded images, src is a placeholder until lazysizes swaps in data-src */
+.texture-image, .preview-image, .resource-preview { height: auto; border: 1px solid #ddd; border-radius: 4px; margin: 5px; transition: transform 0.3s ease; }
+.texture-image { max-width: 200px; }
+.resource-preview { max-width: 100px; margin: 2px; }
+"""
+
+# lazysizes comes from a CDN, a report opened offline loads the images directly
+REPORT_JS = """window.addEventListener('load', function () {
+    if (window.lazySizes) {
+        return;
+    }
+    var images = document.querySelectorAll('img.lazyload[data-src]');
+    for (var i = 0; i < images.length; i++) {
+        images[i].src = images[i].getAttribute('data-src');
+    }
+});
+"""
+
+# assets/draws.html, rows are built only for the part of RD_DRAW_INDEX scrolled into view
+# p / s / d and shift+p / s / d move to the next / previous pass, state and draw
+DRAW_LIST_JS = """(function () {
+    var data = window.RD_DRAW_INDEX;
+    var list = document.getElementById('draw-list');
+    var detail = document.getElementById('draw-detail');
+    if (!data || !list || !detail) {
+        return;
+    }
+    var ROW_HEIGHT = 40;
+    var OVERSCAN = 10;
+    var F = {};
+    data.fields.forEach(function (name, i) { F[name] = i; });
+    var draws = data.draws;
+    var rows = {}; // draw index -> row element
+    var selected = -1;
+    var pending = false;
+
+    var spacer = document.createElement('div');
+    spacer.style.height = draws.length * ROW_HEIGHT + 'px';
+    list.appendChild(spacer);
+
+    function formatTime(ms) {
+        return ms < 1 ? (ms * 1000).toFixed(2) + ' μs' : ms.toFixed(2) + ' ms';
+    }
+
+    function cell(row, className, text) {
+        var span = document.createElement('span');
+        span.className = className;
+        span.textContent = text;
+        span.title = text;
+        row.appendChild(span);
+    }
+
+    function buildRow(i) {
+        var d = draws[i];
+        var row = document.createElement('div');
+        row.className = i === selected ? 'draw-row selected' : 'draw-row';
+        row.style.top = i * ROW_HEIGHT + 'px';
+        var img = document.createElement('img');
+        if (d[F.thumb]) {
+            img.src = d[F.thumb];
+        }
+        img.alt = '';
+        row.appendChild(img);
+        cell(row, 'draw-id', ('000' + d[F.draw_id]).slice(-4));
+        cell(row, 'draw-name', d[F.name]);
+        cell(row, 'draw-marker', data.markers[d[F.marker]]);
+        cell(row, 'draw-state', data.states[d[F.state]][0]);
+        cell(row, 'draw-gpu', formatTime(d[F.gpu]));
+        row.onclick = function () { select(i, false); };
+        return row;
+    }
+
+    function render() {
+        pending = false;
+        var first = Math.max(0, Math.floor(list.scrollTop / ROW_HEIGHT) - OVERSCAN);
+        var last = Math.min(draws.length, Math.ceil((list.scrollTop + list.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+        Object.keys(rows).forEach(function (key) {
+            var i = +key;
+            if (i < first || i >= last) {
+                list.removeChild(rows[key]);
+                delete rows[key];
+            }
+        });
+        for (var i = first; i < last; i++) {
+            if (!rows[i]) {
+                rows[i] = buildRow(i);
+                list.appendChild(rows[i]);
+            }
+        }
+    }
+
+    function link(href, text) {
+        var a = document.createElement('a');
+        a.href = href;
+        a.textContent = text;
+        return a;
+    }
+
+    function line(label, content) {
+        var p = document.createElement('p');
+        var strong = document.createElement('strong');
+        strong.textContent = label + ': ';
+        p.appendChild(strong);
+        p.appendChild(typeof content === 'string' ? document.createTextNode(content) : content);
+        detail.appendChild(p);
+    }
+
+    function showDetail(i) {
+        var d = draws[i];
+        var state = data.states[d[F.state]];
+        var pass = data.passes[d[F.pass]];
+        detail.innerHTML = '';
+        var title = document.createElement('h3');
+        title.textContent = '[D]' + ('000' + d[F.draw_id]).slice(-4) + ' ' + d[F.name];
+        detail.appendChild(title);
+        if (d[F.thumb]) {
+            var img = document.createElement('img');
+            img.src = d[F.thumb];
+            detail.appendChild(img);
+        }
+        line('事件', String(d[F.event_id]));
+        line('标记', data.markers[d[F.marker]]);
+        line('状态', state[1] ? link(state[1], state[0]) : state[0]);
+        line('Pass', pass[1] ? link(pass[1], pass[0]) : pass[0]);
+        line('GPU 耗时', formatTime(d[F.gpu]));
+    }
+
+    function select(i, scroll) {
+        if (i < 0 || i >= draws.length) {
+            return;
+        }
+        if (rows[selected]) {
+            rows[selected].className = 'draw-row';
+        }
+        selected = i;
+        if (scroll) {
+            var top = i * ROW_HEIGHT;
+            if (top < list.scrollTop) {
+                list.scrollTop = top;
+            } else if (top + ROW_HEIGHT > list.scrollTop + list.clientHeight) {
+                list.scrollTop = top + ROW_HEIGHT - list.clientHeight;
+            }
+            render();
+        }
+        if (rows[i]) {
+            rows[i].className = 'draw-row selected';
+        }
+        showDetail(i);
+        history.replaceState(null, '', '#d' + draws[i][F.draw_id]);
+    }
+
+    // next / previous draw whose field differs, backwards it lands on the first draw of that group
+    function jump(field, step) {
+        if (selected < 0) {
+            select(0, true);
+            return;
+        }
+        var i = selected;
+        if (field) {
+            var value = draws[i][F[field]];
+            while (i + step >= 0 && i + step < draws.length && draws[i + step][F[field]] === value) {
+                i += step;
+            }
+        }
+        i += step;
+        if (i < 0 || i >= draws.length) {
+            return;
+        }
+        if (field && step < 0) {
+            var group = draws[i][F[field]];
+            while (i > 0 && draws[i - 1][F[field]] === group) {
+                i--;
+            }
+        }
+        select(i, true);
+    }
+
+    document.addEventListener('keydown', function (e) {
+        if (e.ctrlKey || e.altKey || e.metaKey) {
+            return;
+        }
+        var fields = { p: 'pass', s: 'state', d: null };
+        var key = e.key.toLowerCase();
+        if (key in fields) {
+            jump(fields[key], e.shiftKey ? -1 : 1);
+            e.preventDefault();
+        }
+    });
+
+    list.addEventListener('scroll', function () {
+        if (!pending) {
+            pending = true;
+            window.requestAnimationFrame(render);
+        }
+    });
+    window.addEventListener('resize', render);
+
+    render();
+    var start = 0;
+    var match = /^#d(\\d+)$/.exec(location.hash);
+    if (match) {
+        for (var i = 0; i < draws.length; i++) {
+            if (draws[i][F.draw_id] === +match[1]) {
+                start = i;
+                break;
+            }
+        }
+    }
+    if (draws.length) {
+        select(start, true);
+    }
+})();
+"""
+
+PLACEHOLDER_SVG = '<svg width="%d" height="%d" xmlns="http://www.w3.org/2000/svg"><rect width="100%%" height="100%%" fill="#f5f5f5"/><text x="50%%" y="50%%" font-family="Arial, sans-serif" font-size="%d" fill="#999" text-anchor="middle" dy=".3em">%s</text></svg>'
+
+# file name -> width, height, font size, text
+PLACEHOLDERS = {
+    'placeholder_image.svg': (200, 150, 14, 'Image'),
+    'placeholder_preview.svg': (200, 150, 14, 'Preview'),
+    'placeholder_resource.svg': (100, 75, 12, 'Resource'),
+}
+
+# %(prefix)s is '' for pages in the assets folder and 'assets/' for index.html
+PAGE_HEAD_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>%(title)s</title>
+<script src="https://cdnjs.cloudflare.com/ajax/libs/lazysizes/5.3.2/lazysizes.min.js"></script>
+<script src="%(prefix)s""" + REPORT_JS_FILE + """"></script>
+<link rel="stylesheet" href="%(prefix)s""" + REPORT_CSS_FILE + """">
+%(extra)s</head>
+<body class="%(body_class)s">
+"""
+
+html_head = '\n' + PAGE_HEAD_TEMPLATE % {'title': 'Render Doctor Analysis', 'prefix': 'assets/', 'extra': '', 'body_class': 'index-page'}
+
+html_minimalist_head = '\n' + PAGE_HEAD_TEMPLATE % {'title': 'Render Doctor Analysis', 'prefix': 'assets/', 'body_class': 'index-page', 'extra': """<style>
+h1 {
+    color: #ff6600;
+}
+.title {
+    background-color: #ff6600;
+}
+</style>
+"""}
+
+html_lite_head = """
+<meta charset="utf-8">
+<script src="https://cdnjs.cloudflare.com/ajax/libs/lazysizes/5.3.2/lazysizes.min.js"></script>
+"""
+
+mermaid_head = """
+<script src="https://cdn.jsdelivr.net/npm/mermaid/dist/mermaid.min.js"></script>\n
+"""
+
+class HtmlBuffer:
+    # collects a page and writes it with one call, writers use html_file.write() for files and buffers alike
+    # a big index.html is joined in chunks, a single string of it would be several times its file size
+    CHUNK_FRAGMENTS = 20000
+
+    def __init__(self):
+        self.fragments = []
+        self.write = self.fragments.append
+
+    def getvalue(self):
+        return ''.join(self.fragments)
+
+    def save(self, file_name):
+        fragments = self.fragments
+        with open(file_name, 'w', encoding='utf-8') as f:
+            for i in range(0, len(fragments), self.CHUNK_FRAGMENTS):
+                f.write(''.join(fragments[i:i + self.CHUNK_FRAGMENTS]))
+
+def write_static_assets(assets_folder):
+    # small enough to rewrite for every report, so pages written by older versions pick up the new styles
+    assets_folder = Path(assets_folder)
+    files = {REPORT_CSS_FILE: REPORT_CSS, REPORT_JS_FILE: REPORT_JS, DRAW_LIST_JS_FILE: DRAW_LIST_JS}
+    for file_name, args in PLACEHOLDERS.items():
+        files[file_name] = PLACEHOLDER_SVG % args
+    for file_name, text in files.items():
+        with open(assets_folder / file_name, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+def get_resource_filename(name, ext = 'txt'):
+    return '%s.%s' % (name, ext)
+
+def pretty_number(num):
+    """统一数字格式化，使用K/M/G单位（1000进制）"""
+    if num < 1e3:
+        return str(num)
+    if num < 1e6:
+        return "%.1fK" % (num/1e3) + " (千)"
+    if num < 1e9:
+        return "%.1fM" % (num/1e6) + " (百万)"
+    if num < 1e12:
+        return "%.1fG" % (num/1e9) + " (十亿)"
+    return "%.1fT" % (num/1e12) + " (万亿)"
+
+def format_memory_size(bytes_size):
+    """统一内存大小格式化，使用KB/MB/GB单位（1024进制）"""
+    if bytes_size == 0:
+        return "0 MB"
+    if bytes_size < 1024:
+        return "%.1f B" % bytes_size
+    elif bytes_size < 1024 * 1024:
+        return "%.1f KB" % (bytes_size / 1024)
+    elif bytes_size < 1024 * 1024 * 1024:
+        return "%.1f MB" % (bytes_size / (1024 * 1024))
+    else:
+        return "%.1f GB" % (bytes_size / (1024 * 1024 * 1024))
+
+def format_time_duration(microseconds):
+    """统一时间格式化，使用微秒/毫秒/秒单位"""
+    if microseconds < 1000:
+        return "%.2f μs" % microseconds + " (微秒)"
+    elif microseconds < 1000000:
+        return "%.2f ms" % (microseconds / 1000) + " (毫秒)"
+    else:
+        return "%.2f s" % (microseconds / 1000000) + " (秒)"
+
+def format_size_range(max_size, min_size):
+    """统一尺寸范围格式化，添加像素单位"""
+    if max_size == 0:
+        return "无数据"
+    if min_size == float('inf'):
+        return "%d px" % max_size
+    if max_size == min_size:
+        return "%d px" % max_size
+    return "%d~%d px" % (max_size, min_size)
+
+RUN_LOG_FILE = 'run.log'
+
+LOG_LEVELS = OrderedDict([('DEBUG', 10), ('INFO', 20), ('WARNING', 30), ('ERROR', 40)])
+LOG_LEVEL_NAMES = {v: k for k, v in LOG_LEVELS.items()}
+
+class Logger:
+    # leveled log lines go to a ring buffer that is appended to assets/run.log in large chunks,
+    # the console (a slow UI round trip in RenderDoc's shell) only gets CONSOLE_LEVEL and above plus throttled progress
+    # per module levels come from LOG_MODULES, e.g. {"draw": "INFO"}
+    def __init__(self):
+        from collections import deque
+        self.lock = threading.RLock()
+        self.file = None
+        self.ring = deque(maxlen=20000)
+        self.chunk_lines = 4000
+        self.level = LOG_LEVELS['DEBUG']
+        self.console_level = LOG_LEVELS['INFO']
+        self.module_levels = {}
+        self.progress_interval = 2.0
+        self.last_progress = {}
+        self.counts = defaultdict(int) # level -> lines
+        self.start = time.time()
+
+    def configure(self, config):
+        from collections import deque
+        with self.lock:
+            self.level = LOG_LEVELS.get(config.get('LOG_LEVEL', 'DEBUG'), LOG_LEVELS['DEBUG'])
+            self.console_level = LOG_LEVELS.get(config.get('CONSOLE_LEVEL', 'INFO'), LOG_LEVELS['INFO'])
+            self.module_levels = {m: LOG_LEVELS.get(l, self.level) for m, l in config.get('LOG_MODULES', {}).items()}
+            self.progress_interval = config.get('PROGRESS_INTERVAL', 2.0)
+            self.chunk_lines = max(1, config.get('LOG_CHUNK_LINES', 4000))
+            self.ring = deque(self.ring, maxlen=max(self.chunk_lines, config.get('LOG_RING_LINES', 20000)))
+
+    def open(self, file_name, mode='w'):
+        # lines logged before the file is known are kept, as long as they fit in the ring
+        with self.lock:
+            self.close()
+            self.file = open(file_name, mode, encoding='utf-8')
+            self.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.flush()
+                self.file.close()
+                self.file = None
+
+    def flush(self):
+        with self.lock:
+            if self.file and self.ring:
+                self.file.write('\n'.join(self.ring))
+                self.file.write('\n')
+                self.ring.clear()
+
+    def isEnabled(self, module, level):
+        return level >= self.module_levels.get(module, self.level) or level >= self.console_level
+
+    def log(self, level, module, msg, *args):
+        # msg is only formatted if the line goes somewhere
+        to_file = level >= self.module_levels.get(module, self.level)
+        to_console = level >= self.console_level
+        if not (to_file or to_console):
+            return
+        if args:
+            msg = msg % args
+        with self.lock:
+            self.counts[level] += 1
+            if to_file:
+                self.ring.append('%8.3f %-7s %-8s %s' % (time.time() - self.start, LOG_LEVEL_NAMES[level], module, msg))
+                if self.file and len(self.ring) >= self.chunk_lines:
+                    self.flush()
+        if to_console:
+            print(msg if level < LOG_LEVELS['WARNING'] else '%s: %s' % (LOG_LEVEL_NAMES[level].capitalize(), msg))
+
+    def debug(self, module, msg, *args):
+        self.log(LOG_LEVELS['DEBUG'], module, msg, *args)
+
+    def info(self, module, msg, *args):
+        self.log(LOG_LEVELS['INFO'], module, msg, *args)
+
+    def warning(self, module, msg, *args):
+        self.log(LOG_LEVELS['WARNING'], module, msg, *args)
+
+    def error(self, module, msg, *args):
+        self.log(LOG_LEVELS['ERROR'], module, msg, *args)
+
+    def exception(self, module, msg, *args):
+        # error with the current traceback, the traceback only goes to the file
+        import traceback
+        self.error(module, msg, *args)
+        with self.lock:
+            self.ring.append(traceback.format_exc().rstrip())
+
+    def progress(self, task, done, total):
+        # one console line every PROGRESS_INTERVAL seconds per task, and one when it is done
+        now = time.time()
+        if done < total and now - self.last_progress.get(task, 0) < self.progress_interval:
+            return
+        self.last_progress[task] = now
+        print('%s %d/%d (%d%%)' % (task, done, total, 100 * done // max(1, total)))
+
+    def getSummary(self):
+        with self.lock:
+            return ', '.join('%s %d' % (LOG_LEVEL_NAMES[l].lower(), n) for l, n in sorted(self.counts.items()))
+
+g_log = Logger()
+
+ASSET_INDEX_VERSION = 1
+
+class AssetStore:
+    # exported images are stored once per distinct readback, under a name derived from the content
+    # the per draw / per resource file names only point into the store, see asset_index.json
+    def __init__(self):
+        self.names = {} # logical file name -> stored file name
+        self.digests = {} # content digest -> stored file name
+        self.lock = threading.Lock()
+        self.duplicates = 0
+
+    def load(self, assets_folder):
+        index_file = Path(assets_folder) / 'asset_index.json'
+        if not index_file.exists():
+            return
+        try:
+            with open(index_file, encoding='utf-8') as f:
+                index = json.load(f)
+        except Exception as e:
+            g_log.warning('export', 'Error reading %s: %s', index_file, e)
+            return
+        if index.get('version') != ASSET_INDEX_VERSION:
+            return
+        # one listing of the folder instead of a stat per entry, big frames have tens of thousands
+        with os.scandir(assets_folder) as it:
+            files = set(entry.name for entry in it)
+        with self.lock:
+            for name, stored_name in index['assets'].items():
+                if stored_name in files:
+                    self.names[name] = stored_name
+                    self.digests[stored_name.rsplit('.', 1)[0]] = stored_name
+
+    def save(self, assets_folder):
+        with self.lock:
+            index = {
+                'version': ASSET_INDEX_VERSION,
+                'assets': OrderedDict(sorted(self.names.items())),
+            }
+        with g_profiler.span('write_asset_index', 'io'), open(Path(assets_folder) / 'asset_index.json', 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1)
+
+    def has(self, name):
+        with self.lock:
+            return name in self.names
+
+    def resolve(self, name):
+        # files that never went through the store (e.g. SaveTexture fallbacks) keep their own name
+        with self.lock:
+            return self.names.get(name, name)
+
+    def add(self, name, digest, ext):
+        # returns (stored file name, True if the content is new and has to be written)
+        with self.lock:
+            stored_name = self.digests.get(digest)
+            is_new = stored_name is None
+            if is_new:
+                stored_name = '%s.%s' % (digest, ext)
+                self.digests[digest] = stored_name
+            else:
+                self.duplicates += 1
+            self.names[name] = stored_name
+            return stored_name, is_new
+
+    def alias(self, name, other_name):
+        # name shows the same image as other_name
+        with self.lock:
+            self.names[name] = self.names.get(other_name, other_name)
+
+    def getSummary(self):
+        with self.lock:
+            return 'names %d, stored %d, duplicates %d' % (len(self.names), len(self.digests), self.duplicates)
+
+g_asset_store = AssetStore()
+
+PROFILE_FILE = 'profile.json'
+PROFILE_HTML = 'profile.html'
+
+class ProfileSpan:
+    __slots__ = ('profiler', 'name', 'cat', 'event_id', 'args', 'start', 'child', 'breakdown')
+
+    def __init__(self, profiler, name, cat, event_id, args):
+        self.profiler = profiler
+        self.name = name
+        self.cat = cat
+        self.event_id = event_id
+        self.args = args
+        self.child = 0.0
+        self.breakdown = None
+
+    def __enter__(self):
+        self.profiler.getStack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.profiler.end(self, time.perf_counter())
+        return False
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+class Profiler:
+    # nested timing spans, saved as a chrome trace (chrome://tracing or ui.perfetto.dev) plus a summary page
+    # spans of category 'draw' collect the self time of everything nested in them, per span name
+    def __init__(self):
+        self.enabled = False
+        self.max_events = 0
+        self.null_span = NullSpan()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.origin = time.perf_counter()
+        self.events = [] # (name, cat, start, duration, thread, args)
+        self.dropped = 0
+        self.totals = {} # (cat, name) -> [count, total, self, max, first start]
+        self.draw_costs = {} # event id -> (total, {name: self time})
+        self.threads = {}
+
+    def start(self, max_events):
+        self.reset()
+        self.enabled = True
+        self.max_events = max_events
+
+    def span(self, name, cat='phase', event_id=None, **args):
+        if not self.enabled:
+            return self.null_span
+        return ProfileSpan(self, name, cat, event_id, args)
+
+    def wrap(self, name=None, cat='phase'):
+        # decorator, the span is named after the function by default
+        def decorator(func):
+            span_name = name or func.__name__
+            def profiled(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with ProfileSpan(self, span_name, cat, None, {}):
+                    return func(*args, **kwargs)
+            profiled.__name__ = func.__name__
+            profiled.__doc__ = func.__doc__
+            profiled.__wrapped__ = func
+            return profiled
+        return decorator
+
+    def getStack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def getThread(self):
+        ident = threading.get_ident()
+        thread = self.threads.get(ident)
+        if thread is None:
+            with self.lock:
+                thread = self.threads.setdefault(ident, (len(self.threads) + 1, threading.current_thread().name))
+        return thread[0]
+
+    def end(self, span, end):
+        stack = self.getStack()
+        stack.pop()
+        duration = end - span.start
+        self_time = duration - span.child
+        if stack:
+            stack[-1].child += duration
+
+        key = (span.cat, span.name)
+        thread = self.getThread()
+        with self.lock:
+            item = self.totals.get(key)
+            if item is None:
+                item = self.totals[key] = [0, 0.0, 0.0, 0.0, span.start]
+            item[0] += 1
+            item[1] += duration
+            item[2] += self_time
+            if duration > item[3]:
+                item[3] = duration
+            if len(self.events) < self.max_events:
+                self.events.append((span.name, span.cat, span.start, duration, thread, span.args, span.event_id))
+            else:
+                self.dropped += 1
+
+        if span.cat == 'draw':
+            breakdown = span.breakdown or {}
+            breakdown['other'] = breakdown.get('other', 0.0) + self_time
+            self.draw_costs[span.event_id] = (duration, breakdown)
+        else:
+            for outer in reversed(stack):
+                if outer.cat == 'draw':
+                    if outer.breakdown is None:
+                        outer.breakdown = {}
+                    outer.breakdown[span.name] = outer.breakdown.get(span.name, 0.0) + self_time
+                    break
+
+    def getTotal(self, cat, name):
+        item = self.totals.get((cat, name))
+        return item[1] if item else 0.0
+
+    def save(self, assets_folder, draw_names=None):
+        # draw_names: event id -> name shown in the draw table
+        self.enabled = False
+        assets_folder = Path(assets_folder)
+        trace = []
+        for thread, thread_name in self.threads.values():
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': thread, 'args': {'name': thread_name}})
+        for name, cat, start, duration, thread, args, event_id in self.events:
+            event = {
+                'name': name,
+                'cat': cat,
+                'ph': 'X',
+                'ts': round((start - self.origin) * 1e6, 1),
+                'dur': round(duration * 1e6, 1),
+                'pid': 1,
+                'tid': thread,
+            }
+            if args or event_id is not None:
+                event['args'] = dict(args, event_id=event_id) if event_id is not None else dict(args)
+            trace.append(event)
+        with open(assets_folder / PROFILE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms', 'otherData': {'dropped_events': self.dropped}}, f)
+        self.writeSummaryHtml(assets_folder / PROFILE_HTML, draw_names or {})
+        g_log.info('main', 'Profiler: %d spans, %d traced, %d dropped', sum(v[0] for v in self.totals.values()), len(self.events), self.dropped)
+
+    def writeSummaryHtml(self, file_name, draw_names, max_rows=30):
+        from html import escape
+        # styles come from report.css in the same folder, like the other pages in assets
+        page = HtmlBuffer()
+        page.write(PAGE_HEAD_TEMPLATE % {'title': 'Profile', 'prefix': '', 'extra': '', 'body_class': 'profile-page'})
+        page.write('<h1>⏱ 性能分析</h1>\n')
+        page.write('<p>完整时间线: <a href="%s">%s</a>, 用 chrome://tracing 或 ui.perfetto.dev 打开</p>\n' % (PROFILE_FILE, PROFILE_FILE))
+
+        def write_table(title, keys):
+            page.write('<h2>%s</h2>\n<table class="profile-table">\n' % title)
+            page.write('<tr><th>名称</th><th>类别</th><th>次数</th><th>总计 ms</th><th>自身 ms</th><th>平均 ms</th><th>最大 ms</th></tr>\n')
+            for key in keys:
+                count, total, self_time, longest = self.totals[key][:4]
+                page.write('<tr><td>%s</td><td>%s</td><td>%d</td><td>%.1f</td><td>%.1f</td><td>%.3f</td><td>%.1f</td></tr>\n' % (
+                    key[1], key[0], count, total * 1000, self_time * 1000, total * 1000 / count, longest * 1000))
+            page.write('</table>\n')
+
+        phases = sorted((k for k in self.totals if k[0] == 'phase'), key=lambda k: self.totals[k][4])
+        write_table('阶段', phases)
+        by_self_time = sorted(self.totals, key=lambda k: -self.totals[k][2])
+        write_table('自身耗时最多 (前 %d)' % max_rows, by_self_time[:max_rows])
+
+        if self.draw_costs:
+            page.write('<h2>耗时最多的绘制 (前 %d / %d)</h2>\n<table class="profile-table">\n' % (min(max_rows, len(self.draw_costs)), len(self.draw_costs)))
+            page.write('<tr><th>事件</th><th>名称</th><th>总计 ms</th><th>明细 ms</th></tr>\n')
+            costly = sorted(self.draw_costs.items(), key=lambda item: -item[1][0])[:max_rows]
+            for event_id, (total, breakdown) in costly:
+                parts = sorted(breakdown.items(), key=lambda item: -item[1])
+                detail = ', '.join('%s %.1f' % (name, seconds * 1000) for name, seconds in parts[:4])
+                page.write('<tr><td>%d</td><td>%s</td><td>%.1f</td><td class="detail">%s</td></tr>\n' % (
+                    event_id, escape(draw_names.get(event_id, '')), total * 1000, detail))
+            page.write('</table>\n')
+
+        page.write('</body>\n</html>')
+        page.save(file_name)
+
+g_profiler = Profiler()
+
+class ProfiledController:
+    # forwards to the replay controller, every call gets a 'replay' span
+    def __init__(self, controller, profiler):
+        self.controller = controller
+        self.profiler = profiler
+        self.methods = {}
+
+    def __getattr__(self, name):
+        method = self.methods.get(name)
+        if method is None:
+            target = getattr(self.controller, name)
+            if not callable(target):
+                return target
+            profiler = self.profiler
+            def method(*args, **kwargs):
+                with profiler.span(name, 'replay'):
+                    return target(*args, **kwargs)
+            self.methods[name] = method
+        return method
+
+RAW_DATA_VERSION = 3
+RAW_DATA_FILE = 'raw_data.json'
+
+class RawResourceId(int):
+    # ResourceId read back from raw_data.json, compares equal to the rd.ResourceId it was saved from
+    def __eq__(self, other):
+        try:
+            return int(self) == int(other)
+        except (TypeError, ValueError):
+            return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = int.__hash__
+
+    @classmethod
+    def get(cls, value):
+        # draws bind the same few ids over and over, one shared instance per value
+        resource_id = g_raw_resource_ids.get(value)
+        if resource_id is None:
+            resource_id = g_raw_resource_ids[value] = cls(value)
+        return resource_id
+
+g_raw_resource_ids = {}
+
+class RawFormat:
+    # the part of rd.ResourceFormat the report reads, enums are kept as ints
+    def __init__(self, raw):
+        self.name = raw['name']
+        self.type = raw['type']
+        self.compType = raw['compType']
+        self.compCount = raw['compCount']
+        self.compByteWidth = raw['compByteWidth']
+
+    def Name(self):
+        return self.name
+
+TEXTURE_USAGE_LETTERS = {
+    'ShaderRead': 'T',
+    'ColorTarget': 'C',
+    'DepthTarget': 'Z',
+}
+
+def is_null_resource(resource_id):
+    # works for both rd.ResourceId and RawResourceId
+    return resource_id is None or int(resource_id) == 0
+
+def texture_from_raw(resource_id, raw):
+    texture_info = SimpleNamespace(**raw)
+    texture_info.resourceId = resource_id
+    texture_info.format = RawFormat(raw['format'])
+    texture_info.usage = raw['usage'] # TextureCategory flag names
+    return texture_info
+
+class ResourceCatalog:
+    # ResourceId -> texture description and resolved names, rd.py fills it from the controller,
+    # the report from raw_data.json
+    def __init__(self):
+        self.textures = {}
+        self.buffers = {}
+        self.names = {}
+        self.safe_names = {}
+
+        self.texture_hits = 0
+        self.texture_misses = 0
+        self.name_hits = 0
+        self.name_misses = 0
+
+    def getTexture(self, resource_id):
+        if is_null_resource(resource_id):
+            return None
+
+        tex = self.textures.get(resource_id)
+        if tex is None:
+            self.texture_misses += 1
+        else:
+            self.texture_hits += 1
+        return tex
+
+    def getBuffer(self, resource_id):
+        return self.buffers.get(resource_id)
+
+    def getName(self, resource_id, get_safe_name = True):
+        if is_null_resource(resource_id):
+            return "NULL"
+
+        names = self.safe_names if get_safe_name else self.names
+        name = names.get(resource_id)
+        if name is None:
+            self.name_misses += 1
+            name = 'res_%d' % int(resource_id)
+            names[resource_id] = name
+        else:
+            self.name_hits += 1
+        return name
+
+    def getSummary(self):
+        return 'textures %d hit / %d miss, names %d hit / %d miss' % (self.texture_hits, self.texture_misses, self.name_hits, self.name_misses)
+
+    @classmethod
+    def fromRaw(cls, raw):
+        catalog = cls()
+        for k, v in raw['textures'].items():
+            resource_id = RawResourceId.get(int(k))
+            catalog.textures[resource_id] = texture_from_raw(resource_id, v)
+        catalog.names = {RawResourceId.get(int(k)): v for k, v in raw['names'].items()}
+        catalog.safe_names = {RawResourceId.get(int(k)): v for k, v in raw['safe_names'].items()}
+        return catalog
+
+class FrameOverview:
+    # running totals behind writeFrameOverview, rd.py adds each draw in visit_action and its textures
+    # once collectPipeline has seen them bound, so the report never walks the draws for it
+    def __init__(self):
+        self.draws = 0
+        self.vertices = 0
+        self.polygons = 0
+        self.gpu_time = 0.0
+
+        self.textures = 0
+        self.texture_memory = 0 # width * height * 4 per texture
+        self.max_size = 0
+        self.min_size = None
+        self.largest = None # resource id
+        self.smallest = None # sampled texture, no depth / stencil or render target
+        self.smallest_size = 0
+        self.formats = defaultdict(int)
+        self.types = defaultdict(int)
+        self.mips = defaultdict(int)
+        self.texture_draws = {} # resource id -> draw ids sampling it
+
+    def addDraw(self, desc, gpu_duration):
+        self.draws += 1
+        self.gpu_time += gpu_duration
+        vertices = getattr(desc, 'numVertices', 0)
+        if not vertices or vertices <= 0:
+            return
+        self.vertices += vertices
+        if hasattr(desc, 'topology'):
+            topology = str(desc.topology)
+            if 'Triangle' in topology:
+                self.polygons += vertices // 3
+            elif 'Quad' in topology:
+                self.polygons += vertices // 4
+            elif 'Line' in topology:
+                self.polygons += vertices // 2
+            else:
+                # 默认按三角形计算
+                self.polygons += vertices // 3
+
+    def addTextures(self, draw_id, resource_ids, catalog):
+        for resource_id in resource_ids:
+            if is_null_resource(resource_id):
+                continue
+            key = int(resource_id)
+            draws = self.texture_draws.get(key)
+            if draws is None:
+                texture_info = catalog.getTexture(resource_id)
+                if not texture_info:
+                    continue
+                draws = self.texture_draws[key] = set()
+                self.addTexture(key, texture_info, catalog.getName(resource_id))
+            draws.add(draw_id)
+
+    def addTexture(self, key, texture_info, name):
+        width = texture_info.width
+        height = texture_info.height
+        max_size = max(width, height)
+        min_size = min(width, height)
+        texture_format = texture_info.format.Name()
+        texture_type = texture_info.type
+
+        self.textures += 1
+        self.texture_memory += width * height * 4
+        self.formats[texture_format] += 1
+        self.types[getattr(texture_type, 'name', texture_type)] += 1
+        self.mips[texture_info.mips] += 1
+        if max_size > self.max_size:
+            self.max_size = max_size
+            self.largest = key
+        self.min_size = min_size if self.min_size is None else min(self.min_size, min_size)
+
+        if 'Depth' in texture_format or 'Stencil' in texture_format or 'Target' in name or 'Render' in name:
+            return
+        if self.smallest is None or max_size < self.smallest_size:
+            self.smallest = key
+            self.smallest_size = min_size
+
+    def finish(self, catalog):
+        # nothing sampled by a draw, fall back to every texture of the capture
+        if self.textures == 0:
+            for resource_id, texture_info in catalog.textures.items():
+                if not is_null_resource(resource_id):
+                    self.addTexture(int(resource_id), texture_info, catalog.getName(resource_id))
+
+    def toRaw(self):
+        raw = {key: getattr(self, key) for key in FrameOverview.RAW_FIELDS}
+        raw['formats'] = dict(self.formats)
+        raw['types'] = dict(self.types)
+        raw['mips'] = {str(k): v for k, v in self.mips.items()}
+        raw['texture_draws'] = {str(k): sorted(v) for k, v in self.texture_draws.items()}
+        return raw
+
+    @classmethod
+    def fromRaw(cls, raw):
+        overview = cls()
+        for key in FrameOverview.RAW_FIELDS:
+            setattr(overview, key, raw[key])
+        overview.formats.update(raw['formats'])
+        overview.types.update(raw['types'])
+        overview.mips.update((int(k), v) for k, v in raw['mips'].items())
+        overview.texture_draws = {int(k): set(v) for k, v in raw['texture_draws'].items()}
+        return overview
+
+    RAW_FIELDS = ('draws', 'vertices', 'polygons', 'gpu_time', 'textures', 'texture_memory',
+                  'max_size', 'min_size', 'largest', 'smallest', 'smallest_size')
+
+# page fragments, %-formatted once per pass / state / draw instead of a write per line
+PASS_HEADER_TEMPLATE = (
+    '<div class="pass-header">\n'
+    '<div class="pass-title">🎯 %s</div>\n'
+    '<div class="pass-stats">\n'
+    '<span class="stat-item">📊 绘制调用: %d</span>\n'
+    '<span class="stat-item">🔧 着色器: %d</span>\n'
+    '<span class="stat-item">🖼️ 贴图: %d</span>\n'
+    '</div>\n'
+    '</div>\n'
+    '<div class="pass-content-area">\n')
+
+PASS_PAGE_HEAD = PAGE_HEAD_TEMPLATE % {'title': '%s', 'prefix': '', 'extra': '', 'body_class': 'index-page'}
+
+PASS_ROW_TEMPLATE = '<tr><td><a href="assets/%s">Pass%d</a></td><td>%s</td><td>%s</td><td>%d</td><td>%d</td><td>%s</td></tr>\n'
+
+STATE_GROUP_TEMPLATE = '<div class="state-group">\n<div class="state-group-header">\n<h4>🔧 %s (%d个调用)</h4>\n</div>\n<div class="state-group-content">\n'
+
+STATE_PAGE_HEAD = PAGE_HEAD_TEMPLATE % {'title': '渲染医生 - 美术资产分析', 'prefix': '', 'extra': '', 'body_class': 'detail-page'} + (
+    '<div class="header">\n'
+    '<h1>🎨 渲染医生 - 美术资产分析</h1>\n'
+    '<p>基于实际渲染资源的详细分析报告</p>\n'
+    '</div>\n'
+    '<div class="content">\n')
+
+STATE_PAGE_TAIL = '</div>\n</body>\n</html>'
+
+DRAW_HEADER_TEMPLATE = (
+    '<div class="pass-header">\n'
+    '<div class="pass-title">🎯 绘制调用 [D]%04d %s</div>\n'
+    '<div class="pass-stats">\n'
+    '<span class="stat-item">🔧 着色器: %d</span>\n'
+    '<span class="stat-item">🖼️ 贴图: %d</span>\n'
+    '%s'
+    '</div>\n'
+    '</div>\n'
+    '<div class="pass-content-area">\n')
+
+PIPELINE_INFO_TEMPLATE = (
+    '<div class="pipeline-info">\n'
+    '<div class="info-item"><strong>混合:</strong> %s</div>\n'
+    '<div class="info-item"><strong>深度状态:</strong> %s</div>\n'
+    '<div class="info-item"><strong>写入掩码:</strong> %s</div>\n'
+    '</div>\n')
+
+SHADER_ITEM_TEMPLATE = '<div class="shader-item">%s: <a href="%s%s.html">%s</a></div>\n'
+
+CBUFFER_TEMPLATE = '<div class="constant-buffer">\n<h4>📊 常量缓冲区</h4>\n<a href="%s%s">%s</a>\n</div>\n'
+
+TEXTURE_TEMPLATE = '<div class="texture-container"><img src="%splaceholder_image.svg" data-src="%s%s" alt="%s" class="lazyload texture-image" loading="lazy"><div class="texture-info">%s</div></div>'
+
+EVENT_ITEM_TEMPLATE = '<div class="event-item">event_%04d %s</div>\n'
+
+class Pass:
+    def getFirstDraw(self):
+        # TODO: this is a wrong assumption, fix it when I have time
+        if len(self.states) == 0:
+            return None
+        return self.states[0].getFirstDraw()
+
+    def getLastDraw(self):
+        # TODO: this is a wrong assumption, fix it when I have time
+        if len(self.states) == 0:
+            return None
+        return self.states[-1].getLastDraw()
+
+    def getName(self):
+        if self.name:
+            return self.name
+
+        pass_info = ''
+        if self.getLastDraw():
+            # TODO: assume every draws share the same set of targets
+            pass_info = self.getLastDraw().getPassSummary()
+
+        if not pass_info:
+            self.name = 'Pass%d' % (self.pass_id)
+        else:
+            self.name = 'Pass%d_%s' % (self.pass_id, pass_info)
+
+        return self.name
+
+    def writeIndexHtml(self, html_file, prefix='assets/'):
+        pass_name = self.getName()
+        
+        # 计算Pass统计信息
+        total_draws = len(self.states)
+        total_shaders = 0
+        total_textures = 0
+        
+        # 安全地计算统计信息
+        for s in self.states:
+            if hasattr(s, 'draws') and s.draws:
+                # 检查绘制调用中的着色器
+                for draw in s.draws:
+                    if hasattr(draw, 'shader_names') and draw.shader_names:
+                        total_shaders += 1
+                    if hasattr(draw, 'textures') and draw.textures:
+                        total_textures += len(draw.textures)
+        
+        # 不生成外层的pass-section，因为现在在表格中
+        html_file.write(PASS_HEADER_TEMPLATE % (pass_name, total_draws, total_shaders, total_textures))
+        
+        # 按状态分组显示
+        state_groups = {}
+        for s in self.states:
+            state_key = s.getName()
+            if state_key not in state_groups:
+                state_groups[state_key] = []
+            state_groups[state_key].append(s)
+        
+        for state_name, states in state_groups.items():
+            if len(states) > 1:
+                # 多个相同状态的绘制调用
+                html_file.write(STATE_GROUP_TEMPLATE % (state_name, len(states)))
+                for s in states:
+                    s.writeIndexHtml(html_file, prefix)
+                html_file.write('</div>\n</div>\n')
+            else:
+                # 单个绘制调用
+                states[0].writeIndexHtml(html_file, prefix)
+        
+        html_file.write('</div>\n')
+
+    def writeDetailHtml(self):
+        for s in self.states:
+            # unique names don't repeat within a frame, pages left by an earlier run are rewritten
+            filename = g_assets_folder / (s.getUniqueName() + '.html')
+            page = HtmlBuffer()
+            s.writeDetailHtml(page)
+            with g_profiler.span('write_state_page', 'io'):
+                page.save(filename)
+            g_log.debug('report', 'Writing %s', filename)
+
+    def getPageName(self):
+        # own page of the pass when index.html is sharded
+        return 'pass_%04d.html' % self.pass_id
+
+    def getGpuDuration(self):
+        return sum(d.gpu_duration for d in self.draws)
+
+    def writePageHtml(self, prev_pass, next_pass):
+        page = HtmlBuffer()
+        page.write(PASS_PAGE_HEAD % self.getName())
+        nav = ['<a href="../index.html">⬆ 概览</a>']
+        if prev_pass:
+            nav.append('<a href="%s">⬅ Pass%d</a>' % (prev_pass.getPageName(), prev_pass.pass_id))
+        if next_pass:
+            nav.append('<a href="%s">Pass%d ➡</a>' % (next_pass.getPageName(), next_pass.pass_id))
+        page.write('<p class="pass-nav">%s</p>\n' % ' | '.join(nav))
+        page.write('<div class="main-content">\n<div class="pass-section">\n')
+        self.writeIndexHtml(page, '')
+        page.write('</div>\n</div>\n</body>\n</html>')
+        with g_profiler.span('write_pass_page', 'io'):
+            page.save(g_assets_folder / self.getPageName())
+
+    def getStateNames(self):
+        # in order of first use
+        return list(OrderedDict.fromkeys(s.getName() for s in self.states))
+
+    @classmethod
+    def fromRaw(cls, raw, draws):
+        p = cls()
+        p.pass_id = raw['pass_id']
+        p.states = [State.fromRaw(s, draws) for s in raw['states']]
+        p.draws = [d for s in p.states for d in s.draws]
+        for d in p.draws:
+            d.pass_ = p
+        return p
+
+    states = None
+    draws = None
+    pass_id = None
+    name = None
+
+class State:
+    def getFirstDraw(self):
+        if len(self.draws) == 0:
+            return None
+
+        return self.draws[0]
+
+    def getLastDraw(self):
+        if len(self.draws) == 0:
+            return None
+
+        return self.draws[-1]
+
+    def getUniqueName(self):
+        # used in HTML annotation
+        return self.unique_name
+
+    def getName(self):
+        return self.name
+
+    def writeIndexHtml(self, html_file, prefix='assets/'):
+        html_file.write('<div class="state-section">\n<h3>🔧 %s</h3>\n</div>\n' % self.getUniqueName())
+        # for ev in self.events:
+        #     ev.writeIndexHtml(html_file)
+        draw_count = len(self.draws)
+        if draw_count == 0:
+            return
+        if config['MINIMALIST']:
+            # MINIMALIST only cares about last draw
+            self.draws[-1].writeIndexHtml(html_file, prefix)
+            return
+
+        if draw_count == 1:
+            self.draws[0].writeIndexHtml(html_file, prefix)
+        elif draw_count == 2:
+            self.draws[0].writeIndexHtml(html_file, prefix)
+            self.draws[1].writeIndexHtml(html_file, prefix)
+        else:
+            self.draws[0].writeIndexHtml(html_file, prefix)
+            self.draws[int(draw_count/2)].writeIndexHtml(html_file, prefix)
+            self.draws[-1].writeIndexHtml(html_file, prefix)
+
+        html_file.write('\n')
+
+    def writeDetailHtml(self, html_file):
+        # the page lives in the assets folder, so its links have no assets/ prefix
+        html_file.write(STATE_PAGE_HEAD)
+        for d in self.draws:
+            d.writeDetailHtml(html_file)
+        html_file.write(STATE_PAGE_TAIL)
+
+    @classmethod
+    def fromRaw(cls, raw, draws):
+        state = cls()
+        for key in ('name', 'unique_name', 'vs_name', 'ps_name', 'cs_name'):
+            setattr(state, key, raw[key])
+        state.draws = [draws[i] for i in raw['draws']]
+        state.events = state.draws[:]
+        return state
+
+    events = None
+    draws = None
+
+class Draw:
+    def isClear(self):
+        return 'Clear' in self.name\
+            or 'Invalidate' in self.name \
+            or 'Discard' in self.name
+
+    def isCopy(self):
+        return 'Copy' in self.name
+
+    def isDispatch(self):
+        return self.name.find('Dispatch') != -1
+
+    def getPassSummary(self):
+        summary = ''
+        color_count = 0
+        depth_count = 0
+        texture_info = None
+        for resource_id in self.color_buffers:
+            if not is_null_resource(resource_id):
+                color_count += 1
+                if not texture_info:
+                    texture_info = g_resource_catalog.getTexture(resource_id)
+        if not is_null_resource(self.depth_buffer):
+            depth_count += 1
+            if not texture_info:
+                texture_info = g_resource_catalog.getTexture(self.depth_buffer)
+        if depth_count > 0:
+            summary = 'z'
+        else:
+            summary = ''
+        if color_count > 0:
+            if color_count == 1:
+                summary += 'c'
+            else:
+                summary += '%dc' % (color_count)
+
+        if texture_info:
+            summary = '%s_%dX%d' % (summary, texture_info.width, texture_info.height)
+        return summary
+
+    def writeTextureHtml(self, html_file, caption_suffix, resource_id, texture_file_name, prefix='assets/'):
+        texture_info = g_resource_catalog.getTexture(resource_id)
+        if not texture_info: return
+        depth_info = ''
+        arraysize_info = ''
+        mips_info = ''
+        if texture_info.depth > 1:
+            depth_info = 'x%d' % texture_info.depth
+        if texture_info.arraysize > 1:
+            arraysize_info = '[%d]' % texture_info.arraysize
+        if texture_info.mips > 1:
+            mips_info = '%d mips ' % texture_info.mips
+        texture_info_text = '(%dX%d%s%s %s%s)' % (texture_info.width, texture_info.height, depth_info, arraysize_info, mips_info, texture_info.format.Name() )
+
+        # enum class ResourceFormatType
+        # rdcstr ResourceFormatName(const ResourceFormat &fmt)
+        # 使用优化的图片标签，支持懒加载和响应式设计
+        caption = '%s %s' % (caption_suffix, texture_info_text)
+        html_file.write(TEXTURE_TEMPLATE % (prefix, prefix, g_asset_store.resolve(texture_file_name), caption, caption))
+
+    def writeDetailHtml(self, html_file):
+        self.writeIndexHtml(html_file, '')
+
+        html_file.write('<div class="events-section">\n<h4>📋 事件列表</h4>\n')
+        html_file.write(''.join([EVENT_ITEM_TEMPLATE % event for event in self.event_list]))
+        html_file.write('</div>\n')
+
+    def writeIndexHtml(self, html_file, prefix='assets/'):
+        # prefix leads from the page to the assets folder, '' for the state pages inside it
+        shader_count = sum(1 for name in self.shader_names if name is not None)
+        texture_count = len(self.textures) if hasattr(self, 'textures') else 0
+        if self.isClear():
+            operation = '<span class="stat-item">🧹 清除操作</span>\n'
+        elif self.isCopy():
+            operation = '<span class="stat-item">📋 复制操作</span>\n'
+        else:
+            operation = ''
+        # 不生成外层的pass-section，因为现在在表格中
+        html_file.write(DRAW_HEADER_TEMPLATE % (self.draw_id, self.name.replace('#', '_'), shader_count, texture_count, operation))
+
+        if self.expanded_marker:
+            html_file.write('<div class="marker">📌 %s</div>\n' % self.expanded_marker)
+
+        if self.isClear() or self.isCopy():
+            html_file.write('<div class="call-type">%s</div>\n' % ("清除" if self.isClear() else "复制"))
+        else:
+            html_file.write(PIPELINE_INFO_TEMPLATE % ("启用" if self.alpha_enabled else "禁用", ''.join(self.depth_state), ''.join(self.write_mask)))
+
+            # shader section
+            if any(self.shader_names):
+                html_file.write('<div class="shader-section">\n<h4>🔧 着色器</h4>\n')
+                for stage, shader_name in enumerate(self.shader_names):
+                    if shader_name is not None:
+                        html_file.write(SHADER_ITEM_TEMPLATE % (ShaderStage(stage).name, prefix, shader_name, shader_name))
+                html_file.write('</div>\n')
+
+            # cb / constant buffer section
+            if config['WRITE_CONST_BUFFER'] and self.cbuffer_page:
+                file_name = get_resource_filename(self.cbuffer_page, 'html')
+                html_file.write(CBUFFER_TEMPLATE % (prefix, file_name, self.cbuffer_page))
+
+        html_file.write('</div>\n')
+
+        if not self.isDispatch():
+            # color buffer section
+            if config['WRITE_COLOR_BUFFER']:
+                for idx, resource_id in enumerate(self.color_buffers):
+                    if is_null_resource(resource_id):
+                        continue
+                    resource_name = g_resource_catalog.getName(resource_id)
+                    # TODO: ugly
+                    file_name = get_resource_filename('%s--%04d_c%d' % (resource_name, self.draw_id, idx), IMG_EXT)
+                    self.writeTextureHtml(html_file, 'c%d: %s%s' % (idx, resource_name, self.getChangeText(file_name)), resource_id, file_name, prefix)
+
+            # depth buffer section
+            if config['WRITE_DEPTH_BUFFER']:
+                if not is_null_resource(self.depth_buffer):
+                    resource_id = self.depth_buffer
+                    resource_name = g_resource_catalog.getName(resource_id)
+                    # TODO: ugly again
+                    file_name = get_resource_filename('%s--%04d_z' % (resource_name, self.draw_id), IMG_EXT)
+                    self.writeTextureHtml(html_file, 'z: %s%s' % (resource_name, self.getChangeText(file_name)), resource_id, file_name, prefix)
+
+            # texture section
+            if not self.isClear() and not self.isCopy() and config['WRITE_TEXTURE']:
+                html_file.write('<div class="texture-section">\n<h4>🖼️ 贴图资源</h4>\n')
+                for idx, resource_id in enumerate(self.textures):
+                    if is_null_resource(resource_id):
+                        continue
+                    resource_name = g_resource_catalog.getName(resource_id)
+                    file_name = get_resource_filename(resource_name, IMG_EXT)
+                    self.writeTextureHtml(html_file, 't%s: %s' % (idx, resource_name), resource_id, file_name, prefix)
+                html_file.write('</div>\n')
+        # TODO: add UAV / image etc
+
+    def getThumbnail(self):
+        # first exported target of the draw, '' when nothing was written for it
+        if config['WRITE_COLOR_BUFFER']:
+            for idx, resource_id in enumerate(self.color_buffers):
+                if not is_null_resource(resource_id):
+                    file_name = get_resource_filename('%s--%04d_c%d' % (g_resource_catalog.getName(resource_id), self.draw_id, idx), IMG_EXT)
+                    if g_asset_store.has(file_name):
+                        return g_asset_store.resolve(file_name)
+        if config['WRITE_DEPTH_BUFFER'] and not is_null_resource(self.depth_buffer):
+            file_name = get_resource_filename('%s--%04d_z' % (g_resource_catalog.getName(self.depth_buffer), self.draw_id), IMG_EXT)
+            if g_asset_store.has(file_name):
+                return g_asset_store.resolve(file_name)
+        return ''
+
+    def isZeroContribution(self):
+        # every target was compared and none of them changed
+        return len(self.target_changes) > 0 and all(change[0] == 0 for change in self.target_changes.values())
+
+    def getChangeText(self, file_name):
+        count, bbox = self.target_changes.get(file_name, (None, None))
+        if count is None:
+            return ''
+        if count == 0:
+            return ' 无变化'
+        return ' 变化 %d 像素 [%d,%d - %d,%d]' % (count, bbox[0], bbox[1], bbox[2], bbox[3])
+
+    @classmethod
+    def fromRaw(cls, raw):
+        draw = cls()
+        draw.draw_desc = SimpleNamespace(**raw['desc'])
+        for key in ('event_id', 'draw_id', 'name', 'level', 'state_key', 'shader_names', 'short_shader_names',
+                    'cbuffer_page', 'expanded_marker', 'marker', 'gpu_duration', 'alpha_enabled', 'depth_state', 'write_mask'):
+            setattr(draw, key, raw[key])
+        draw.textures = [RawResourceId.get(v) for v in raw['textures']]
+        draw.color_buffers = [RawResourceId.get(v) for v in raw['color_buffers']]
+        draw.depth_buffer = RawResourceId.get(raw['depth_buffer'])
+        draw.target_changes = {k: tuple(v) for k, v in raw['target_changes'].items()}
+        draw.event_list = [tuple(ev) for ev in raw['events']]
+        return draw
+
+    name = None
+    event_id = None
+    draw_id = None
+    draw_desc = None # ActionDescription fields, see DRAW_DESC_FIELDS in rd.py
+    event_list = None # [(event id, chunk name)] of the action
+    cbuffer_page = None
+    target_changes = None
+    shader_names = None
+    state_key = None
+    color_buffers = None
+    depth_buffer = None
+
+class Frame:
+    def getImageLinkOrNothing(self, filename, width='100%'):
+        if not filename:
+            return ''
+
+        return '<img src="assets/placeholder_preview.svg" data-src="%s" alt="Preview" class="lazyload preview-image" loading="lazy" style="max-width: %s">' % (filename, width)
+
+    def writeShaderOverview(self, html_file):
+        # 着色器概览已取消
+        pass
+
+    def writeResourceOverview(self, html_file):
+        if not self.texture_tips:
+            return
+
+        html_file.write('<div class="card">\n')
+        html_file.write('<div class="card-header">📦 资源概览</div>\n')
+        html_file.write('<div class="card-content">\n')
+        html_file.write('<table>\n')
+        html_file.write('<thead>\n')
+        html_file.write('<tr><th>名称</th><th>类型</th><th>用途</th><th>尺寸</th><th>Mip</th><th>格式</th><th>字节</th><th>提示</th><th>预览</th></tr>\n')
+        html_file.write('</thead>\n')
+        html_file.write('<tbody>\n')
+
+        for tip in self.texture_tips:
+            resource_id = RawResourceId.get(tip['resource_id'])
+            file_name = get_resource_filename(g_resource_catalog.getName(resource_id), IMG_EXT)
+            tex_info = g_resource_catalog.getTexture(resource_id)
+            texType = tex_info.type
+            # 翻译贴图类型为中文
+            texType = texType.replace('Texture2D', '2D贴图')
+            texType = texType.replace('Texture3D', '3D贴图')
+            texType = texType.replace('TextureCube', '立方体贴图')
+            texType = texType.replace('Texture1D', '1D贴图')
+            texType = texType.replace('Texture1DArray', '1D贴图数组')
+            texType = texType.replace('Texture2DArray', '2D贴图数组')
+            texType = texType.replace('TextureCubeArray', '立方体贴图数组')
+            texType = texType.replace('Texture3DArray', '3D贴图数组')
+            usages = ''.join(TEXTURE_USAGE_LETTERS.get(usage, usage) for usage in tex_info.usage)
+            html_file.write('<tr>\n')
+            html_file.write('<td>%s</td>\n' % tip['name'])
+            html_file.write('<td>%s</td>\n' % texType)
+            html_file.write('<td>%s</td>\n' % usages)
+            html_file.write('<td>%s</td>\n' % '%dx%d' % (tex_info.width, tex_info.height))
+            html_file.write('<td>%d</td>\n' % tex_info.mips)
+            html_file.write('<td>%s</td>\n' % tip['format'])
+            html_file.write('<td>%s</td>\n' % pretty_number(tex_info.byteSize))
+            html_file.write('<td>%s</td>\n' % '<br>'.join(tip['tips']))
+            html_file.write('<td><img src="assets/placeholder_resource.svg" data-src="assets/%s" alt="Preview" class="lazyload resource-preview" loading="lazy"></td>\n' % g_asset_store.resolve(file_name))
+            html_file.write('</tr>\n')
+
+        html_file.write('</tbody>\n')
+        html_file.write('</table>\n')
+        html_file.write('</div>\n')
+        html_file.write('</div>\n')
+
+    def writeFrameOverview(self, html_file):
+        html_file.write('<div class="card">\n')
+        html_file.write('<div class="card-header">📊 渲染资产统计</div>\n')
+        html_file.write('<div class="card-content">\n')
+
+        # 所有数据在 rd.py 遍历绘制调用时已累计，见 FrameOverview
+        overview = self.overview
+        total_draws = overview.draws
+        total_vertices = overview.vertices
+        total_polygons_accurate = overview.polygons
+        total_min_size = overview.min_size if overview.min_size is not None else float('inf')
+
+        # 统一统计表格
+        html_file.write('<table class="stats-table">\n')
+        html_file.write('<thead>\n')
+        html_file.write('<tr>\n')
+        html_file.write('<th>类别</th>\n')
+        html_file.write('<th>项目</th>\n')
+        html_file.write('<th>数值</th>\n')
+        html_file.write('</tr>\n')
+        html_file.write('</thead>\n')
+        html_file.write('<tbody>\n')
+
+        # 如果所有方法都失败，使用估算
+        if total_vertices == 0 and total_draws > 0:
+            # 如果连顶点数都没有，按绘制调用数估算
+            total_vertices = total_draws * 1000  # 每个绘制调用假设1000个顶点
+            total_polygons_accurate = total_draws * 333  # 每个绘制调用假设333个面
+        
+        model_stats = [
+            {'category': '🎯 模型', 'item': '总绘制调用', 'value': str(total_draws) + " 次"},
+            {'category': '🎯 模型', 'item': '总顶点数', 'value': pretty_number(total_vertices)},
+            {'category': '🎯 模型', 'item': '总面数', 'value': pretty_number(total_polygons_accurate)},
+        ]
+        
+        # 贴图统计
+        texture_stats = [
+            {'category': '🖼️ 贴图', 'item': '总贴图数', 'value': str(overview.textures) + " 个"},
+            {'category': '🖼️ 贴图', 'item': '总内存', 'value': format_memory_size(overview.texture_memory)},
+            {'category': '🖼️ 贴图', 'item': '尺寸范围', 'value': format_size_range(overview.max_size, total_min_size)},
+        ]
+        
+        # 添加贴图类型统计
+        for type_name, count in overview.types.items():
+            # 翻译贴图类型为中文
+            translated_type = type_name
+            translated_type = translated_type.replace('TextureType.', '')
+            translated_type = translated_type.replace('Texture2D', '2D贴图')
+            translated_type = translated_type.replace('Texture3D', '3D贴图')
+            translated_type = translated_type.replace('TextureCube', '立方体贴图')
+            translated_type = translated_type.replace('Texture1D', '1D贴图')
+            translated_type = translated_type.replace('Texture1DArray', '1D贴图数组')
+            translated_type = translated_type.replace('Texture2DArray', '2D贴图数组')
+            translated_type = translated_type.replace('TextureCubeArray', '立方体贴图数组')
+            translated_type = translated_type.replace('Texture3DArray', '3D贴图数组')
+            
+            texture_stats.append({
+                'category': '🖼️ 贴图', 
+                'item': f' {translated_type}', 
+                'value': f"{count} 个"
+            })
+        
+        # 添加最大 / 最小贴图的统计信息（排除深度缓冲区）
+        for item, resource_id in (('最大贴图', overview.largest), ('最小贴图', overview.smallest)):
+            texture_info = g_resource_catalog.getTexture(RawResourceId.get(resource_id)) if resource_id is not None else None
+            if not texture_info:
+                continue
+            texture_format = texture_info.format.Name()
+            if 'Depth' in texture_format or 'Stencil' in texture_format:
+                value = "深度缓冲区 (已排除)"
+            else:
+                value = f"{g_resource_catalog.getName(RawResourceId.get(resource_id))} ({texture_info.width}×{texture_info.height})"
+                draws = overview.texture_draws.get(resource_id)
+                if draws:
+                    value += f", {len(draws)} 个绘制调用使用"
+            texture_stats.append({'category': '🖼️ 贴图', 'item': item, 'value': value})
+        
+        # 性能统计
+        performance_stats = [
+            {'category': '⚡ 性能', 'item': '总绘制调用', 'value': str(total_draws) + " 次"},
+            {'category': '⚡ 性能', 'item': '总渲染时间', 'value': format_time_duration(overview.gpu_time * 1000)},  # 转换为微秒
+            {'category': '⚡ 性能', 'item': '渲染Pass数', 'value': str(len(self.passes)) + " 个"},
+        ]
+        
+        # 输出所有统计数据，合并同类别单元格
+        all_stats = model_stats + texture_stats + performance_stats
+        with open(g_assets_folder / 'summary.csv', 'w', newline='', encoding='utf-8') as summary_csv:
+            writer = csv.writer(summary_csv)
+            writer.writerow(['category', 'item', 'value'])
+            for stat in all_stats:
+                writer.writerow([stat['category'], stat['item'].strip(), stat['value']])
+
+        current_category = None
+        category_counts = {}
+        
+        # 计算每个类别的行数
+        for stat in all_stats:
+            category = stat['category']
+            if category not in category_counts:
+                category_counts[category] = 0
+            category_counts[category] += 1
+        
+        # 输出表格行
+        for i, stat in enumerate(all_stats):
+            html_file.write('<tr>\n')
+            
+            # 如果是新类别的第一行，输出带rowspan的类别单元格
+            if stat['category'] != current_category:
+                current_category = stat['category']
+                rowspan = category_counts[current_category]
+                html_file.write('<td rowspan="%d" style="vertical-align: middle; background-color: #f8f9fa; font-weight: bold;">%s</td>\n' % (rowspan, stat['category']))
+            
+            html_file.write('<td>%s</td>\n' % stat['item'])
+            html_file.write('<td><strong>%s</strong></td>\n' % stat['value'])
+            html_file.write('</tr>\n')
+        
+        html_file.write('</tbody>\n')
+        html_file.write('</table>\n')
+        
+        html_file.write('</div>\n')
+        html_file.write('</div>\n')
+
+    def writeZeroContributionDraws(self, html_file):
+        wasted = [d for d in self.draws if d.isZeroContribution()]
+        html_file.write('<p>• 零贡献绘制 (渲染目标无变化): %d / %d</p>\n' % (len(wasted), len(self.draws)))
+        if not wasted:
+            return
+        html_file.write('<details><summary>列表</summary>\n<ul>\n')
+        for d in wasted:
+            html_file.write('<li>%04d %s</li>\n' % (d.draw_id, d.name))
+        html_file.write('</ul>\n</details>\n')
+
+    def writeBindStats(self, html_file, label, item):
+        # TODO: add redundants
+        html_file.write('<tr><td>%s</td><td>%d</td><td>%d</td><td>%d</td></tr>\n' % (label, item['calls'], item['sets'], item['nulls']))
+
+    def getUniqueStateName(self, passName, stateName):
+        if self.stateNameDict[stateName] == 1:
+            return stateName
+        return '%s_%s' % (passName, stateName)
+
+    @g_profiler.wrap()
+    def writeDAG(self):
+        filename = g_assets_folder / 'dag.html' # TODO: ugly
+        markdown = HtmlBuffer()
+        markdown.write(mermaid_head)
+        markdown.write('<div class="mermaid">\n')
+        markdown.write('flowchart LR\n')
+        pass_count = len(self.passes)
+
+        # subgraph
+        for i in range(0, pass_count):
+            p = self.passes[i]
+            pass_name = f"Pass{i}"
+            markdown.write('subgraph %s\n' % pass_name)
+
+            if True:
+                # set sort
+                states = p.getStateNames()
+                state_count = len(states)
+                if state_count == 1:
+                    # no siblings
+                    markdown.write('%s\n' % (self.getUniqueStateName(pass_name, states[0])))
+                else:
+                    for j in range(0, state_count - 1):
+                        markdown.write('%s --> %s\n' % (self.getUniqueStateName(pass_name, states[j]), self.getUniqueStateName(pass_name, states[j+1])))
+            else:
+                state_count = len(p.states)
+                if state_count == 1:
+                    # no siblings
+                    markdown.write('%s\n' % (p.states[0].getUniqueName()))
+                else:
+                    for j in range(0, state_count - 1):
+                        markdown.write('%s --> %s\n' % (p.states[j].getUniqueName(), p.states[j+1].getUniqueName()))
+
+            markdown.write('end\n')
+
+            if i < pass_count - 1:
+                # connect neighboring passes, only valid in "flowchart"
+                next = self.passes[i+1]
+                next_name = f"Pass{i+1}"
+                markdown.write('%s -.-> %s\n' % (pass_name, next_name))
+        markdown.write('</div>\n\n')
+
+        # linear order
+        dag = set()
+        # markdown.write('<h1>PSO diagram</h1>\n')
+        # markdown.write('<div class="mermaid">\n')
+        # markdown.write('graph LR\n')
+
+        # state_count = len(g_states)
+
+        # for i in range(1, state_count):
+        #     src = g_states[i]
+        #     markdown.write('%s ==> %s\n' % (g_states[i-1].name, g_states[i].name))
+        #     for c in src.getFirstDraw().color_buffers:
+        #         if is_null_resource(c):
+        #             continue
+        #         for j in range(i+1, state_count):
+        #             dst = g_states[j]
+        #             for t in dst.getFirstDraw().textures:
+        #                 if is_null_resource(t):
+        #                     continue
+        #                 if c == t:
+        #                     # src.c becomes dst.t
+        #                     dag.add((src, dst, g_resource_catalog.getName(c)))
+
+        # # TODO: merge linear sort and topology sort
+        # for src, dst, c in dag:
+        #     markdown.write('%s -.->|%s| %s\n' % (src.name, c, dst.name))
+
+        # markdown.writelines('</div>\n\n')
+
+        markdown.save(filename)
+
+    def writeAPIOverview(self, html_file):
+        stats = self.frame_stats
+        if not stats:
+            return
+
+        html_file.write('<div class="api-overview">\n')
+        html_file.write('<h2>📊 API 概览</h2>\n')
+        
+        html_file.write('<div class="stats-section">\n')
+        html_file.write('<h3>🎯 绘制调用统计</h3>\n')
+        html_file.write('<table class="stats-table">\n')
+        html_file.write('<thead>\n')
+        html_file.write('<tr><th>类型</th><th>调用次数</th><th>实例化</th><th>间接</th></tr>\n')
+        html_file.write('</thead>\n')
+        html_file.write('<tbody>\n')
+        html_file.write('<tr><td>绘制</td><td>%d</td><td>%d</td><td>%d</td></tr>\n' % (stats['draws']['calls'], stats['draws']['instanced'], stats['draws']['indirect']))
+        html_file.write('<tr><td>分发</td><td>%d</td><td>0</td><td>%d</td></tr>\n' % (stats['dispatches']['calls'], stats['dispatches']['indirect']))
+        html_file.write('</tbody>\n')
+        html_file.write('</table>\n')
+        html_file.write('</div>\n')
+        
+        html_file.write('<div class="stats-section">\n')
+        html_file.write('<h3>📦 资源更新统计</h3>\n')
+        html_file.write('<table class="stats-table">\n')
+        html_file.write('<thead>\n')
+        html_file.write('<tr><th>调用次数</th><th>客户端写入</th><th>服务器写入</th></tr>\n')
+        html_file.write('</thead>\n')
+        html_file.write('<tbody>\n')
+        html_file.write('<tr><td>%d</td><td>%d</td><td>%d</td></tr>\n' % (stats['updates']['calls'], stats['updates']['clients'], stats['updates']['servers']))
+        html_file.write('</tbody>\n')
+        html_file.write('</table>\n')
+        html_file.write('</div>\n')
+        
+        html_file.write('<div class="stats-section">\n')
+        html_file.write('<h3>🔗 资源绑定统计</h3>\n')
+        html_file.write('<table class="stats-table">\n')
+        html_file.write('<thead>\n')
+        html_file.write('<tr><th>类型</th><th>调用次数</th><th>设置</th><th>空值</th></tr>\n')
+        html_file.write('</thead>\n')
+        html_file.write('<tbody>\n')
+        self.writeBindStats(html_file, '索引缓冲区绑定', stats['indices'])
+        self.writeBindStats(html_file, '顶点缓冲区绑定', stats['vertices'])
+        self.writeBindStats(html_file, '顶点布局绑定', stats['layouts'])
+        self.writeBindStats(html_file, '混合状态绑定', stats['blends'])
+        self.writeBindStats(html_file, '深度模板状态绑定', stats['depths'])
+        self.writeBindStats(html_file, '光栅化状态绑定', stats['rasters'])
+        self.writeBindStats(html_file, '输出合并和UAV绑定', stats['outputs'])
+        html_file.write('</tbody>\n')
+        html_file.write('</table>\n')
+        html_file.write('</div>\n')
+        html_file.write('</div>\n')
+
+    def writeIndexHtml(self, html_file):
+
+        pipelineTypes = [
+                "D3D11",
+                "D3D12",
+                "OpenGL",
+                "Vulkan",
+        ]
+        GPUVendors = [
+            "Unknown",
+            "ARM",
+            "AMD",
+            "Broadcom",
+            "Imagination",
+            "Intel",
+            "nVidia",
+            "Qualcomm",
+            "Verisilicon",
+            "Software",
+        ]
+
+        api_prop = self.api_properties
+
+        # Header
+        if config['MINIMALIST']:
+            html_file.write(html_minimalist_head)
+        else:
+            html_file.write(html_head)
+        html_file.write('<div style="display: flex; align-items: center; margin-bottom: 20px; background: linear-gradient(135deg, #ff6600, #ff8533); padding: 20px; border-radius: 12px; box-shadow: 0 4px 20px rgba(255,102,0,0.2);">\n')
+        # 复制logo文件到输出目录
+        # 使用assets文件夹中的logo文件
+        html_file.write('<img src="assets/logo.png" alt="Logo" style="height: 50px; margin-right: 15px; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); background: white; padding: 5px;" onerror="this.style.display=\'none\'; console.log(\'Logo加载失败: \' + this.src);">\n')
+        html_file.write('<div>\n')
+        html_file.write('<h1 style="margin: 0; color: white; font-size: 28px; font-weight: bold;">渲染医生</h1>\n')
+        html_file.write('<p style="margin: 5px 0 0 0; color: rgba(255,255,255,0.9); font-size: 14px;">图形渲染分析工具</p>\n')
+        html_file.write('</div>\n')
+        html_file.write('</div>\n')
+        html_file.write(' %s\n' % self.rdc_file)
+
+        # 主要内容区域
+        html_file.write('<div class="main-content">\n')
+        
+        # 1. 帧概览 - 美术资产分析
+        self.writeFrameOverview(html_file)
+        
+        # 2. API概览
+        self.writeAPIOverview(html_file)
+        
+        # 3. 资源概览
+        self.writeResourceOverview(html_file)
+        
+
+
+        # 4. 着色器概览已取消
+        
+        # 5. 绘制概览
+        html_file.write('<div class="pass-section">\n')
+        html_file.write('<div class="pass-header">\n')
+        html_file.write('<div class="pass-title">🎯 绘制概览</div>\n')
+        html_file.write('<div class="pass-stats">\n')
+        html_file.write('<span class="stat-item">📊 总Pass数: %d</span>\n' % len(self.passes))
+        html_file.write('</div>\n')
+        html_file.write('</div>\n')
+        html_file.write('<div class="pass-content-area">\n')
+
+        if self.isSharded():
+            # 每个Pass单独一页，概览只保留表格
+            self.writePassTable(html_file)
+        else:
+            self.writePassSections(html_file)
+
+        html_file.write('</div>\n')
+        html_file.write('</div>\n')
+        
+
+
+        html_file.write('</div>\n')  # main-content
+
+        if not config['MINIMALIST']:
+            html_file.write('<div class="usage-section">\n')
+            html_file.write('<h2>📖 使用说明</h2>\n')
+            if config.get('WRITE_DRAW_LIST', True):
+                html_file.write('<p>以下快捷键用于 <a href="assets/%s">绘制列表</a></p>\n' % DRAW_LIST_FILE)
+            html_file.write('<ul>\n')
+            html_file.write('<li>按 <code>p</code> / <code>shift+p</code> 在通道间跳转</li>\n')
+            html_file.write('<li>按 <code>s</code> / <code>shift+s</code> 在状态间跳转</li>\n')
+            html_file.write('<li>按 <code>d</code> / <code>shift+d</code> 在绘制调用间跳转</li>\n')
+            html_file.write('</ul>\n')
+            html_file.write('</div>\n')
+
+            html_file.write('<div class="summary-section">\n')
+            html_file.write('<h2>📋 总结</h2>\n')
+            if config['WRITE_PSO_DAG']:
+                html_file.write('<p>• 实验功能 <a href="assets/dag.html">管道图</a></p>\n')
+            if config.get('WRITE_PROFILE', True):
+                html_file.write('<p>• 脚本耗时 <a href="assets/%s">性能分析</a></p>\n' % PROFILE_HTML)
+            html_file.write('<p>• RDC: %s</p>\n' % self.rdc_file)
+            html_file.write('<p>• API: %s</p>\n' % pipelineTypes[api_prop['pipelineType']])
+            html_file.write('<p>• GPU: %s</p>\n' % GPUVendors[api_prop['vendor']])
+            if config['WRITE_CONST_BUFFER']:
+                html_file.write('<p>• 常量缓冲: 复用 %d 次, 读取 %d 次</p>\n' % (self.cbuffer_stats['hits'], self.cbuffer_stats['misses'] + self.cbuffer_stats['uncached']))
+            if config['WRITE_ALL_DRAWS'] and (config['WRITE_COLOR_BUFFER'] or config['WRITE_DEPTH_BUFFER']):
+                # only meaningful when every draw is compared against the one before it
+                self.writeZeroContributionDraws(html_file)
+            html_file.write('</div>\n')
+
+# Config section hidden
+
+
+
+        html_file.write('\n</body>\n</html>')
+
+        if config['WRITE_PSO_DAG']:
+            try:
+                self.writeDAG()
+            except Exception as e:
+                g_log.exception('report', 'writeDAG failed: %s', e)
+
+    @g_profiler.wrap(cat='io')
+    def writeDrawList(self):
+        # states and markers are shared by many draws, rows refer to them by index
+        sharded = self.isSharded()
+        markers = OrderedDict()
+        states = []
+        passes = []
+        rows = []
+        for p in self.passes:
+            passes.append([p.getName(), p.getPageName() if sharded else ''])
+            for s in p.states:
+                states.append([s.getUniqueName(), s.getUniqueName() + '.html'])
+                for d in s.draws:
+                    marker = markers.setdefault(d.marker or '', len(markers))
+                    rows.append([d.draw_id, d.event_id, d.name, marker, len(states) - 1, len(passes) - 1, round(d.gpu_duration, 6), d.getThumbnail()])
+        data = {
+            'version': DRAW_INDEX_VERSION,
+            'fields': ['draw_id', 'event_id', 'name', 'marker', 'state', 'pass', 'gpu', 'thumb'],
+            'markers': list(markers),
+            'states': states,
+            'passes': passes,
+            'draws': rows,
+        }
+        with open(g_assets_folder / DRAW_INDEX_FILE, 'w', encoding='utf-8') as f:
+            # dumps runs the C encoder, dump to a file goes through the pure python one
+            f.write('window.RD_DRAW_INDEX = %s;\n' % json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+
+        page = HtmlBuffer()
+        page.write(PAGE_HEAD_TEMPLATE % {'title': '绘制列表', 'prefix': '', 'extra': '', 'body_class': 'detail-page'})
+        page.write('<div class="header">\n<h1>🎯 绘制列表</h1>\n')
+        page.write('<p>%d 个绘制调用, <code>p</code> / <code>s</code> / <code>d</code> 跳到下一个通道 / 状态 / 绘制调用, 加 <code>shift</code> 向前. <a href="../index.html" style="color: white">返回概览</a></p>\n</div>\n' % len(rows))
+        page.write('<div class="draw-list-layout">\n<div id="draw-list" class="draw-list"></div>\n<div id="draw-detail" class="draw-detail"></div>\n</div>\n')
+        page.write('<script src="%s"></script>\n<script src="%s"></script>\n</body>\n</html>' % (DRAW_INDEX_FILE, DRAW_LIST_JS_FILE))
+        page.save(g_assets_folder / DRAW_LIST_FILE)
+
+    def isSharded(self):
+        # big frames keep only a pass table in index.html, the sections go to assets/pass_NNNN.html
+        shard_passes = config.get('INDEX_SHARD_PASSES', 64)
+        return 0 < shard_passes < len(self.passes)
+
+    def writePassTable(self, html_file):
+        html_file.write('<table class="frame-overview-table">\n')
+        html_file.write('<tr><th>Pass</th><th>名称</th><th>标记</th><th>状态</th><th>绘制调用</th><th>GPU 耗时</th></tr>\n')
+        rows = []
+        for p in self.passes:
+            marker = p.draws[0].marker if p.draws else ''
+            rows.append(PASS_ROW_TEMPLATE % (p.getPageName(), p.pass_id, p.getName(), marker or '', len(p.states), len(p.draws), format_time_duration(p.getGpuDuration() * 1000)))
+        html_file.write(''.join(rows))
+        html_file.write('</table>\n')
+
+    def writePassSections(self, html_file):
+        # 创建表格容器
+        html_file.write('<table class="pass-table">\n')
+        html_file.write('<tbody>\n')
+        
+        # 遍历所有Pass并显示详细信息
+        for i, p in enumerate(self.passes):
+            html_file.write('<tr>\n')
+            html_file.write('<td class="pass-detail-cell">\n')
+            
+            # 显示Pass标题
+            html_file.write('<div class="pass-detail-header">\n')
+            html_file.write('<div class="pass-detail-title">Pass%d</div>\n' % (i + 1))
+            html_file.write('</div>\n')
+            
+            # 显示Pass的详细信息（保持原有的writeIndexHtml调用）
+            p.writeIndexHtml(html_file)
+            
+            html_file.write('</td>\n')
+            html_file.write('</tr>\n')
+        
+        html_file.write('</tbody>\n')
+        html_file.write('</table>\n')
+
+    @classmethod
+    def fromRaw(cls, raw):
+        frame = cls()
+        frame.draws = [Draw.fromRaw(d) for d in raw['draws']] # traversal order
+        frame.passes = [Pass.fromRaw(p, frame.draws) for p in raw['passes']]
+        frame.textures = set(RawResourceId.get(v) for v in raw['textures'])
+        frame.texture_tips = raw['texture_tips']
+        frame.api_properties = raw['api_properties']
+        frame.frame_stats = raw['frame_stats']
+        frame.overview = FrameOverview.fromRaw(raw['overview'])
+
+        # state names shared by several passes get the pass name as prefix in dag.html
+        frame.stateNameDict = defaultdict(int)
+        for p in frame.passes:
+            for name in p.getStateNames():
+                frame.stateNameDict[name] += 1
+        return frame
+
+    rdc_file = ''
+    cbuffer_stats = None
+    overview = None
+    draws = None
+    passes = None
+
+g_frame = None
+g_resource_catalog = None
+g_assets_folder = None
+g_output_folder = None
+
+def load_config():
+    # rd.py shares this dict, so it is updated in place
+    config_json = Path(os.getenv('APPDATA') or Path.home(), 'rd.json')
+
+    try:
+        with open(config_json) as f:
+            loaded = json.load(f)
+        config.clear()
+        config.update(loaded)
+    except Exception as e:
+        with open(config_json, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(config, indent=4))
+
+@g_profiler.wrap(cat='io')
+def load_raw_data(file_name):
+    global g_resource_catalog
+    global g_frame
+
+    # only new objects are created here, collector passes over them are wasted time
+    gc.disable()
+    try:
+        with open(file_name, encoding='utf-8') as f:
+            raw = json.load(f)
+        if raw.get('version') != RAW_DATA_VERSION:
+            raise RuntimeError('%s has version %s, expected %d, replay the capture again' % (file_name, raw.get('version'), RAW_DATA_VERSION))
+
+        g_resource_catalog = ResourceCatalog.fromRaw(raw['catalog'])
+        g_frame = Frame.fromRaw(raw['frame'])
+    finally:
+        gc.enable()
+    g_frame.rdc_file = raw['rdc_file']
+    g_frame.cbuffer_stats = raw['cbuffer_stats']
+
+def generate_report(raw_data_file):
+    # index.html goes next to the assets folder holding raw_data.json, returns its path
+    global g_assets_folder
+    global g_output_folder
+
+    g_log.info('report', '^generate_report')
+    start = time.time()
+    g_assets_folder = Path(raw_data_file).parent
+    g_output_folder = g_assets_folder.parent
+    load_raw_data(raw_data_file)
+
+    with g_profiler.span('write_static_assets', 'io'):
+        write_static_assets(g_assets_folder)
+
+    report_name = g_output_folder / 'index.html'
+    index_html = HtmlBuffer()
+    g_frame.writeIndexHtml(index_html)
+    with g_profiler.span('write_index', 'io'):
+        index_html.save(report_name)
+
+    if config.get('WRITE_DRAW_LIST', True) and not config['MINIMALIST']:
+        g_frame.writeDrawList()
+    g_log.info('report', '%s ready after %.2fs, %d draws', report_name, time.time() - start, len(g_frame.draws))
+
+    passes = g_frame.passes
+    sharded = g_frame.isSharded()
+    if sharded or not config['MINIMALIST']:
+        for i, p in enumerate(passes):
+            if sharded:
+                p.writePageHtml(passes[i - 1] if i > 0 else None, passes[i + 1] if i + 1 < len(passes) else None)
+            if not config['MINIMALIST']:
+                p.writeDetailHtml()
+            g_log.progress('report', i + 1, len(passes))
+
+    g_log.info('report', '$generate_report')
+    return report_name
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('usage: python rd_report.py <report folder>[/assets/raw_data.json]')
+        sys.exit(1)
+
+    start = time.time()
+    raw_data_file = Path(sys.argv[1]).absolute()
+    if raw_data_file.is_dir():
+        raw_data_file = raw_data_file / 'assets' / RAW_DATA_FILE
+    load_config()
+    g_log.configure(config)
+    g_log.open(raw_data_file.parent / RUN_LOG_FILE, 'a')
+    g_log.info('main', '=== rd_report.py %s', raw_data_file)
+    g_asset_store.load(raw_data_file.parent)
+    report_name = generate_report(raw_data_file)
+    g_log.info('main', '%s (%.2fs)', report_name, time.time() - start)
+    g_log.close()